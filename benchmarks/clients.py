@@ -0,0 +1,81 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.servers.basehttp import ThreadedWSGIServer
+from django.test import Client, modify_settings
+from django.test.testcases import QuietWSGIRequestHandler
+
+
+class TestClient:
+    """
+    Sends benchmark requests through Django's test client, in process.
+    """
+
+    def __init__(self):
+        self.client = Client()
+
+    def request(self, method, path, data=None, token=None):
+        """
+        Send a JSON request.
+
+        Returns:
+            tuple: The response's status code and body.
+        """
+
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        response = self.client.generic(
+            method,
+            path,
+            json.dumps(data) if data is not None else "",
+            content_type="application/json",
+            headers=headers,
+        )
+        return response.status_code, response.content
+
+    def close(self):
+        pass
+
+
+class ServerClient:
+    """
+    Sends benchmark requests over HTTP to a threaded WSGI server running in process, so that
+    timings include the server and the HTTP round trip.
+    """
+
+    host = "127.0.0.1"
+
+    def __init__(self):
+        self.allowed_host = modify_settings(ALLOWED_HOSTS={"append": self.host})
+        self.allowed_host.enable()
+        self.server = ThreadedWSGIServer(
+            (self.host, 0), QuietWSGIRequestHandler, allow_reuse_address=False
+        )
+        self.server.set_app(WSGIHandler())
+        self.base_url = f"http://{self.host}:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def request(self, method, path, data=None, token=None):
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        request = urllib.request.Request(
+            self.base_url + path,
+            data=json.dumps(data).encode() if data is not None else None,
+            headers=headers,
+            method=method,
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as error:
+            return error.code, error.read()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.allowed_host.disable()
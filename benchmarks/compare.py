@@ -0,0 +1,36 @@
+def find_regressions(results, baseline, threshold):
+    """
+    Compare benchmark results with a baseline run.
+
+    Args:
+        results (dict): Scenario results of the current run, as produced by `measure`.
+        baseline (dict): Scenario results of the baseline run.
+        threshold (float): The tolerated slowdown, in percent.
+
+    Returns:
+        list: A description of each scenario whose throughput dropped, or whose p95 latency
+        grew, by more than `threshold` percent. Scenarios missing from either run are skipped.
+    """
+
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        throughput = _change(result["ops_per_sec"], before["ops_per_sec"])
+        if throughput < -threshold:
+            regressions.append(
+                f"{name}: throughput {before['ops_per_sec']} -> "
+                f"{result['ops_per_sec']} ops/s ({throughput:+.1f}%)"
+            )
+        latency = _change(result["p95_ms"], before["p95_ms"])
+        if latency > threshold:
+            regressions.append(
+                f"{name}: p95 {before['p95_ms']} -> {result['p95_ms']} ms "
+                f"({latency:+.1f}%)"
+            )
+    return regressions
+
+
+def _change(value, before):
+    return (value - before) / before * 100 if before else 0.0
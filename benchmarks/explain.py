@@ -0,0 +1,165 @@
+import re
+import threading
+from contextlib import contextmanager
+
+from django.db import DatabaseError, connections
+from django.db.backends.signals import connection_created
+
+# A SQLite plan step visiting every row of a table, directly or in the order of an index.
+SQLITE_FULL_SCAN = re.compile(
+    r"^SCAN (?P<table>\w+)\b(?! VIRTUAL TABLE)(?P<index> USING (?:COVERING )?INDEX)?"
+)
+WHERE = re.compile(r"\bWHERE\b", re.IGNORECASE)
+POSTGRES_FULL_SCAN = re.compile(r"Seq Scan on (?P<table>\w+)")
+
+
+def explain(connection, sql, params):
+    """
+    Return the plan of a query as lines of text.
+
+    The plan is read with a cursor of its own, bypassing execute wrappers and query logging.
+
+    Args:
+        connection (BaseDatabaseWrapper): The connection the query runs on.
+        sql (str): The query, with the backend's placeholders.
+        params (list | tuple | None): The query's parameters.
+
+    Returns:
+        list: The steps of the plan, or None if the backend is not supported or the query
+        cannot be explained.
+    """
+
+    if connection.vendor == "sqlite":
+        statement = "EXPLAIN QUERY PLAN " + sql
+    elif connection.vendor == "postgresql":
+        statement = "EXPLAIN " + sql
+    else:
+        return None
+    cursor = connection.create_cursor()
+    try:
+        cursor.execute(statement, params)
+        return [row[-1] if connection.vendor == "sqlite" else row[0] for row in cursor]
+    except DatabaseError:
+        return None
+    finally:
+        cursor.close()
+
+
+def full_scans(plan, vendor, filtered=True):
+    """
+    Return the tables (or their aliases in the query) read in full by a query plan.
+
+    Walking an index rather than searching it only counts as a full scan when the query is
+    `filtered`: the filter then lacks an index and every row is visited to test it. Without a
+    filter, the walk reads rows in the index's order, e.g. for a page of the catalogue, and
+    stops at the LIMIT.
+
+    Args:
+        plan (list): The plan, as returned by `explain`.
+        vendor (str): The vendor of the connection the plan was read from.
+        filtered (bool): Whether the query has a WHERE clause.
+
+    Returns:
+        list: The scanned tables, in plan order.
+    """
+
+    scans = []
+    for step in plan or ():
+        if vendor == "sqlite":
+            match = SQLITE_FULL_SCAN.search(step.strip())
+            if match and (
+                match["index"] and not filtered or match["table"] == "CONSTANT"
+            ):
+                match = None
+        else:
+            match = POSTGRES_FULL_SCAN.search(step)
+        if match:
+            scans.append(match["table"])
+    return scans
+
+
+class QueryPlanCollector:
+    """
+    Database execute wrapper explaining every distinct SELECT run through it, once, and
+    counting how often each ran.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._queries = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip()[:6].upper() in ("SELECT", "WITH "):
+            self.record(context["connection"], sql, params)
+        return execute(sql, params, many, context)
+
+    def record(self, connection, sql, params):
+        with self._lock:
+            query = self._queries.get(sql)
+            if query is not None:
+                query["count"] += 1
+                return
+        plan = explain(connection, sql, params)
+        with self._lock:
+            query = self._queries.setdefault(
+                sql,
+                {
+                    "count": 0,
+                    "plan": plan,
+                    "scans": full_scans(
+                        plan, connection.vendor, filtered=bool(WHERE.search(sql))
+                    ),
+                },
+            )
+            query["count"] += 1
+
+    def full_scans(self, ignore=()):
+        """
+        Return the queries reading a whole table, most frequent first.
+
+        Args:
+            ignore (iterable): Tables whose full scans are not reported.
+
+        Returns:
+            list: `(sql, count, tables, plan)` tuples.
+        """
+
+        with self._lock:
+            queries = list(self._queries.items())
+        flagged = []
+        for sql, query in queries:
+            tables = [table for table in query["scans"] if table not in ignore]
+            if tables:
+                flagged.append((sql, query["count"], tables, query["plan"]))
+        return sorted(flagged, key=lambda flagged: -flagged[1])
+
+    def as_dict(self):
+        with self._lock:
+            return {sql: dict(query) for sql, query in self._queries.items()}
+
+
+@contextmanager
+def collect_query_plans(collector):
+    """
+    Install `collector` on this thread's connections and on those opened meanwhile on any
+    thread.
+    """
+
+    def install(sender, connection, **kwargs):
+        if collector not in connection.execute_wrappers:
+            connection.execute_wrappers.append(collector)
+
+    for connection in connections.all(initialized_only=True):
+        install(None, connection)
+    connection_created.connect(install)
+    try:
+        yield collector
+    finally:
+        connection_created.disconnect(install)
+        for connection in connections.all(initialized_only=True):
+            if collector in connection.execute_wrappers:
+                connection.execute_wrappers.remove(collector)
@@ -0,0 +1,8 @@
+from jobs.queue import job
+
+
+@job
+def noop(*args, **kwargs):
+    """
+    Do nothing, so that `bench_jobs` measures the queue itself.
+    """
@@ -0,0 +1,260 @@
+import asyncio
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import RequestFactory, override_settings
+
+from benchmarks.seed import seed
+from benchmarks.utils import throwaway_database
+from ecommerce.asyncviews import AsyncViewsASGIHandler
+from users.authentication import UserClaimsRefreshToken
+
+MODES = {
+    # Sync views on a fixed pool of worker threads, like a threaded WSGI server.
+    "wsgi": "sync views, WSGI thread pool",
+    # Sync views under Django's ASGI handler, each request run in a thread.
+    "asgi-sync": "sync views, ASGI",
+    # The async views of ASGI_URLCONF.
+    "asgi": "async views, ASGI",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test the product list and view_cart endpoints under a simulated slow database, "
+        "comparing the sync views on a WSGI thread pool, the sync views under ASGI and the "
+        "async views of ASGI_URLCONF, at increasing numbers of concurrent clients. "
+        "Applications are called in process, without an HTTP server."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            nargs="+",
+            default=[1, 10, 50, 200],
+            help="Numbers of concurrent clients, each sending requests back to back.",
+        )
+        parser.add_argument(
+            "--requests", type=int, default=400, help="Requests per measurement."
+        )
+        parser.add_argument(
+            "--db-latency",
+            type=float,
+            default=100,
+            help="Milliseconds added to every database query.",
+        )
+        parser.add_argument(
+            "--threads", type=int, default=8, help="Worker threads of the WSGI pool."
+        )
+        parser.add_argument("--products", type=int, default=500)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{options['db_latency']:g} ms per query, {options['threads']} WSGI threads\n"
+            f"{'endpoint':<10} {'mode':<10} {'clients':>7} {'req/s':>8} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'threads':>7} {'errors':>6}"
+        )
+        # The response cache would answer the product list without the database.
+        dummy_cache = {
+            "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+        }
+        with throwaway_database(), override_settings(CACHES=dummy_cache):
+            pks = seed(users=1, products=options["products"], orders=0)
+            user = User.objects.get(pk=pks["users"][0])
+            token = UserClaimsRefreshToken.for_user(user).access_token
+            endpoints = {
+                "products": ("/products/products/?page_size=20", {}),
+                "view_cart": (
+                    f"/cart/cart/view/{user.pk}/",
+                    {"authorization": f"Bearer {token}"},
+                ),
+            }
+            connection.close()
+            with slow_database(options["db_latency"] / 1000):
+                for endpoint, (url, headers) in endpoints.items():
+                    for mode in MODES:
+                        for clients in options["concurrency"]:
+                            result = self.bench(
+                                mode,
+                                url,
+                                headers,
+                                clients,
+                                options["requests"],
+                                options["threads"],
+                            )
+                            self.stdout.write(
+                                f"{endpoint:<10} {mode:<10} {clients:>7} "
+                                f"{result['requests_per_sec']:>8} "
+                                f"{result['p50_ms']:>8} {result['p95_ms']:>8} "
+                                f"{result['threads']:>7} {result['errors']:>6}"
+                            )
+
+    def bench(self, mode, url, headers, clients, requests, threads):
+        if mode == "wsgi":
+            application = WSGIHandler()
+            pool = ThreadPoolExecutor(threads)
+
+            async def call():
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(
+                    pool, call_wsgi, application, url, headers
+                )
+
+        else:
+            application = (
+                ASGIHandler() if mode == "asgi-sync" else AsyncViewsASGIHandler()
+            )
+            pool = None
+
+            async def call():
+                return await call_asgi(application, url, headers)
+
+        try:
+            with ThreadCounter() as counter:
+                result = asyncio.run(load(call, clients, requests))
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        result["threads"] = counter.peak
+        return result
+
+
+async def load(call, clients, requests):
+    """
+    Send `requests` requests from `clients` concurrent clients, each waiting for its response
+    before sending the next one.
+
+    Returns:
+        dict: Throughput, latency percentiles in milliseconds and the number of non-200 responses.
+    """
+
+    remaining = iter(range(requests))
+    timings = []
+    errors = 0
+
+    async def client():
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            status = await call()
+            timings.append(time.perf_counter() - start)
+            errors += status != 200
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    percentiles = statistics.quantiles(timings, n=100, method="inclusive")
+    return {
+        "requests_per_sec": round(requests / elapsed, 1),
+        "p50_ms": round(percentiles[49] * 1000, 1),
+        "p95_ms": round(percentiles[94] * 1000, 1),
+        "errors": errors,
+    }
+
+
+def call_wsgi(application, url, headers):
+    environ = RequestFactory().get(url, headers=headers).environ
+    statuses = []
+    response = application(environ, lambda status, _, *args: statuses.append(status))
+    try:
+        b"".join(response)
+    finally:
+        response.close()
+    return int(statuses[0].split()[0])
+
+
+async def call_asgi(application, url, headers):
+    url = urlsplit(url)
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": url.path,
+        "raw_path": url.path.encode(),
+        "query_string": url.query.encode(),
+        "root_path": "",
+        "headers": [
+            (b"host", b"testserver"),
+            *((name.encode(), value.encode()) for name, value in headers.items()),
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": ("testserver", 80),
+    }
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+    statuses = []
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # The client never disconnects; Django cancels this once it has responded.
+        await asyncio.Future()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    await application(scope, receive, send)
+    return statuses[0]
+
+
+@contextmanager
+def slow_database(latency):
+    """
+    Add `latency` seconds to every query of the connections opened meanwhile, blocking the
+    calling thread like a remote database would.
+    """
+
+    def delay(execute, sql, params, many, context):
+        time.sleep(latency)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        # Connections are reopened per request on the same wrapper object.
+        if delay not in connection.execute_wrappers:
+            connection.execute_wrappers.append(delay)
+
+    connection_created.connect(install)
+    try:
+        yield
+    finally:
+        connection_created.disconnect(install)
+        if delay in connection.execute_wrappers:
+            connection.execute_wrappers.remove(delay)
+
+
+class ThreadCounter:
+    """
+    Sample the number of live threads in the background, keeping the peak above the baseline.
+    """
+
+    interval = 0.001
+
+    def __enter__(self):
+        self.baseline = threading.active_count()
+        self.peak = 0
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self.sample, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.done.set()
+        self.thread.join()
+
+    def sample(self):
+        while not self.done.wait(self.interval):
+            # Less this sampling thread.
+            self.peak = max(self.peak, threading.active_count() - self.baseline - 1)
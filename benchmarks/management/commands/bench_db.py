@@ -0,0 +1,169 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    OperationalError,
+    close_old_connections,
+    connection,
+    connections,
+    transaction,
+)
+
+from benchmarks.seed import seed
+from benchmarks.utils import throwaway_database
+from cart.models import Cart, CartItem
+from cart.serializers import CartItemValuesSerializer
+from ecommerce.database import sqlite_options
+from products.models import ProductModel
+
+# Database settings and journal mode of each profile.
+PROFILES = {
+    # Django's defaults: a connection per request, rollback journal, deferred transactions.
+    "default": (
+        {"CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": False, "OPTIONS": {}},
+        "DELETE",
+    ),
+    # ecommerce.database's defaults.
+    "tuned": (
+        {"CONN_MAX_AGE": 60, "CONN_HEALTH_CHECKS": True, "OPTIONS": sqlite_options()},
+        "WAL",
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure concurrent cart write and read throughput on SQLite with Django's default "
+        "database settings and with the tuning of ecommerce.database (persistent connections, "
+        "WAL, synchronous=NORMAL, busy timeout, mmap, BEGIN IMMEDIATE)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--writers", type=int, default=4, help="Threads adding to carts."
+        )
+        parser.add_argument(
+            "--readers", type=int, default=8, help="Threads viewing carts."
+        )
+        parser.add_argument(
+            "--duration", type=float, default=5, help="Seconds per profile."
+        )
+        parser.add_argument(
+            "--profiles", nargs="+", choices=list(PROFILES), default=list(PROFILES)
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{options['writers']} writers, {options['readers']} readers, "
+            f"{options['duration']:g} s per profile\n"
+            f"{'profile':<8} {'writes/s':>9} {'write p95':>10} {'reads/s':>9} "
+            f"{'read p95':>9} {'errors':>7}"
+        )
+        with throwaway_database():
+            pks = seed(
+                users=options["writers"] + options["readers"],
+                products=200,
+                cart_items=5,
+                orders=0,
+            )
+            for name in options["profiles"]:
+                with database_profile(*PROFILES[name]):
+                    result = self.bench(pks, options)
+                self.stdout.write(
+                    f"{name:<8} {result['writes_per_sec']:>9} "
+                    f"{result['write_p95_ms']:>10} {result['reads_per_sec']:>9} "
+                    f"{result['read_p95_ms']:>9} {result['errors']:>7}"
+                )
+
+    def bench(self, pks, options):
+        users = pks["users"]
+        products = pks["products"]
+        deadline = time.perf_counter() + options["duration"]
+        results = {"write": [], "read": [], "errors": []}
+
+        def worker(operation, user_id, seed):
+            rng = random.Random(seed)
+            timings, errors = [], 0
+            try:
+                while time.perf_counter() < deadline:
+                    # Each iteration stands for a request.
+                    close_old_connections()
+                    start = time.perf_counter()
+                    try:
+                        operation(user_id, rng)
+                    except OperationalError:
+                        errors += 1
+                    else:
+                        timings.append(time.perf_counter() - start)
+                    close_old_connections()
+            finally:
+                connection.close()
+            results["write" if operation is add_to_cart else "read"].extend(timings)
+            results["errors"].append(errors)
+
+        def add_to_cart(user_id, rng):
+            cart = Cart.objects.for_user(user_id)
+            product = ProductModel.objects.get(pk=rng.choice(products))
+            with transaction.atomic():
+                CartItem.objects.add(cart, product)
+                cart.bump_version()
+
+        def view_cart(user_id, rng):
+            cart = Cart.objects.for_user(rng.choice(users))
+            rows = CartItemValuesSerializer.values_queryset(
+                CartItem.objects.filter(cart=cart)
+            )
+            CartItemValuesSerializer(rows, many=True).data
+
+        threads = [
+            threading.Thread(target=worker, args=(add_to_cart, users[i], i))
+            for i in range(options["writers"])
+        ] + [
+            threading.Thread(target=worker, args=(view_cart, None, -i - 1))
+            for i in range(options["readers"])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        duration = options["duration"]
+        return {
+            "writes_per_sec": round(len(results["write"]) / duration, 1),
+            "write_p95_ms": _p95_ms(results["write"]),
+            "reads_per_sec": round(len(results["read"]) / duration, 1),
+            "read_p95_ms": _p95_ms(results["read"]),
+            "errors": sum(results["errors"]),
+        }
+
+
+@contextmanager
+def database_profile(profile, journal_mode):
+    """
+    Apply `profile` to the settings of the default database, for the connections opened
+    meanwhile on any thread, and switch the database file to `journal_mode`.
+    """
+
+    settings_dict = connections.settings[DEFAULT_DB_ALIAS]
+    saved = {key: settings_dict[key] for key in profile}
+    connection.close()
+    settings_dict.update(profile)
+    with connection.cursor() as cursor:
+        cursor.execute(f"PRAGMA journal_mode={journal_mode}")
+    connection.close()
+    try:
+        yield
+    finally:
+        connection.close()
+        settings_dict.update(saved)
+
+
+def _p95_ms(timings):
+    if not timings:
+        return "-"
+    timings = sorted(timings)
+    return round(timings[int(len(timings) * 0.95)] * 1000, 1)
@@ -0,0 +1,110 @@
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from benchmarks.seed import seed
+from benchmarks.utils import throwaway_database
+from cart.models import Cart, CartItem
+from inventory.models import Stock
+from orders.models import OrderItemModel
+from products.models import ProductModel
+
+ADDRESS = {
+    "country": "EG",
+    "city": "Cairo",
+    "state": "Cairo",
+    "street": "Tahrir",
+    "phone": "0100",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Flash sale: concurrent checkouts racing for the last units of one product, with its "
+        "stock in one row or sharded. Reports checkout throughput and fails on any oversell."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--buyers", type=int, default=100, help="Concurrent checkouts."
+        )
+        parser.add_argument("--units", type=int, default=50, help="Units on sale.")
+        parser.add_argument(
+            "--shards",
+            type=int,
+            nargs="+",
+            default=[1, 8],
+            help="Stock rows of the product, one run each.",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{options['buyers']} buyers, {options['units']} units\n"
+            f"{'shards':>6} {'checkouts/s':>12} {'sold':>5} {'refused':>8} "
+            f"{'errors':>7} {'stock left':>11}"
+        )
+        with throwaway_database():
+            seed(users=options["buyers"], products=1, cart_items=0, orders=0)
+            users = list(User.objects.filter(username__startswith="bench-"))
+            product = ProductModel.objects.get()
+            for shards in options["shards"]:
+                result = self.bench(product, users, shards, options["units"])
+                self.stdout.write(
+                    f"{shards:>6} {result['checkouts_per_sec']:>12} {result['sold']:>5} "
+                    f"{result['refused']:>8} {result['errors']:>7} {result['left']:>11}"
+                )
+                if result["sold"] > options["units"]:
+                    raise CommandError(f"Oversold {result['sold']} units.")
+
+    def bench(self, product, users, shards, units):
+        Stock.objects.set_stock(product, units, shards=shards)
+        OrderItemModel.objects.all().delete()
+        for user in users:
+            CartItem.objects.upsert(
+                Cart.objects.for_user(user), {product.pk: 1}, increment=False
+            )
+        start = threading.Barrier(len(users) + 1)
+        statuses = []
+
+        def buy(user):
+            client = APIClient()
+            client.force_authenticate(user)
+            try:
+                start.wait()
+                response = client.post(
+                    reverse("orders:order-create", kwargs={"user_id": user.id}),
+                    ADDRESS,
+                )
+                statuses.append(response.status_code)
+            except Exception as exc:
+                statuses.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=buy, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        start.wait()
+        began = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - began
+
+        return {
+            "checkouts_per_sec": round(len(users) / elapsed, 1),
+            "sold": sum(
+                OrderItemModel.objects.filter(product=product).values_list(
+                    "quantity", flat=True
+                )
+            ),
+            "refused": statuses.count(400),
+            "errors": len(statuses) - statuses.count(201) - statuses.count(400),
+            "left": sum(
+                Stock.objects.filter(product=product).values_list("quantity", flat=True)
+            ),
+        }
@@ -0,0 +1,89 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from benchmarks.jobs import noop
+from benchmarks.utils import throwaway_database
+from jobs.models import Job
+from jobs.queue import Worker
+
+
+class Command(BaseCommand):
+    help = (
+        "Job queue throughput: enqueuing with one transaction per job or per batch, and "
+        "draining the queue with concurrent workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--jobs", type=int, default=2000, help="Jobs enqueued.")
+        parser.add_argument(
+            "--per-transaction",
+            type=int,
+            default=100,
+            help="Jobs enqueued per transaction in the batched run.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            nargs="+",
+            default=[1, 4],
+            help="Concurrent workers, one drain run each.",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=10, help="Jobs claimed per query."
+        )
+
+    def handle(self, *args, **options):
+        jobs = options["jobs"]
+        with throwaway_database():
+            self.stdout.write(f"{'enqueue':<24} {'jobs/s':>8}")
+            for per_transaction in (1, options["per_transaction"]):
+                Job.objects.all().delete()
+                elapsed = self.enqueue(jobs, per_transaction)
+                self.stdout.write(
+                    f"{f'{per_transaction} per transaction':<24} {jobs / elapsed:>8.0f}"
+                )
+
+            self.stdout.write(f"\n{'workers':>7} {'jobs/s':>8} {'succeeded':>10}")
+            for workers in options["workers"]:
+                Job.objects.all().delete()
+                self.enqueue(jobs, options["per_transaction"])
+                elapsed, succeeded = self.drain(workers, options["batch_size"])
+                self.stdout.write(
+                    f"{workers:>7} {jobs / elapsed:>8.0f} {succeeded:>10}"
+                )
+
+    def enqueue(self, jobs, per_transaction):
+        began = time.perf_counter()
+        for start in range(0, jobs, per_transaction):
+            with transaction.atomic():
+                for value in range(start, min(start + per_transaction, jobs)):
+                    noop.enqueue(value)
+        return time.perf_counter() - began
+
+    def drain(self, workers, batch_size):
+        start = threading.Barrier(workers + 1)
+        stats = []
+
+        def work(name):
+            worker = Worker(name=name, batch_size=batch_size)
+            try:
+                start.wait()
+                worker.run(burst=True)
+            finally:
+                stats.append(worker.stats)
+                connection.close()
+
+        threads = [
+            threading.Thread(target=work, args=(f"bench-{i}",)) for i in range(workers)
+        ]
+        for thread in threads:
+            thread.start()
+        start.wait()
+        began = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - began
+        return elapsed, sum(stat["succeeded"] for stat in stats)
@@ -0,0 +1,77 @@
+import io
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from ecommerce.parsers import FastJSONParser
+from ecommerce.renderers import FastJSONRenderer
+from products.models import ProductModel
+from products.serializers import ProductSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare DRF's JSONRenderer/JSONParser with the configured FastJSONRenderer/"
+        "FastJSONParser on a product list page, checking that the output is identical."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=10000)
+        parser.add_argument(
+            "--repeat", type=int, default=20, help="Timed runs; the best one is kept."
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        products = [
+            ProductModel(
+                pk=i,
+                name=f"product {i}",
+                price=Decimal(i % 50000) / 100,
+                created_at=now,
+                updated_at=now,
+            )
+            for i in range(options["products"])
+        ]
+        page = {
+            "next": "http://testserver/products/products/?cursor=abc",
+            "previous": None,
+            "results": ProductSerializer(products, many=True).data,
+        }
+
+        rendered = JSONRenderer().render(page)
+        if FastJSONRenderer().render(page) != rendered:
+            raise CommandError("FastJSONRenderer output differs from JSONRenderer.")
+
+        rows = [
+            ("render", JSONRenderer().render, FastJSONRenderer().render, page),
+            (
+                "parse",
+                lambda body: JSONParser().parse(io.BytesIO(body)),
+                lambda body: FastJSONParser().parse(io.BytesIO(body)),
+                rendered,
+            ),
+        ]
+        self.stdout.write(
+            f"{options['products']} products, {len(rendered)} bytes\n"
+            f"{'':<8} {'stdlib ms':>10} {'fast ms':>10} {'speedup':>8}"
+        )
+        for name, stdlib, fast, value in rows:
+            before = self.best(stdlib, value, options["repeat"])
+            after = self.best(fast, value, options["repeat"])
+            self.stdout.write(
+                f"{name:<8} {before * 1000:>10.2f} {after * 1000:>10.2f} "
+                f"{before / after:>7.1f}x"
+            )
+
+    def best(self, call, value, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            call(value)
+            timings.append(time.perf_counter() - start)
+        return min(timings)
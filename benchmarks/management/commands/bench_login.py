@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+
+from benchmarks.utils import measure, throwaway_database
+
+PASSWORD = "correct horse battery staple"
+
+ENDPOINTS = {
+    # Verifies the password, then writes a session and `last_login` before minting tokens.
+    "session": "/users/login/",
+    # Verifies the password and mints tokens, without any write.
+    "jwt": "/users/token/",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure logins/sec on one core for the session and JWT-only login endpoints, at "
+        "one or more password hasher work factors, against a throwaway database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=20,
+            help="Number of timed logins per endpoint and work factor.",
+        )
+        parser.add_argument(
+            "--hash-iterations",
+            type=int,
+            nargs="+",
+            help="PBKDF2 iteration counts to compare. Defaults to Django's default "
+            "and the PASSWORD_HASH_ITERATIONS setting.",
+        )
+
+    def handle(self, *args, **options):
+        work_factors = options["hash_iterations"] or [
+            PBKDF2PasswordHasher.iterations,
+            settings.PASSWORD_HASH_ITERATIONS,
+        ]
+        self.stdout.write(
+            f"{'hash iterations':>16} {'endpoint':>8} {'logins/s':>9} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'queries':>8}"
+        )
+        with throwaway_database():
+            for work_factor in dict.fromkeys(work_factors):
+                with override_settings(PASSWORD_HASH_ITERATIONS=work_factor):
+                    User.objects.all().delete()
+                    User.objects.create_user(username="bench", password=PASSWORD)
+                    for endpoint, url in ENDPOINTS.items():
+                        result = self.bench(url, options["iterations"])
+                        self.stdout.write(
+                            f"{work_factor:>16} {endpoint:>8} "
+                            f"{result['ops_per_sec']:>9} {result['p50_ms']:>8} "
+                            f"{result['p95_ms']:>8} {result['queries']:>8}"
+                        )
+
+    def bench(self, url, iterations):
+        client = Client()
+        data = {"username": "bench", "password": PASSWORD}
+
+        def login(i):
+            response = client.post(url, data, content_type="application/json")
+            assert response.status_code == 200, response.content
+
+        return measure(login, iterations)
@@ -0,0 +1,151 @@
+import json
+import platform
+from contextlib import ExitStack
+from datetime import datetime, timezone
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from benchmarks.clients import ServerClient, TestClient
+from benchmarks.compare import find_regressions
+from benchmarks.scenarios import SCENARIOS
+from benchmarks.seed import seed
+from benchmarks.utils import measure, throwaway_database
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database with synthetic data and measure the throughput and latency "
+        "of the API endpoints. Results can be written as JSON and compared with a baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "scenarios",
+            nargs="*",
+            help=f"Scenarios to run, among {', '.join(SCENARIOS)} (default: all).",
+        )
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--products", type=int, default=1000)
+        parser.add_argument(
+            "--cart-items", type=int, default=5, help="Products in each seeded cart."
+        )
+        parser.add_argument(
+            "--orders", type=int, default=2, help="Past orders of each seeded user."
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=200,
+            help="Timed calls per scenario.",
+        )
+        parser.add_argument(
+            "--login-iterations",
+            type=int,
+            default=20,
+            help="Timed calls of the login scenario, bounded by the password hasher.",
+        )
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument(
+            "--server",
+            action="store_true",
+            help="Send requests over HTTP to an in-process WSGI server instead of through "
+            "the test client.",
+        )
+        parser.add_argument(
+            "--cold-cache",
+            action="store_true",
+            help="Disable the response cache, to measure the database path.",
+        )
+        parser.add_argument("--output", help="Write the results to this JSON file.")
+        parser.add_argument(
+            "--baseline",
+            help="Compare with the results in this JSON file, failing on regressions.",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=20.0,
+            help="Tolerated throughput drop or p95 growth against the baseline, in percent.",
+        )
+
+    def handle(self, *args, **options):
+        names = options["scenarios"] or list(SCENARIOS)
+        unknown = set(names) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+        scale = {
+            "users": options["users"],
+            "products": options["products"],
+            "cart_items": options["cart_items"],
+            "orders": options["orders"],
+        }
+        results = {}
+        with ExitStack() as stack:
+            if options["cold_cache"]:
+                stack.enter_context(
+                    override_settings(
+                        CACHES={
+                            "default": {
+                                "BACKEND": "django.core.cache.backends.dummy.DummyCache"
+                            }
+                        }
+                    )
+                )
+            stack.enter_context(throwaway_database())
+            seeded = seed(**scale)
+            client = ServerClient() if options["server"] else TestClient()
+            stack.callback(client.close)
+
+            self.stdout.write(
+                f"{'scenario':<16} {'ops/s':>9} {'p50 ms':>9} {'p95 ms':>9} "
+                f"{'p99 ms':>9} {'queries':>8}"
+            )
+            for name in names:
+                scenario = SCENARIOS[name](client, seeded)
+                iterations = options[
+                    "login_iterations" if name == "login" else "iterations"
+                ]
+                result = measure(
+                    scenario.run,
+                    iterations,
+                    warmup=options["warmup"],
+                    prepare=scenario.prepare,
+                )
+                if options["server"]:
+                    # Queries run on the server's threads, out of sight.
+                    result["queries"] = None
+                results[name] = result
+                self.stdout.write(
+                    f"{name:<16} {result['ops_per_sec']:>9} {result['p50_ms']:>9} "
+                    f"{result['p95_ms']:>9} {result['p99_ms']:>9} "
+                    f"{str(result['queries']):>8}"
+                )
+
+        report = {
+            "meta": {
+                "date": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "transport": "wsgi" if options["server"] else "test-client",
+                "cold_cache": options["cold_cache"],
+                "scale": scale,
+            },
+            "results": results,
+        }
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(report, file, indent=2)
+
+        if options["baseline"]:
+            with open(options["baseline"]) as file:
+                baseline = json.load(file)["results"]
+            regressions = find_regressions(results, baseline, options["threshold"])
+            if regressions:
+                raise CommandError(
+                    "Regressions against the baseline:\n" + "\n".join(regressions)
+                )
+            self.stdout.write(
+                self.style.SUCCESS("No regressions against the baseline.")
+            )
@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import get_runner
+
+from benchmarks.explain import QueryPlanCollector, collect_query_plans
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the test suite, EXPLAIN every distinct SELECT it issues and report the queries "
+        "reading a whole table instead of using an index."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "test_labels",
+            nargs="*",
+            help="Tests to run, as for the test command (default: the whole suite).",
+        )
+        parser.add_argument(
+            "--ignore",
+            nargs="+",
+            default=[],
+            metavar="TABLE",
+            help="Tables whose full scans are expected, e.g. small lookup tables.",
+        )
+        parser.add_argument(
+            "--fail",
+            action="store_true",
+            help="Exit with an error when a full scan is found.",
+        )
+        parser.add_argument(
+            "--sql-width",
+            type=int,
+            default=300,
+            help="Characters of each flagged query shown (0 for all).",
+        )
+
+    def handle(self, *args, **options):
+        collector = QueryPlanCollector()
+        test_runner_class = get_runner(settings)
+
+        class ExplainingTestRunner(test_runner_class):
+            # Only the tests' own queries are explained, not the test database's set-up.
+            def run_suite(self, suite, **kwargs):
+                with collect_query_plans(collector):
+                    return super().run_suite(suite, **kwargs)
+
+        runner = ExplainingTestRunner(verbosity=options["verbosity"], interactive=False)
+        failures = runner.run_tests(options["test_labels"])
+        if failures:
+            self.stderr.write(
+                self.style.WARNING(
+                    f"{failures} test(s) failed; plans are still reported."
+                )
+            )
+
+        flagged = collector.full_scans(ignore=set(options["ignore"]))
+        width = options["sql_width"]
+        for sql, count, tables, plan in flagged:
+            self.stdout.write(
+                self.style.WARNING(f"Full scan of {', '.join(tables)} ({count} runs)")
+            )
+            self.stdout.write(f"    {sql[:width] if width else sql}")
+            self.stdout.write(f"    plan: {' / '.join(plan)}")
+        self.stdout.write(
+            f"{len(collector.as_dict())} distinct queries explained, "
+            f"{len(flagged)} with full table scans."
+        )
+        if flagged and options["fail"]:
+            raise CommandError("Queries scan whole tables.")
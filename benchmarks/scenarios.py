@@ -0,0 +1,161 @@
+import json
+from urllib.parse import urlsplit
+
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from cart.models import Cart, CartItem
+from users.authentication import UserClaimsRefreshToken
+from .seed import ADDRESS, ADJECTIVES, NOUNS, PASSWORD
+
+
+class Scenario:
+    """
+    A benchmarked API call.
+
+    `run` is timed for each iteration; `prepare` is run untimed before it, to restore any state
+    the call consumes. Both receive the iteration number and spread the calls over the seeded
+    users and products.
+    """
+
+    name = None
+
+    def __init__(self, client, seeded):
+        self.client = client
+        self.users = seeded["users"]
+        self.products = seeded["products"]
+        self.tokens = {}
+
+    def prepare(self, i):
+        pass
+
+    def run(self, i):
+        raise NotImplementedError
+
+    def user(self, i):
+        return self.users[i % len(self.users)]
+
+    def token(self, user_id):
+        if user_id not in self.tokens:
+            user = User.objects.get(pk=user_id)
+            self.tokens[user_id] = str(
+                UserClaimsRefreshToken.for_user(user).access_token
+            )
+        return self.tokens[user_id]
+
+    def request(self, method, path, data=None, user_id=None, expected=200):
+        token = self.token(user_id) if user_id is not None else None
+        status, body = self.client.request(method, path, data, token)
+        if status != expected:
+            raise AssertionError(
+                f"{self.name}: {method} {path} returned {status}: {body[:200]!r}"
+            )
+        return body
+
+
+class ProductsList(Scenario):
+    """
+    Walk the catalogue page by page, in each of the supported orderings.
+    """
+
+    name = "products_list"
+    orderings = ["price", "-price", "created_at", "-created_at"]
+
+    def __init__(self, client, seeded):
+        super().__init__(client, seeded)
+        self.next_urls = {}
+
+    def run(self, i):
+        ordering = self.orderings[i % len(self.orderings)]
+        url = self.next_urls.get(ordering) or (
+            f"{reverse('products:product-list')}?ordering={ordering}"
+        )
+        page = json.loads(self.request("GET", url))
+        self.next_urls[ordering] = page["next"] and _path(page["next"])
+
+
+class ProductsSearch(Scenario):
+    """
+    Search the catalogue for whole words and prefixes.
+    """
+
+    name = "products_search"
+    terms = ADJECTIVES + NOUNS + ["mu", "tea", "red ke", "blue lamp"]
+
+    def run(self, i):
+        term = self.terms[i % len(self.terms)]
+        self.request("GET", f"{reverse('products:product-list')}?search={term}")
+
+
+class AddToCart(Scenario):
+    name = "add_to_cart"
+
+    def run(self, i):
+        user_id = self.user(i)
+        self.request(
+            "POST",
+            reverse("cart:add_to_cart", kwargs={"user_id": user_id}),
+            {"product": self.products[i % len(self.products)]},
+            user_id,
+        )
+
+
+class ViewCart(Scenario):
+    name = "view_cart"
+
+    def run(self, i):
+        user_id = self.user(i)
+        self.request(
+            "GET", reverse("cart:view_cart", kwargs={"user_id": user_id}), None, user_id
+        )
+
+
+class Checkout(Scenario):
+    """
+    Place an order from a cart refilled with the first products before each call.
+    """
+
+    name = "checkout"
+    cart_items = 5
+
+    def prepare(self, i):
+        cart = Cart.objects.for_user(self.user(i))
+        CartItem.objects.upsert(
+            cart, {product: 1 for product in self.products[: self.cart_items]}
+        )
+
+    def run(self, i):
+        user_id = self.user(i)
+        self.request(
+            "POST",
+            reverse("orders:order-create", kwargs={"user_id": user_id}),
+            ADDRESS,
+            user_id,
+            expected=201,
+        )
+
+
+class Login(Scenario):
+    """
+    Obtain a JWT pair through the session-less token endpoint.
+    """
+
+    name = "login"
+
+    def run(self, i):
+        self.request(
+            "POST",
+            "/users/token/",
+            {"username": f"bench-{i % len(self.users)}", "password": PASSWORD},
+        )
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in [ProductsList, ProductsSearch, AddToCart, ViewCart, Checkout, Login]
+}
+
+
+def _path(url):
+    parts = urlsplit(url)
+    return f"{parts.path}?{parts.query}"
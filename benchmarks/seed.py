@@ -0,0 +1,112 @@
+import random
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.utils.text import slugify
+
+from cart.models import Cart, CartItem
+from orders.models import OrderItemModel, OrderModel
+from products.cache import bump_catalogue_version
+from products.models import ProductModel
+from products.search import get_search_backend
+
+PASSWORD = "correct horse battery staple"
+
+ADJECTIVES = ["red", "blue", "green", "large", "small", "classic", "modern", "vintage"]
+NOUNS = ["mug", "teapot", "kettle", "lamp", "chair", "table", "notebook", "backpack"]
+
+ADDRESS = {
+    "country": "EG",
+    "city": "Cairo",
+    "state": "Cairo",
+    "street": "Tahrir",
+    "phone": "0100",
+}
+
+
+def seed(users=100, products=1000, cart_items=5, orders=2, order_items=3, seed=0):
+    """
+    Fill the database with a reproducible synthetic catalogue, users, carts and order histories.
+
+    Rows are bulk inserted, bypassing `save()` and its signals, so the search index and the
+    catalogue cache are refreshed once at the end.
+
+    Args:
+        users (int): The number of users, all with the password PASSWORD.
+        products (int): The number of products, named from ADJECTIVES and NOUNS.
+        cart_items (int): The number of distinct products in each user's cart.
+        orders (int): The number of past orders of each user.
+        order_items (int): The number of items in each order.
+        seed (int): Seed of the random choices, so that runs are comparable.
+
+    Returns:
+        dict: The primary keys of the seeded users and products.
+    """
+
+    rng = random.Random(seed)
+    password = make_password(PASSWORD)
+    User.objects.bulk_create(
+        User(username=f"bench-{i}", password=password) for i in range(users)
+    )
+    user_rows = list(
+        User.objects.filter(username__startswith="bench-").values_list("pk", "username")
+    )
+
+    ProductModel.objects.bulk_create(
+        (
+            ProductModel(
+                name=name,
+                slug=slugify(name),
+                price=Decimal(rng.randint(100, 50000)) / 100,
+            )
+            for name in (
+                f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {i}"
+                for i in range(products)
+            )
+        ),
+        batch_size=1000,
+    )
+    product_pks = list(ProductModel.objects.values_list("pk", flat=True))
+    prices = dict(ProductModel.objects.values_list("pk", "price"))
+
+    Cart.objects.bulk_create(
+        (Cart(user_id=pk, slug=slugify(username)) for pk, username in user_rows),
+        batch_size=1000,
+    )
+    CartItem.objects.bulk_create(
+        (
+            CartItem(cart=cart, product_id=product, quantity=rng.randint(1, 3))
+            for cart in Cart.objects.order_by("pk").only("pk")
+            for product in rng.sample(product_pks, min(cart_items, len(product_pks)))
+        ),
+        batch_size=1000,
+    )
+
+    created = OrderModel.objects.bulk_create(
+        (
+            OrderModel(user_id=pk, slug=slugify(username), total_price=0, **ADDRESS)
+            for pk, username in user_rows
+            for _ in range(orders)
+        ),
+        batch_size=1000,
+    )
+    items = []
+    for order in created:
+        lines = [
+            (product, rng.randint(1, 3))
+            for product in rng.sample(product_pks, min(order_items, len(product_pks)))
+        ]
+        order.total_price = sum(
+            prices[product] * quantity for product, quantity in lines
+        )
+        items.extend(
+            OrderItemModel(order=order, product_id=product, quantity=quantity)
+            for product, quantity in lines
+        )
+    OrderModel.objects.bulk_update(created, ["total_price"], batch_size=1000)
+    OrderItemModel.objects.bulk_create(items, batch_size=1000)
+
+    get_search_backend().rebuild()
+    bump_catalogue_version()
+    return {"users": [pk for pk, _ in user_rows], "products": product_pks}
@@ -0,0 +1,92 @@
+from django.test import TestCase, override_settings
+
+from orders.models import OrderModel
+from products.models import ProductModel
+
+from .clients import TestClient
+from .compare import find_regressions
+from .explain import QueryPlanCollector, collect_query_plans, full_scans
+from .scenarios import SCENARIOS
+from .seed import seed
+from .utils import measure
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class ScenarioTests(TestCase):
+    """
+    Every benchmark scenario runs against a small seeded database.
+    """
+
+    def test_scenarios_run(self):
+        seeded = seed(users=3, products=20, cart_items=2, orders=1)
+        self.assertEqual(len(seeded["users"]), 3)
+        self.assertEqual(len(seeded["products"]), 20)
+        client = TestClient()
+        for name, scenario in SCENARIOS.items():
+            with self.subTest(scenario=name):
+                scenario = scenario(client, seeded)
+                result = measure(scenario.run, 4, prepare=scenario.prepare)
+                self.assertEqual(result["iterations"], 4)
+                self.assertGreater(result["queries"], 0)
+
+
+class FindRegressionsTests(TestCase):
+    def test_threshold(self):
+        baseline = {
+            "view_cart": {"ops_per_sec": 100, "p95_ms": 10},
+            "login": {"ops_per_sec": 4, "p95_ms": 300},
+        }
+        results = {
+            "view_cart": {"ops_per_sec": 85, "p95_ms": 11.5},
+            "login": {"ops_per_sec": 2, "p95_ms": 300},
+            "checkout": {"ops_per_sec": 1, "p95_ms": 1000},
+        }
+        self.assertEqual(
+            find_regressions(results, baseline, threshold=20),
+            ["login: throughput 4 -> 2 ops/s (-50.0%)"],
+        )
+        self.assertEqual(len(find_regressions(results, baseline, threshold=10)), 3)
+
+
+class ExplainTests(TestCase):
+    def test_full_scans(self):
+        plan = [
+            "SCAN orders_ordermodel",
+            "SEARCH auth_user USING INTEGER PRIMARY KEY (rowid=?)",
+            "SCAN products_productmodel USING INDEX product_price_id_idx",
+            "SCAN products_productmodel USING COVERING INDEX product_updated_idx",
+            "SCAN products_productsearch VIRTUAL TABLE INDEX 0:M2",
+            "SCAN CONSTANT ROW",
+            "SCAN U0",
+        ]
+        self.assertEqual(
+            full_scans(plan, "sqlite"),
+            [
+                "orders_ordermodel",
+                "products_productmodel",
+                "products_productmodel",
+                "U0",
+            ],
+        )
+        # Without a filter, walking an index is reading in its order.
+        self.assertEqual(
+            full_scans(plan, "sqlite", filtered=False), ["orders_ordermodel", "U0"]
+        )
+        self.assertEqual(
+            full_scans(
+                ["Seq Scan on orders_ordermodel  (cost=0.00..1.01)"], "postgresql"
+            ),
+            ["orders_ordermodel"],
+        )
+
+    def test_collector_flags_unindexed_lookups(self):
+        with collect_query_plans(QueryPlanCollector()) as collector:
+            list(ProductModel.objects.filter(name="Cup"))
+            list(OrderModel.objects.filter(city="Cairo"))
+            list(OrderModel.objects.filter(city="Giza"))
+            ProductModel.objects.create(name="Cup", price=1)
+
+        ((sql, count, tables, plan),) = collector.full_scans()
+        self.assertIn('"city" = %s', sql)
+        self.assertEqual((count, tables), (2, ["orders_ordermodel"]))
+        self.assertEqual(collector.full_scans(ignore={"orders_ordermodel"}), [])
@@ -0,0 +1,88 @@
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+
+@contextmanager
+def throwaway_database():
+    """
+    Run the enclosed code against a freshly migrated test database, destroyed on exit.
+
+    Benchmarks never touch the configured database: they seed and measure a copy created the
+    same way as the test runner's (see DATABASES["default"]["TEST"]). DEBUG is turned off, as
+    in production, so that queries are not logged.
+    """
+
+    setup_test_environment(debug=False)
+    old_name = connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False
+    )
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+class QueryCounter:
+    """
+    Database execute wrapper counting the queries run on this thread's connection.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def measure(call, iterations, warmup=1, prepare=None):
+    """
+    Time `iterations` sequential calls of `call` on the current thread.
+
+    Args:
+        call (callable): The operation to time. It receives the iteration number.
+        iterations (int): The number of timed calls.
+        warmup (int): The number of untimed calls made first.
+        prepare (callable): Optional untimed set-up run before each call, e.g. to refill a
+            cart before a checkout. It receives the iteration number.
+
+    Returns:
+        dict: Throughput (`ops_per_sec`), latency percentiles in milliseconds and the mean
+        number of database queries per call made from this thread.
+    """
+
+    for i in range(warmup):
+        if prepare is not None:
+            prepare(i)
+        call(i)
+    timings = []
+    queries = QueryCounter()
+    query_count = 0
+    for i in range(warmup, warmup + iterations):
+        if prepare is not None:
+            prepare(i)
+        before = queries.count
+        with connection.execute_wrapper(queries):
+            start = time.perf_counter()
+            call(i)
+            timings.append(time.perf_counter() - start)
+        query_count += queries.count - before
+    return {
+        "iterations": iterations,
+        "ops_per_sec": round(iterations / sum(timings), 2),
+        "p50_ms": round(_percentile(timings, 50) * 1000, 3),
+        "p95_ms": round(_percentile(timings, 95) * 1000, 3),
+        "p99_ms": round(_percentile(timings, 99) * 1000, 3),
+        "queries": round(query_count / iterations, 2),
+    }
+
+
+def _percentile(values, percentile):
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[percentile - 1]
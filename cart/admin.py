@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.db.models import F
 
 from .models import Cart, CartItem
 
@@ -14,7 +15,7 @@ class CartAdmin(admin.ModelAdmin):
     List Display:
         __str__ (str): The string representation of the cart, typically showing the user's username.
         created_at (datetime): The date and time when the cart was created.
-        get_total_price (float): The total price of all items in the cart, calculated dynamically.
+        get_total_price (Decimal): The total price of all items in the cart, annotated by the queryset.
 
     List Filter:
         user: Filter the list of carts by the user to whom the cart belongs.
@@ -23,6 +24,10 @@ class CartAdmin(admin.ModelAdmin):
 
     list_display = ["__str__", "created_at", "get_total_price"]
     list_filter = ["user", "created_at"]
+    list_select_related = ["user"]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_total_price()
 
 
 @admin.register(CartItem)
@@ -45,3 +50,16 @@ class CartItemAdmin(admin.ModelAdmin):
 
     list_display = ["cart", "product", "quantity", "get_total_price"]
     list_filter = ["cart"]
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        obj.cart.bump_version()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        obj.cart.bump_version()
+
+    def delete_queryset(self, request, queryset):
+        cart_ids = list(queryset.values_list("cart", flat=True).distinct())
+        super().delete_queryset(request, queryset)
+        Cart.objects.filter(pk__in=cart_ids).update(version=F("version") + 1)
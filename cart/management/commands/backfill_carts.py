@@ -0,0 +1,69 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.text import slugify
+
+from cart.models import Cart
+
+
+class Command(BaseCommand):
+    help = (
+        "Create carts in bulk for users who do not have one yet. Carts are otherwise "
+        "created lazily on the first cart write."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of carts inserted per query.",
+        )
+        parser.add_argument(
+            "--prune-empty",
+            action="store_true",
+            help="Instead of creating carts, delete empty carts that were never used "
+            "(e.g. created eagerly at registration); they are recreated on demand.",
+        )
+
+    def handle(self, *args, **options):
+        if options["prune_empty"]:
+            # Carts written to since they were listed are kept: the candidates are locked, and
+            # the delete re-checks that they are still unused, in one transaction.
+            empty = Cart.objects.filter(items__isnull=True, version=0)
+            with transaction.atomic():
+                pks = list(
+                    empty.select_for_update(of=("self",)).values_list("pk", flat=True)
+                )
+                deleted, _ = empty.filter(pk__in=pks).delete()
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} empty carts."))
+            return
+
+        batch_size = options["batch_size"]
+        users = (
+            User.objects.filter(cart__isnull=True)
+            .order_by("pk")
+            .values_list("pk", "username")
+        )
+        created = 0
+        last_pk = 0
+        while True:
+            batch = list(users.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            # Users may get a cart on their first write meanwhile; their rows conflict and are
+            # skipped, so the batch's carts are counted rather than assumed created.
+            carts = Cart.objects.filter(user__in=[pk for pk, _ in batch])
+            with transaction.atomic():
+                existing = carts.count()
+                Cart.objects.bulk_create(
+                    [
+                        Cart(user_id=pk, slug=slugify(username))
+                        for pk, username in batch
+                    ],
+                    ignore_conflicts=True,
+                )
+                created += carts.count() - existing
+            last_pk = batch[-1][0]
+
+        self.stdout.write(self.style.SUCCESS(f"Created {created} carts."))
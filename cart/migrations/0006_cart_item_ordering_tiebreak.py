@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:20
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cart", "0005_cart_item_unique_product"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="cartitem",
+            options={
+                "ordering": ["quantity", "id"],
+                "verbose_name": "Cart Item",
+                "verbose_name_plural": "Cart Items",
+            },
+        ),
+    ]
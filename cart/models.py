@@ -1,11 +1,152 @@
-from django.db import models
+from django.db import connections, models, router
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Max, Sum
 from django.contrib.auth.models import User
 from django.utils.text import slugify
-from django.db.models.signals import post_save
-from django.dispatch import receiver
 from products.models import ProductModel
 
 
+def line_total(prefix=""):
+    """
+    Build the SQL expression for the total price of a cart line.
+
+    Args:
+        prefix (str): The lookup path from the queried model to the CartItem rows,
+            e.g. "items__" when aggregating from Cart.
+
+    Returns:
+        ExpressionWrapper: quantity multiplied by the product's unit price.
+    """
+
+    return ExpressionWrapper(
+        F(f"{prefix}quantity") * F(f"{prefix}product__price"),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+class CartQuerySet(models.QuerySet):
+    def with_total_price(self):
+        """
+        Annotate each cart with `total_price`, summed in the database.
+
+        Returns:
+            QuerySet: The carts annotated with the total price of their items.
+        """
+
+        return self.annotate(total_price=Sum(line_total("items__")))
+
+    def with_product_stamp(self):
+        """
+        Annotate each cart with the `item_count` and latest `products_updated_at` of its items.
+
+        A cart's representation includes its products' current name and price, which change
+        without bumping the cart's version; these stamp them, alongside the version, in the
+        cart's ETag (see `cart.views.cart_etag`).
+
+        Returns:
+            QuerySet: The carts annotated with their product stamp.
+        """
+
+        return self.annotate(
+            item_count=Count("items"),
+            products_updated_at=Max("items__product__updated_at"),
+        )
+
+    def for_user(self, user):
+        """
+        Return a user's cart, creating it on first access.
+
+        Carts are created lazily rather than for every new user, so registration and other user
+        writes do not pay for a cart that may never be used.
+
+        Args:
+            user (User | int): The user, or their primary key.
+
+        Returns:
+            Cart: The user's cart.
+
+        Raises:
+            User.DoesNotExist: If `user` is a primary key that matches no user.
+        """
+
+        user_id = getattr(user, "pk", user)
+        try:
+            return self.get(user_id=user_id)
+        except self.model.DoesNotExist:
+            if not isinstance(user, User):
+                user = User.objects.get(pk=user_id)
+            cart, _ = self.get_or_create(user=user)
+            return cart
+
+
+class CartItemQuerySet(models.QuerySet):
+    def add(self, cart, product, quantity=1):
+        """
+        Atomically add `quantity` units of a product to a cart in a single upsert.
+
+        Relies on the unique (cart, product) constraint: a new line is inserted, or the existing
+        line's quantity is incremented in the database (`quantity + n`), so concurrent adds of the
+        same product never lose an update.
+
+        Args:
+            cart (Cart): The cart to add to.
+            product (ProductModel): The product to add.
+            quantity (int): The number of units to add.
+
+        Returns:
+            CartItem: The cart line with its resulting quantity.
+        """
+
+        ((pk, quantity),) = self.upsert(cart, {product.pk: quantity}).values()
+        return self.model(pk=pk, cart=cart, product=product, quantity=quantity)
+
+    def upsert(self, cart, quantities, increment=True):
+        """
+        Insert or update several lines of a cart in a single statement.
+
+        Args:
+            cart (Cart): The cart to update.
+            quantities (dict): Maps product ids to quantities.
+            increment (bool): Whether existing lines are incremented by the quantity
+                (`quantity + n`) or set to it.
+
+        Returns:
+            dict: Maps each product id to the `(id, quantity)` of its resulting cart line.
+        """
+
+        if not quantities:
+            return {}
+
+        connection = connections[self._db or router.db_for_write(self.model)]
+        opts = self.model._meta
+        names = {
+            name: connection.ops.quote_name(opts.get_field(name).column)
+            for name in ("id", "cart", "product", "quantity")
+        }
+        table = connection.ops.quote_name(opts.db_table)
+        update = (
+            "{table}.{quantity} + excluded.{quantity}"
+            if increment
+            else "excluded.{quantity}"
+        )
+        sql = (
+            "INSERT INTO {table} ({cart}, {product}, {quantity}) VALUES "
+            + ", ".join(["(%s, %s, %s)"] * len(quantities))
+            + " ON CONFLICT ({cart}, {product}) DO UPDATE SET {quantity} = "
+            + update
+            + " RETURNING {product}, {id}, {quantity}"
+        ).format(table=table, **names)
+        params = [
+            value
+            for product, quantity in quantities.items()
+            for value in (cart.pk, product, quantity)
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return {
+                product: (pk, quantity) for product, pk, quantity in cursor.fetchall()
+            }
+
+
 class Cart(models.Model):
     """
     Represents a shopping cart for a user.
@@ -14,14 +155,21 @@ class Cart(models.Model):
         user (User): A one-to-one relationship with the User model, ensuring each user has a unique cart.
         created_at (datetime): The date and time when the cart was created.
         slug (str): A URL-friendly version of the user's username, generated automatically.
+        version (int): A counter bumped whenever the cart's items change, used in the cart's ETag.
 
     Methods:
         get_total_price(): Calculates and returns the total price of all items in the cart.
+        bump_version(): Records a change to the cart's items.
+
+    Carts are created on the first cart write, through `Cart.objects.for_user()`.
     """
 
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="cart")
     created_at = models.DateTimeField(auto_now_add=True)
     slug = models.SlugField(blank=True, null=True)
+    version = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = CartQuerySet.as_manager()
 
     def __str__(self):
         return f" {self.user.username}'s cart "
@@ -38,11 +186,25 @@ class Cart(models.Model):
         """
         Calculate the total price of all items in the cart.
 
+        Uses the `total_price` annotation when the cart was loaded through
+        `Cart.objects.with_total_price()`, otherwise aggregates it in a single query.
+
         Returns:
-            float: The sum of the total prices of all items in the cart.
+            Decimal: The sum of the total prices of all items in the cart.
+        """
+
+        if hasattr(self, "total_price"):
+            total = self.total_price
+        else:
+            total = self.items.aggregate(total=Sum(line_total()))["total"]
+        return total if total is not None else 0
+
+    def bump_version(self):
+        """
+        Increment the cart's version in the database, invalidating clients' cached copies.
         """
 
-        return sum(item.get_total_price() for item in self.items.all())
+        Cart.objects.filter(pk=self.pk).update(version=F("version") + 1)
 
     class Meta:
         verbose_name = "Cart"
@@ -63,12 +225,17 @@ class CartItem(models.Model):
         get_total_price(): Calculates and returns the total price for the cart item.
     """
 
+    # The largest quantity a line may hold: the PositiveIntegerField range of every backend.
+    MAX_QUANTITY = 2147483647
+
     cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name="items")
     product = models.ForeignKey(
         ProductModel, on_delete=models.CASCADE, related_name="product"
     )
     quantity = models.PositiveIntegerField(default=1)
 
+    objects = CartItemQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.quantity} of {self.product.name}"
 
@@ -85,19 +252,9 @@ class CartItem(models.Model):
     class Meta:
         verbose_name = "Cart Item"
         verbose_name_plural = "Cart Items"
-        ordering = ["quantity"]
-
-
-@receiver(post_save, sender=User)
-def create_cart(sender, instance, created, **kwargs):
-    """
-    Signal receiver to automatically create a cart for a new user upon user creation.
-
-    Args:
-        sender (Model): The model class that sent the signal.
-        instance (User): The instance of the User model that was saved.
-        created (bool): A boolean indicating whether a new record was created.
-    """
-
-    if created:
-        Cart.objects.create(user=instance)
+        ordering = ["quantity", "id"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["cart", "product"], name="unique_cart_product"
+            )
+        ]
@@ -1,5 +1,7 @@
+from django.db.models import F
 from rest_framework import serializers
-from .models import Cart, CartItem
+from ecommerce.serializers import ValuesSerializer
+from .models import Cart, CartItem, line_total
 
 
 class CartItemSerializer(serializers.ModelSerializer):
@@ -32,7 +34,8 @@ class CartSerializer(serializers.ModelSerializer):
 
     Fields:
         items (list): A list of CartItem objects representing the items in the cart.
-        get_total_price (float): The total price for all items in the cart, calculated as the sum of the total prices of each item.
+        get_total_price (Decimal): The total price for all items in the cart, read from the `total_price`
+            annotation when the cart comes from `Cart.objects.with_total_price()`.
         created_at (datetime): The date and time when the cart was created.
     """
 
@@ -42,3 +45,54 @@ class CartSerializer(serializers.ModelSerializer):
     class Meta:
         model = Cart
         fields = ["items", "get_total_price", "created_at"]
+
+
+class CartItemValuesSerializer(ValuesSerializer):
+    """
+    Read-only CartItemSerializer built from `.values()` rows, with the line total computed in SQL.
+    """
+
+    serializer_class = CartItemSerializer
+    values = {
+        # The product's string representation is its name.
+        "product": F("product__name"),
+        "get_total_price": line_total(),
+    }
+
+
+class CartValuesSerializer(ValuesSerializer):
+    """
+    Read-only CartSerializer built from `.values()` rows of carts annotated with
+    `Cart.objects.with_total_price()`.
+    """
+
+    serializer_class = CartSerializer
+    values = {
+        # As Cart.get_total_price(), an empty cart totals 0.
+        "get_total_price": ("total_price", lambda total: 0 if total is None else total),
+    }
+    nested = {"items": (CartItemValuesSerializer, "cart")}
+
+
+class CartOperationSerializer(serializers.Serializer):
+    """
+    Serializer for one operation of a batch cart update.
+
+    Fields:
+        product (str): The id or slug of the product.
+        quantity (int): The quantity to set or add (ignored by "remove").
+        op (str): "set" the line's quantity, "add" to it, or "remove" the line.
+    """
+
+    product = serializers.CharField()
+    quantity = serializers.IntegerField(
+        min_value=0, max_value=CartItem.MAX_QUANTITY, default=1
+    )
+    op = serializers.ChoiceField(choices=["set", "add", "remove"], default="add")
+
+    def validate(self, attrs):
+        if attrs["op"] == "add" and attrs["quantity"] < 1:
+            raise serializers.ValidationError(
+                {"quantity": "Must be at least 1 when adding."}
+            )
+        return attrs
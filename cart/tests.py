@@ -1,3 +1,557 @@
-from django.test import TestCase
+import threading
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils.text import slugify
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from ecommerce.testing import (
+    AsyncViewAssertionsMixin,
+    QueryCountAssertionsMixin,
+    ValuesSerializerAssertionsMixin,
+)
+from products.models import ProductModel
+from users.authentication import UserClaimsRefreshToken
+from .models import Cart, CartItem, CartQuerySet
+from .serializers import (
+    CartItemSerializer,
+    CartItemValuesSerializer,
+    CartSerializer,
+    CartValuesSerializer,
+)
+from .views import CartViewSet
+
+
+class CartTotalPriceTests(TestCase):
+    """
+    Cart totals are aggregated in the database in a single query, whatever the cart size.
+    """
+
+    def fill_cart(self, size):
+        user = User.objects.create(username=f"shopper-{size}")
+        products = ProductModel.objects.bulk_create(
+            ProductModel(name=f"product {i}", price=Decimal("1.25") + i)
+            for i in range(size)
+        )
+        cart = Cart.objects.for_user(user)
+        CartItem.objects.bulk_create(
+            CartItem(cart=cart, product=product, quantity=2) for product in products
+        )
+        expected = sum(2 * product.price for product in products)
+        return cart, expected
+
+    def test_total_price_is_one_query(self):
+        for size in (1, 50, 500):
+            with self.subTest(size=size):
+                cart, expected = self.fill_cart(size)
+                with self.assertNumQueries(1):
+                    self.assertEqual(cart.get_total_price(), expected)
+                with self.assertNumQueries(1):
+                    annotated = Cart.objects.with_total_price().get(pk=cart.pk)
+                    self.assertEqual(annotated.get_total_price(), expected)
+
+    def test_cart_serializer_reads_annotation(self):
+        cart, expected = self.fill_cart(50)
+        cart = Cart.objects.with_total_price().get(pk=cart.pk)
+        field = CartSerializer().fields["get_total_price"]
+        with self.assertNumQueries(0):
+            self.assertEqual(field.get_attribute(cart), expected)
+
+    def test_empty_cart_total_is_zero(self):
+        user = User.objects.create(username="empty")
+        cart = Cart.objects.for_user(user)
+        self.assertEqual(cart.get_total_price(), 0)
+        self.assertEqual(
+            Cart.objects.with_total_price().get(pk=cart.pk).get_total_price(), 0
+        )
+
+
+class CartQueryCountTests(QueryCountAssertionsMixin, TestCase):
+    """
+    Cart read endpoints run a constant number of queries, whatever the cart size.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def populate(self, size):
+        user = User.objects.create(username=f"shopper-{size}")
+        products = ProductModel.objects.bulk_create(
+            ProductModel(name=f"product {size}-{i}", price=Decimal("2.50"))
+            for i in range(size)
+        )
+        cart = Cart.objects.for_user(user)
+        CartItem.objects.bulk_create(
+            CartItem(cart=cart, product=product, quantity=3) for product in products
+        )
+        self.client.force_authenticate(user)
+        return user
+
+    def test_view_cart(self):
+        def request(user):
+            response = self.client.get(
+                reverse("cart:view_cart", kwargs={"user_id": user.id})
+            )
+            self.assertEqual(response.status_code, 200)
+
+        self.assertConstantQueries(self.populate, request)
+
+    def test_cart_list(self):
+        def request(user):
+            response = self.client.get(reverse("cart:cart-list"))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                response.data[0]["get_total_price"],
+                Cart.objects.for_user(user).get_total_price(),
+            )
+
+        self.assertConstantQueries(self.populate, request)
+
+
+class CartConditionalGetTests(TestCase):
+    """
+    view_cart answers 304 Not Modified while the cart version is unchanged.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(username="shopper")
+        self.product = ProductModel.objects.create(name="Mug", price=Decimal("5.00"))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse("cart:view_cart", kwargs={"user_id": self.user.id})
+
+    def test_not_modified_skips_serializer(self):
+        Cart.objects.for_user(self.user)
+        serializer = mock.Mock(wraps=CartItemValuesSerializer)
+        with mock.patch("cart.views.CartItemValuesSerializer", serializer):
+            etag = self.client.get(self.url)["ETag"]
+            serializer.assert_called_once()
+            serializer.reset_mock()
+            response = self.client.get(self.url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 304)
+        serializer.assert_not_called()
+
+    def test_cart_changes_update_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.client.post(
+            reverse("cart:add_to_cart", kwargs={"user_id": self.user.id}),
+            {"product": "Mug"},
+        )
+        response = self.client.get(self.url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+
+        list_etag = self.client.get(reverse("cart:cart-list"))["ETag"]
+        self.assertEqual(
+            self.client.get(
+                reverse("cart:cart-list"), headers={"if-none-match": list_etag}
+            ).status_code,
+            304,
+        )
+
+    def test_product_changes_update_etag(self):
+        self.client.post(
+            reverse("cart:add_to_cart", kwargs={"user_id": self.user.id}),
+            {"product": "Mug"},
+        )
+        etag = self.client.get(self.url)["ETag"]
+        list_etag = self.client.get(reverse("cart:cart-list"))["ETag"]
+
+        self.product.price = Decimal("50.00")
+        self.product.save()
+        response = self.client.get(self.url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]["get_total_price"], Decimal("50.00"))
+        response = self.client.get(
+            reverse("cart:cart-list"), headers={"if-none-match": list_etag}
+        )
+        self.assertEqual(response.status_code, 200)
+
+        # Deleting a product deletes its cart lines without bumping the cart's version.
+        etag = response["ETag"]
+        self.product.delete()
+        response = self.client.get(
+            reverse("cart:cart-list"), headers={"if-none-match": etag}
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+class AddToCartTests(TestCase):
+    """
+    add_to_cart upserts the cart line and looks products up by id or slug.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(username="shopper")
+        self.product = ProductModel.objects.create(
+            name="Red Mug", price=Decimal("5.00")
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse("cart:add_to_cart", kwargs={"user_id": self.user.id})
+
+    def test_adds_and_increments(self):
+        response = self.client.post(self.url, {"product": self.product.pk})
+        self.assertEqual(
+            response.data,
+            {
+                "product": "Red Mug",
+                "quantity": 1,
+                "get_total_price": Decimal("5.00"),
+            },
+        )
+        response = self.client.post(self.url, {"product": "red-mug", "quantity": 3})
+        self.assertEqual(response.data["quantity"], 4)
+        response = self.client.post(self.url, {"product": "Red Mug"})
+        self.assertEqual(response.data["quantity"], 5)
+        self.assertEqual(Cart.objects.for_user(self.user).items.get().quantity, 5)
+
+    def test_errors(self):
+        self.assertEqual(
+            self.client.post(self.url, {"product": "teapot"}).status_code, 404
+        )
+        self.assertEqual(self.client.post(self.url, {"product": 999}).status_code, 404)
+        for quantity in ("0", "2.7", 10**12):
+            with self.subTest(quantity=quantity):
+                response = self.client.post(
+                    self.url, {"product": "red-mug", "quantity": quantity}
+                )
+                self.assertEqual(response.status_code, 400)
+        url = reverse("cart:add_to_cart", kwargs={"user_id": 999})
+        self.assertEqual(self.client.post(url, {"product": "red-mug"}).status_code, 403)
+        # Staff may write any user's cart, but not that of a missing user.
+        self.user.is_staff = True
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.post(url, {"product": "red-mug"}).status_code, 404)
+        self.assertFalse(CartItem.objects.exists())
+
+
+class BatchUpdateCartTests(QueryCountAssertionsMixin, TestCase):
+    """
+    The batch endpoint applies set/add/remove operations in one transaction.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(username="shopper")
+        self.mug, self.pot, self.cup = ProductModel.objects.bulk_create(
+            ProductModel(name=name, price=Decimal("2.00"), slug=slugify(name))
+            for name in ["Mug", "Pot", "Cup"]
+        )
+        self.cart = Cart.objects.for_user(self.user)
+        CartItem.objects.create(cart=self.cart, product=self.mug, quantity=2)
+        CartItem.objects.create(cart=self.cart, product=self.pot, quantity=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse("cart:batch_update_cart", kwargs={"user_id": self.user.id})
+
+    def quantities(self):
+        return dict(self.cart.items.values_list("product__name", "quantity"))
+
+    def test_operations(self):
+        response = self.client.post(
+            self.url,
+            [
+                {"product": self.mug.pk, "quantity": 3},
+                {"product": "pot", "op": "remove"},
+                {"product": "Cup", "op": "set", "quantity": 5},
+                {"product": "cup", "quantity": 1},
+                {"product": self.mug.pk, "op": "set", "quantity": 0},
+            ],
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.quantities(), {"Cup": 6})
+        self.assertEqual(response.data["get_total_price"], Decimal("12.00"))
+        self.assertEqual(len(response.data["items"]), 1)
+
+        response = self.client.post(
+            self.url, {"operations": [{"product": "mug"}]}, format="json"
+        )
+        self.assertEqual(self.quantities(), {"Cup": 6, "Mug": 1})
+
+    def test_invalid_batches_change_nothing(self):
+        for operations in (
+            [{"product": "mug"}, {"product": "kettle"}],
+            [{"product": "mug", "op": "add", "quantity": 0}],
+            [{"product": "mug", "op": "swap"}],
+            [{"product": "mug", "quantity": 2**63}],
+            [
+                {"product": "cup", "quantity": CartItem.MAX_QUANTITY},
+                {"product": "cup", "quantity": 1},
+            ],
+        ):
+            with self.subTest(operations=operations):
+                response = self.client.post(self.url, operations, format="json")
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(self.quantities(), {"Mug": 2, "Pot": 1})
+
+    def test_query_count_is_constant(self):
+        def populate(size):
+            products = ProductModel.objects.bulk_create(
+                ProductModel(name=f"p{size}-{i}", price=1) for i in range(size)
+            )
+            return [
+                {"product": product.pk, "op": op, "quantity": 2}
+                for product in products
+                for op in ("add", "set", "remove", "add")
+            ]
+
+        def request(operations):
+            response = self.client.post(self.url, operations, format="json")
+            self.assertEqual(response.status_code, 200)
+
+        self.assertConstantQueries(populate, request)
+
+    def test_remove_from_cart(self):
+        url = reverse("cart:remove_from_cart", kwargs={"user_id": self.user.id})
+        response = self.client.delete(url, {"product": "mug"}, format="json")
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.quantities(), {"Pot": 1})
+
+        response = self.client.delete(url, {"product": "mug"}, format="json")
+        self.assertEqual(response.status_code, 404)
+        response = self.client.delete(url, {"product": "kettle"}, format="json")
+        self.assertEqual(response.status_code, 404)
+
+    def test_other_users_cart_is_rejected(self):
+        self.client.force_authenticate(User.objects.create(username="other"))
+        url = reverse("cart:add_to_cart", kwargs={"user_id": self.user.id})
+        response = self.client.post(url, {"product": "mug", "quantity": 5})
+        self.assertEqual(response.status_code, 403)
+        response = self.client.post(self.url, [{"product": "mug"}], format="json")
+        self.assertEqual(response.status_code, 403)
+        url = reverse("cart:remove_from_cart", kwargs={"user_id": self.user.id})
+        response = self.client.delete(url, {"product": "mug"}, format="json")
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.quantities(), {"Mug": 2, "Pot": 1})
+
+        self.client.force_authenticate(
+            User.objects.create(username="staff", is_staff=True)
+        )
+        response = self.client.delete(url, {"product": "mug"}, format="json")
+        self.assertEqual(response.status_code, 204)
+
+
+class ConcurrentAddToCartTests(TransactionTestCase):
+    """
+    Concurrent adds of the same product to one cart never lose an update.
+    """
+
+    adders = 32
+    adds_per_thread = 5
+
+    def test_concurrent_adds_are_exact(self):
+        user = User.objects.create(username="shopper")
+        product = ProductModel.objects.create(name="Mug", price=Decimal("5.00"))
+        url = reverse("cart:add_to_cart", kwargs={"user_id": user.id})
+        start = threading.Barrier(self.adders)
+        errors = []
+
+        def add():
+            client = APIClient()
+            client.force_authenticate(user)
+            try:
+                start.wait()
+                for _ in range(self.adds_per_thread):
+                    response = client.post(url, {"product": product.pk, "quantity": 2})
+                    if response.status_code != 200:
+                        errors.append(response.status_code)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=add) for _ in range(self.adders)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            CartItem.objects.get(
+                cart=Cart.objects.for_user(user), product=product
+            ).quantity,
+            2 * self.adders * self.adds_per_thread,
+        )
+
+
+class LazyCartTests(TestCase):
+    """
+    Carts are created on first cart access rather than for every new user.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_user_writes_do_not_touch_carts(self):
+        with self.assertNumQueries(1):
+            user = User.objects.create(username="shopper")
+        with self.assertNumQueries(1):
+            user.save()
+        self.assertFalse(Cart.objects.exists())
+
+    def test_cart_created_on_first_write(self):
+        user = User.objects.create(username="shopper")
+        other = User.objects.create(username="other")
+        self.client.force_authenticate(user)
+        url = reverse("cart:view_cart", kwargs={"user_id": user.id})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [])
+        response = self.client.get(
+            reverse("cart:view_cart", kwargs={"user_id": other.id})
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Cart.objects.exists())
+
+        ProductModel.objects.create(name="Mug", price=1)
+        self.client.post(
+            reverse("cart:add_to_cart", kwargs={"user_id": user.id}),
+            {"product": "mug"},
+        )
+        self.assertEqual(Cart.objects.get().user, user)
+        self.assertEqual(len(self.client.get(url).data), 1)
+        self.assertEqual(Cart.objects.for_user(user.pk), Cart.objects.for_user(user))
+
+        user.is_staff = True
+        self.client.force_authenticate(user)
+        response = self.client.get(reverse("cart:view_cart", kwargs={"user_id": 999}))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(Cart.objects.count(), 1)
+
+    def test_backfill_command(self):
+        users = User.objects.bulk_create(User(username=f"user-{i}") for i in range(5))
+        Cart.objects.for_user(users[0])
+
+        out = StringIO()
+        call_command("backfill_carts", batch_size=2, stdout=out)
+        self.assertIn("Created 4 carts", out.getvalue())
+        self.assertEqual(
+            sorted(Cart.objects.values_list("slug", flat=True)),
+            [f"user-{i}" for i in range(5)],
+        )
+
+        product = ProductModel.objects.create(name="Mug", price=1)
+        CartItem.objects.add(Cart.objects.for_user(users[1]), product)
+        call_command("backfill_carts", prune_empty=True, stdout=out)
+        self.assertIn("Deleted 4 empty carts", out.getvalue())
+        self.assertEqual(Cart.objects.get().user, users[1])
+
+    def test_prune_keeps_carts_written_meanwhile(self):
+        user = User.objects.create(username="shopper")
+        cart = Cart.objects.for_user(user)
+        product = ProductModel.objects.create(name="Mug", price=1)
+        select_for_update = CartQuerySet.select_for_update
+
+        # An add lands between listing the empty carts and deleting them.
+        def add_then_lock(queryset, *args, **kwargs):
+            CartItem.objects.add(cart, product)
+            cart.bump_version()
+            return select_for_update(queryset, *args, **kwargs)
+
+        out = StringIO()
+        with mock.patch.object(CartQuerySet, "select_for_update", add_then_lock):
+            call_command("backfill_carts", prune_empty=True, stdout=out)
+        self.assertIn("Deleted 0 empty carts", out.getvalue())
+        self.assertEqual(Cart.objects.get().items.get().quantity, 1)
+
+    def test_backfill_counts_only_created_carts(self):
+        users = User.objects.bulk_create(User(username=f"user-{i}") for i in range(3))
+        Cart.objects.for_user(users[0])
+
+        # Users who got a cart since the command listed them are skipped, not counted.
+        out = StringIO()
+        with mock.patch("cart.management.commands.backfill_carts.User") as user_model:
+            user_model.objects.filter.return_value = User.objects.all()
+            call_command("backfill_carts", batch_size=2, stdout=out)
+        self.assertIn("Created 2 carts", out.getvalue())
+        self.assertEqual(Cart.objects.count(), 3)
+
+
+class CartValuesSerializerTests(ValuesSerializerAssertionsMixin, TestCase):
+    """
+    Cart reads use `.values()` rows, with output identical to the model serializers'.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(username="shopper")
+        User.objects.create(username="window-shopper")
+        cart = Cart.objects.for_user(self.user)
+        Cart.objects.for_user(User.objects.get(username="window-shopper"))
+        for name, price, quantity in [
+            ("Red mug", "5.10", 3),
+            ("Caf\u00e9 mug", "0.99", 1),
+            ("Teapot", "120.00", 1),
+            ("Kettle", "12.5", 2),
+        ]:
+            product = ProductModel.objects.create(name=name, price=Decimal(price))
+            CartItem.objects.create(cart=cart, product=product, quantity=quantity)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_same_representation(self):
+        self.assertSameRepresentation(
+            CartValuesSerializer, Cart.objects.with_total_price()
+        )
+        self.assertSameRepresentation(CartItemValuesSerializer, CartItem.objects.all())
+
+    def test_endpoints_unchanged(self):
+        values = self.client.get(reverse("cart:cart-list"))
+        with mock.patch.object(CartViewSet, "values_actions", ()):
+            full = self.client.get(reverse("cart:cart-list"))
+        self.assertEqual(values.content, full.content)
+
+        response = self.client.get(
+            reverse("cart:view_cart", kwargs={"user_id": self.user.id})
+        )
+        items = CartItem.objects.filter(cart__user=self.user)
+        self.assertEqual(
+            response.content,
+            JSONRenderer().render(CartItemSerializer(items, many=True).data),
+        )
+
+
+class AsyncViewCartTests(AsyncViewAssertionsMixin, TestCase):
+    """
+    Under ASGI, view_cart is served by an async view with the sync view's responses.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(username="shopper")
+        cart = Cart.objects.for_user(self.user)
+        for name, quantity in [("Red mug", 2), ("Teapot", 1)]:
+            product = ProductModel.objects.create(name=name, price=Decimal("4.50"))
+            CartItem.objects.create(cart=cart, product=product, quantity=quantity)
+        token = UserClaimsRefreshToken.for_user(self.user).access_token
+        self.headers = {"authorization": f"Bearer {token}"}
+        self.url = reverse("cart:view_cart", kwargs={"user_id": self.user.id})
+
+    async def test_same_responses(self):
+        response = await self.assertSameResponse(self.url, headers=self.headers)
+        self.assertEqual(len(response.json()), 2)
+        await self.assertSameResponse(
+            self.url, headers={**self.headers, "if-none-match": response["ETag"]}
+        )
+        await self.assertSameResponse(self.url)
+        await self.assertSameResponse(
+            self.url, headers={"authorization": "Bearer invalid"}
+        )
+
+    async def test_new_cart_uses_sync_view(self):
+        user = await User.objects.acreate(username="newcomer")
+        url = reverse("cart:view_cart", kwargs={"user_id": user.id})
+        response = await self.assertSameResponse(url, headers=self.headers)
+        self.assertEqual(response.status_code, 403)
+        token = UserClaimsRefreshToken.for_user(user).access_token
+        headers = {"authorization": f"Bearer {token}"}
+        response = await self.assertSameResponse(url, headers=headers)
+        self.assertEqual(response.json(), [])
+        self.assertFalse(await Cart.objects.filter(user=user).aexists())
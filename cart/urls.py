@@ -36,4 +36,20 @@ urlpatterns = [
         CartViewSet.as_view({"delete": "remove_from_cart"}),
         name="remove_from_cart",
     ),
+    # Endpoint for applying a batch of set/add/remove operations to the user's cart
+    # Method: POST
+    # URL: /cart/batch/<user_id>/
+    path(
+        "cart/batch/<int:user_id>/",
+        CartViewSet.as_view({"post": "batch_update"}),
+        name="batch_update_cart",
+    ),
+    # Endpoint for holding the stock of the cart's products until checkout
+    # Method: POST
+    # URL: /cart/reserve/<user_id>/
+    path(
+        "cart/reserve/<int:user_id>/",
+        CartViewSet.as_view({"post": "reserve"}),
+        name="reserve_cart",
+    ),
 ]
@@ -1,67 +1,387 @@
+import collections
+import functools
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+from django.http import Http404
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from django.shortcuts import get_object_or_404, render
+from django.utils.text import slugify
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from ecommerce.conditional import aconditional_response, conditional_response
+from ecommerce.querysets import optimize_queryset
+from ecommerce.serializers import ValuesReadMixin
+from idempotency.decorators import idempotent
+from inventory.stock import InsufficientStock, reserve
 from .serializers import *
 from .models import *
 
 
-class CartViewSet(viewsets.ModelViewSet):
-    queryset = Cart.objects.all()
+class CartViewSet(ValuesReadMixin, viewsets.ModelViewSet):
+    queryset = Cart.objects.with_total_price()
     serializer_class = CartSerializer
+    values_serializer_class = CartValuesSerializer
     permission_classes = [permissions.IsAuthenticated]
+    max_batch_operations = 1000
 
     def get_queryset(self):
-        return self.queryset.filter(user=self.request.user.id)
+        queryset = self.queryset.filter(user=self.request.user.id)
+        if self.reads_values():
+            return self.values_serializer_class.values_queryset(queryset)
+        return optimize_queryset(queryset, self.get_serializer_class())
+
+    def list(self, request, *args, **kwargs):
+        """
+        List the user's carts, answering 304 Not Modified while their versions and products are
+        unchanged.
+        """
+
+        carts = (
+            Cart.objects.filter(user=request.user.id)
+            .with_product_stamp()
+            .only("pk", "version")
+        )
+        etag = "-".join(cart_etag(cart) for cart in carts)
+        return conditional_response(
+            request,
+            functools.partial(super().list, request, *args, **kwargs),
+            etag=etag,
+        )
 
     @action(detail=False, methods=["get"])
     def view_cart(self, request, user_id=None):
         """
         Retrieve the cart items for the current user.
 
-        This action retrieves all items in the cart for the authenticated user.
+        This action retrieves all items in the cart for the authenticated user. Reading never
+        creates a cart: a user without one yet gets an empty list.
 
         Response:
         - On success: Serialized cart items with HTTP 200 OK status.
-        - If cart is not found: Empty list with HTTP 404 NOT FOUND status.
+        - If the client's copy is current (If-None-Match): HTTP 304 NOT MODIFIED status.
+        - If the cart is another user's (for non-staff users): HTTP 403 Forbidden.
+        - If the user is not found: Empty list with HTTP 404 NOT FOUND status.
         """
-        try:
 
-            cart = Cart.objects.get(user=user_id)
-            cart_items = CartItem.objects.filter(cart=cart)
-            serializer = CartItemSerializer(cart_items, many=True)
+        check_cart_owner(request, user_id)
+        cart = Cart.objects.with_product_stamp().filter(user_id=user_id).first()
+        if cart is None:
+            if not User.objects.filter(pk=user_id).exists():
+                return Response("Cart not found", status=status.HTTP_404_NOT_FOUND)
+            return conditional_response(
+                request,
+                lambda: Response([], status=status.HTTP_200_OK),
+                etag="cart-none",
+            )
+
+        def build():
+            cart_items = CartItemValuesSerializer.values_queryset(
+                CartItem.objects.filter(cart=cart)
+            )
+            serializer = CartItemValuesSerializer(cart_items, many=True)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
-        except Cart.DoesNotExist:
+        return conditional_response(request, build, etag=cart_etag(cart))
+
+    async def aview_cart(self, request, user_id=None):
+        """
+        Async counterpart of `view_cart`, served under ASGI (see `ecommerce.asgi_urls`).
+
+        Returns None, leaving the request to `view_cart`, when the user has no cart yet.
+        """
+
+        check_cart_owner(request, user_id)
+        cart = await (
+            Cart.objects.filter(user_id=user_id)
+            .with_product_stamp()
+            .only("pk", "version")
+            .afirst()
+        )
+        if cart is None:
+            return None
+
+        async def build():
+            cart_items = CartItemValuesSerializer.values_queryset(
+                CartItem.objects.filter(cart=cart)
+            )
+            rows = [row async for row in cart_items]
+            serializer = CartItemValuesSerializer(rows, many=True)
+            return Response(serializer.data, status=status.HTTP_200_OK)
 
-            return Response("Cart not found", status=status.HTTP_404_NOT_FOUND)
+        return await aconditional_response(request, build, etag=cart_etag(cart))
 
     @action(detail=False, methods=["post"])
+    @idempotent
     def add_to_cart(self, request, user_id=None):
         """
         Add a product to the cart of the specified user.
 
-        This action adds a product to the cart for the user identified by user_id.
-        If the cart for the user does not exist, it will raise a 404 error.
+        This action adds a product to the cart for the user identified by user_id,
+        creating the cart on first use. If the user does not exist, it will raise a 404 error.
+        The cart line is inserted or incremented with a single atomic upsert, so concurrent
+        adds of the same product never lose an update.
 
         Request Data:
-        - product (str): The name of the product to add to the cart.
-        - quantity (int, optional): The quantity of the product to add (default is 1).
+        - product (int | str): The id of the product to add, or its slug (a product name is accepted
+          too, since the slug is derived from it).
+        - quantity (int, optional): The quantity of the product to add (default is 1, at most
+          `CartItem.MAX_QUANTITY`).
+
+        Retries sent with the same Idempotency-Key header replay the first response instead of
+        adding again (see `idempotency.decorators.idempotent`).
 
         Response:
         - On success: Serialized data of the CartItem with HTTP 200 OK status.
-        - If the cart or product does not exist: HTTP 404 Not Found.
+        - If the quantity is not a positive integer or is too large: HTTP 400 Bad Request.
+        - If the cart is another user's (for non-staff users): HTTP 403 Forbidden.
+        - If the user or product does not exist: HTTP 404 Not Found.
         """
 
-        cart = Cart.objects.get(user=user_id)
+        check_cart_owner(request, user_id)
+        cart = get_cart(user_id)
         data = request.data
-        product = ProductModel.objects.get(name=data["product"])
-        quantity = request.data.get("quantity", 1)
-        cart_item, created = CartItem.objects.get_or_create(cart=cart, product=product)
-        if not created:
-            cart_item.quantity += int(quantity)
-        else:
-            cart_item.quantity = int(quantity)
-        cart_item.save()
+        product = get_product(data.get("product"))
+        try:
+            quantity = (
+                CartOperationSerializer()
+                .fields["quantity"]
+                .run_validation(data.get("quantity", 1))
+            )
+        except ValidationError as exc:
+            return Response(
+                {"quantity": exc.detail}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if quantity < 1:
+            return Response(
+                {"quantity": "Must be a positive integer."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        with transaction.atomic():
+            cart_item = CartItem.objects.add(cart, product, quantity)
+            cart.bump_version()
         serializer = CartItemSerializer(cart_item)
         return Response(serializer.data)
+
+    @action(detail=False, methods=["delete"])
+    def remove_from_cart(self, request, user_id=None):
+        """
+        Remove a product from the cart of the specified user.
+
+        Request Data:
+        - product (int | str): The id or slug of the product to remove.
+
+        Response:
+        - On success: HTTP 204 No Content.
+        - If the cart is another user's (for non-staff users): HTTP 403 Forbidden.
+        - If the user or product does not exist, or the product is not in the cart: HTTP 404 Not Found.
+        """
+
+        check_cart_owner(request, user_id)
+        cart = get_cart(user_id)
+        product = get_product(request.data.get("product"))
+        with transaction.atomic():
+            deleted, _ = CartItem.objects.filter(cart=cart, product=product).delete()
+            if not deleted:
+                return Response("Product not in cart", status=status.HTTP_404_NOT_FOUND)
+            cart.bump_version()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=False, methods=["post"])
+    def batch_update(self, request, user_id=None):
+        """
+        Apply a list of cart operations in one transaction and return the updated cart.
+
+        Operations are applied in order and folded per product, then written with a fixed number
+        of queries whatever their count: one bulk product lookup, one delete, one upsert of set
+        quantities and one upsert of added quantities.
+
+        Request Data:
+        - A list of operations, or {"operations": [...]}, each with:
+          - product (int | str): The id or slug of the product.
+          - quantity (int, optional): The quantity to set or add (default is 1).
+          - op (str, optional): "set", "add" (default) or "remove".
+
+        Response:
+        - On success: The serialized cart with HTTP 200 OK status.
+        - If an operation is invalid, names an unknown product or would take a line past
+          `CartItem.MAX_QUANTITY`: Error details with HTTP 400 Bad Request.
+        - If the cart is another user's (for non-staff users): HTTP 403 Forbidden.
+        - If the user does not exist: HTTP 404 Not Found.
+        """
+
+        check_cart_owner(request, user_id)
+        cart = get_cart(user_id)
+        data = request.data
+        if isinstance(data, dict):
+            data = data.get("operations", [])
+        serializer = CartOperationSerializer(
+            data=data, many=True, max_length=self.max_batch_operations
+        )
+        serializer.is_valid(raise_exception=True)
+        operations = serializer.validated_data
+
+        products, missing = resolve_products([op["product"] for op in operations])
+        if missing:
+            return Response(
+                {"product": [f"Unknown product: {value}" for value in missing]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # product id -> (absolute, quantity): absolute lines replace the stored quantity,
+        # the others are added to it.
+        changes = {}
+        for op in operations:
+            product = products[op["product"]].pk
+            absolute, quantity = changes.get(product, (False, 0))
+            if op["op"] == "remove":
+                changes[product] = (True, 0)
+            elif op["op"] == "set":
+                changes[product] = (True, op["quantity"])
+            else:
+                changes[product] = (absolute, quantity + op["quantity"])
+        too_many = [
+            pk for pk, (_, qty) in changes.items() if qty > CartItem.MAX_QUANTITY
+        ]
+        if too_many:
+            return Response(
+                {
+                    "quantity": [
+                        f"At most {CartItem.MAX_QUANTITY} units of product {pk}."
+                        for pk in too_many
+                    ]
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        removed = [
+            pk for pk, (absolute, qty) in changes.items() if absolute and not qty
+        ]
+        replaced = {
+            pk: qty for pk, (absolute, qty) in changes.items() if absolute and qty
+        }
+        added = {pk: qty for pk, (absolute, qty) in changes.items() if not absolute}
+        with transaction.atomic():
+            if removed:
+                CartItem.objects.filter(cart=cart, product__in=removed).delete()
+            CartItem.objects.upsert(cart, replaced, increment=False)
+            CartItem.objects.upsert(cart, added)
+            cart.bump_version()
+
+        cart = optimize_queryset(
+            Cart.objects.with_total_price().filter(pk=cart.pk), CartSerializer
+        ).get()
+        return Response(CartSerializer(cart).data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["post"])
+    def reserve(self, request, user_id=None):
+        """
+        Hold the stock of the cart's products for the user's checkout.
+
+        The units of every cart line are taken from stock for INVENTORY_RESERVATION_SECONDS,
+        replacing the user's previous reservation, and consumed by their next checkout.
+
+        Response:
+        - On success: The reservation's expiry with HTTP 200 OK status.
+        - If some products are out of stock: Their ids with HTTP 400 Bad Request; the previous
+          reservation is kept.
+        - If the cart is another user's (for non-staff users): HTTP 403 Forbidden.
+        - If the user does not exist: HTTP 404 Not Found.
+        """
+
+        check_cart_owner(request, user_id)
+        cart = get_cart(user_id)
+        quantities = dict(cart.items.values_list("product", "quantity"))
+        try:
+            expires_at = reserve(cart.user_id, quantities)
+        except InsufficientStock as exc:
+            return Response(
+                {"products": [f"Out of stock: {pk}" for pk in exc.products]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response({"expires_at": expires_at}, status=status.HTTP_200_OK)
+
+
+def cart_etag(cart):
+    """
+    Return the ETag of a cart: its version, and the stamp of its products, whose name and price
+    are part of the cart's representation (see `CartQuerySet.with_product_stamp`).
+    """
+
+    products_updated_at = getattr(cart, "products_updated_at", None)
+    stamp = products_updated_at.timestamp() if products_updated_at else 0
+    return f"cart-{cart.pk}-{cart.version}-{getattr(cart, 'item_count', 0)}-{stamp}"
+
+
+def check_cart_owner(request, user_id):
+    """
+    Only let users read and change their own cart, and staff anyone's.
+
+    Raises:
+        PermissionDenied: If the cart of `user_id` is not the requesting user's.
+    """
+
+    if user_id != request.user.id and not request.user.is_staff:
+        raise PermissionDenied("You can only access your own cart.")
+
+
+def get_cart(user_id):
+    """
+    Return the user's cart, creating it on first access.
+
+    Raises:
+        Http404: If the user does not exist.
+    """
+
+    try:
+        return Cart.objects.for_user(user_id)
+    except User.DoesNotExist:
+        raise Http404("Cart not found")
+
+
+def get_product(value):
+    """
+    Look a product up by primary key or by its indexed slug.
+
+    Raises:
+        Http404: If no product matches.
+    """
+
+    products, missing = resolve_products([value])
+    if missing:
+        raise Http404("No product matches the given query.")
+    return products[str(value)]
+
+
+def resolve_products(values):
+    """
+    Look several products up by primary key or slug in a single query.
+
+    Args:
+        values (list): Product ids and/or slugs (names are slugified).
+
+    Returns:
+        tuple: A dict mapping each value (as a string) to its product, and the list of unmatched values.
+    """
+
+    values = [str(value) for value in values]
+    pks = {value for value in values if value.isdigit()}
+    slugs = collections.defaultdict(list)
+    for value in values:
+        if not value.isdigit():
+            slugs[slugify(value)].append(value)
+
+    products = {}
+    # Descending pk, so that the oldest product wins a shared slug.
+    for product in ProductModel.objects.filter(
+        Q(pk__in=pks) | Q(slug__in=slugs.keys())
+    ).order_by("-pk"):
+        if str(product.pk) in pks:
+            products[str(product.pk)] = product
+        for value in slugs.get(product.slug, ()):
+            products[value] = product
+    missing = [value for value in values if value not in products]
+    return products, missing
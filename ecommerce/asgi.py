@@ -1,7 +1,9 @@
 """
 ASGI config for ecommerce project.
 
-It exposes the ASGI callable as a module-level variable named ``application``.
+It exposes the ASGI callable as a module-level variable named ``application``. It routes
+requests with ASGI_URLCONF, which serves the read-heavy endpoints with async views, and can
+run side by side with the WSGI application.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -9,8 +11,11 @@ https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "ecommerce.settings")
+django.setup(set_prefix=False)
 
-application = get_asgi_application()
+from ecommerce.asyncviews import AsyncViewsASGIHandler  # noqa: E402
+
+application = AsyncViewsASGIHandler()
@@ -0,0 +1,41 @@
+"""
+URL configuration of the ASGI application (see ASGI_URLCONF).
+
+The read-heavy endpoints are served by async views reading with Django's async ORM, ahead of
+the routes of `ecommerce.urls`, which keep serving everything else, including the writes and
+the failure paths of those same endpoints. The WSGI application keeps ROOT_URLCONF, so both can
+be deployed side by side over the same database, e.g. with reads routed to the ASGI workers.
+"""
+
+from django.urls import path
+
+from cart.views import CartViewSet
+from ecommerce.asyncviews import async_read_view
+from products.views import ProductViewSet
+
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path(
+        "products/products/",
+        async_read_view(ProductViewSet, {"get": "list", "post": "create"}, "alist"),
+    ),
+    path(
+        "products/products/<int:pk>/",
+        async_read_view(
+            ProductViewSet,
+            {
+                "get": "retrieve",
+                "put": "update",
+                "patch": "partial_update",
+                "delete": "destroy",
+            },
+            "aretrieve",
+        ),
+    ),
+    path(
+        "cart/cart/view/<int:user_id>/",
+        async_read_view(CartViewSet, {"get": "view_cart"}, "aview_cart"),
+    ),
+    *sync_urlpatterns,
+]
@@ -0,0 +1,142 @@
+from contextlib import nullcontext
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIHandler
+from django.http import Http404, HttpResponse
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+
+class AsyncReadMixin:
+    """
+    ViewSet mixin adding `alist` and `aretrieve`, async counterparts of `list` and `retrieve`
+    reading `.values()` rows (see ValuesReadMixin) with Django's async ORM, for
+    `async_read_view`.
+
+    Filter backends and paginators may provide `afilter_queryset`/`apaginate_queryset`; the
+    others are used as they are and must not query the database. `aretrieve` returns None for
+    a missing object, leaving the 404 to the sync view.
+    """
+
+    async def afilter_queryset(self, queryset):
+        for backend in list(self.filter_backends):
+            backend = backend()
+            if hasattr(backend, "afilter_queryset"):
+                queryset = await backend.afilter_queryset(self.request, queryset, self)
+            else:
+                queryset = backend.filter_queryset(self.request, queryset, self)
+        return queryset
+
+    async def aget_object(self):
+        queryset = await self.afilter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            instance = await queryset.filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            ).afirst()
+        except (TypeError, ValueError, ValidationError):
+            return None
+        if instance is not None:
+            self.check_object_permissions(self.request, instance)
+        return instance
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = await self.afilter_queryset(self.get_queryset())
+        if self.paginator is None:
+            rows = [row async for row in queryset]
+            return Response(self.get_serializer(rows, many=True).data)
+        page = await self.paginator.apaginate_queryset(queryset, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        if instance is None:
+            return None
+        return Response(self.get_serializer(instance).data)
+
+
+def async_read_view(viewset_class, actions, handler):
+    """
+    Build an async view answering GET/HEAD on a viewset route with one of its coroutine methods,
+    for the ASGI URLconf (`ecommerce.asgi_urls`).
+
+    The viewset is set up as by `as_view(actions)` and runs DRF's `initial()`: content
+    negotiation, stateless token authentication and permission checks, none of which query the
+    database. Whatever the async path does not serve is handed to the sync view, run in a
+    thread: other methods, the browsable API, API errors and handlers returning None (e.g. for
+    a missing object). Responses are thus identical under WSGI and ASGI.
+
+    Args:
+        viewset_class (type): The viewset.
+        actions (dict): The route's method to action mapping, as given to `as_view()`.
+        handler (str): The name of the viewset's coroutine method serving GET.
+
+    Returns:
+        function: The async view.
+    """
+
+    sync_view = sync_to_async(viewset_class.as_view(actions))
+    actions = {"head": actions["get"], **actions}
+
+    async def view(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return await sync_view(request, *args, **kwargs)
+
+        viewset = viewset_class()
+        viewset.action_map = actions
+        for method, action in actions.items():
+            setattr(viewset, method, getattr(viewset, action))
+        viewset.args, viewset.kwargs = args, kwargs
+        viewset.request = viewset.initialize_request(request, *args, **kwargs)
+        viewset.headers = viewset.default_response_headers
+
+        replica_reads = getattr(viewset, "replica_reads", None)
+        response = None
+        try:
+            with (
+                replica_reads(request, actions["get"])
+                if replica_reads
+                else nullcontext()
+            ):
+                viewset.initial(viewset.request, *args, **kwargs)
+                if isinstance(viewset.request.accepted_renderer, JSONRenderer):
+                    response = await getattr(viewset, handler)(
+                        viewset.request, *args, **kwargs
+                    )
+        except (APIException, Http404):
+            response = None
+        if response is None:
+            return await sync_view(request, *args, **kwargs)
+
+        response = viewset.finalize_response(viewset.request, response)
+        if isinstance(response, Response):
+            response = _render(response)
+        return response
+
+    view.csrf_exempt = True
+    return view
+
+
+def _render(response):
+    # The async handler renders template responses in a thread; a plain HttpResponse is
+    # returned as it is.
+    response.render()
+    rendered = HttpResponse(response.content, status=response.status_code)
+    rendered.headers = response.headers
+    rendered.cookies = response.cookies
+    return rendered
+
+
+class AsyncViewsASGIHandler(ASGIHandler):
+    """
+    ASGI handler serving requests with ASGI_URLCONF, which routes the read-heavy endpoints to
+    async views and everything else to the same sync views as the WSGI application.
+    """
+
+    async def get_response_async(self, request):
+        request.urlconf = settings.ASGI_URLCONF
+        return await super().get_response_async(request)
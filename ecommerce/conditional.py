@@ -0,0 +1,119 @@
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def not_modified_response(request, etag=None, last_modified=None):
+    """
+    Return a 304 Not Modified response if the request's If-None-Match/If-Modified-Since match.
+
+    Args:
+        request (Request): The incoming request.
+        etag (str): The current entity tag of the resource, unquoted.
+        last_modified (datetime): When the resource last changed.
+
+    Returns:
+        HttpResponseNotModified | None: The 304 response, or None when the client's copy is stale.
+    """
+
+    if request.method not in ("GET", "HEAD"):
+        return None
+    return get_conditional_response(
+        request,
+        etag=quote_etag(etag) if etag else None,
+        last_modified=_timestamp(last_modified),
+    )
+
+
+def set_validator_headers(response, etag=None, last_modified=None):
+    """
+    Set the ETag/Last-Modified headers of a successful response.
+    """
+
+    if response.status_code != 200:
+        return response
+    if etag:
+        response["ETag"] = quote_etag(etag)
+    if last_modified:
+        response["Last-Modified"] = http_date(_timestamp(last_modified))
+    return response
+
+
+def conditional_response(request, build, etag=None, last_modified=None):
+    """
+    Answer 304 Not Modified from precomputed validators, or build the response and tag it.
+
+    `build` is only called when the client's copy is stale, so the 304 path never serializes.
+
+    Args:
+        request (Request): The incoming request.
+        build (callable): Builds the full response.
+        etag (str): The current entity tag of the resource, unquoted.
+        last_modified (datetime): When the resource last changed.
+
+    Returns:
+        HttpResponse: The 304 response or the built response with validator headers.
+    """
+
+    response = not_modified_response(request, etag, last_modified)
+    if response is not None:
+        return response
+    return set_validator_headers(build(), etag, last_modified)
+
+
+async def aconditional_response(request, build, etag=None, last_modified=None):
+    """
+    Async counterpart of `conditional_response`, where `build` is a coroutine function.
+
+    Returns:
+        HttpResponse | None: As `conditional_response`, or None when `build` returns None.
+    """
+
+    response = not_modified_response(request, etag, last_modified)
+    if response is not None:
+        return response
+    response = await build()
+    if response is None:
+        return None
+    return set_validator_headers(response, etag, last_modified)
+
+
+def modification_stamp(prefix, queryset):
+    """
+    Compute `(etag, last_modified)` validators from a queryset's row count and latest `updated_at`.
+
+    Both are aggregated in a single query, without loading any row.
+
+    Args:
+        prefix (str): Distinguishes the ETags of different resources.
+        queryset (QuerySet): The rows making up the resource.
+
+    Returns:
+        tuple: The `(etag, last_modified)` pair.
+    """
+
+    stamp = queryset.order_by().aggregate(
+        last_modified=Max("updated_at"), count=Count("pk")
+    )
+    return _stamp_validators(prefix, stamp)
+
+
+async def amodification_stamp(prefix, queryset):
+    """
+    Async counterpart of `modification_stamp`.
+    """
+
+    stamp = await queryset.order_by().aaggregate(
+        last_modified=Max("updated_at"), count=Count("pk")
+    )
+    return _stamp_validators(prefix, stamp)
+
+
+def _stamp_validators(prefix, stamp):
+    last_modified = stamp["last_modified"]
+    timestamp = last_modified.timestamp() if last_modified else 0
+    return f"{prefix}-{stamp['count']}-{timestamp}", last_modified
+
+
+def _timestamp(value):
+    return int(value.timestamp()) if value is not None else None
@@ -0,0 +1,165 @@
+"""
+Environment-driven configuration of the default database, see DATABASES in ecommerce.settings.
+
+Variables:
+- DATABASE_ENGINE: "sqlite" (default) or "postgres".
+- DATABASE_NAME: The SQLite file (default db.sqlite3 in the project) or the Postgres database.
+- DATABASE_HOST, DATABASE_PORT, DATABASE_USER, DATABASE_PASSWORD: The Postgres server.
+- DATABASE_CONN_MAX_AGE: Seconds a connection is reused across requests (default 60), 0 to
+  close it after every request, or "none" to keep it for the life of the worker.
+- DATABASE_CONN_HEALTH_CHECKS: Whether a reused connection is checked before each request
+  (default on), so a dropped connection is replaced instead of failing the request.
+- DATABASE_SQLITE_TUNING: Whether the SQLite tuning of `sqlite_options` is applied (default on).
+- DATABASE_SQLITE_BUSY_TIMEOUT: Seconds a SQLite connection waits for a lock (default 20).
+- DATABASE_SQLITE_MMAP_SIZE: Bytes of the SQLite file read through mmap (default 256 MiB).
+- DATABASE_POOL_MIN_SIZE, DATABASE_POOL_MAX_SIZE, DATABASE_POOL_TIMEOUT: A psycopg connection
+  pool per worker (Postgres, needs psycopg[pool]), enabled by DATABASE_POOL_MAX_SIZE. Pooled
+  connections replace persistent ones.
+- DATABASE_READ_REPLICAS: Comma-separated read replicas, configured like the default database:
+  SQLite files, or Postgres hosts as `host[:port]`. They become the aliases replica_1, ...
+- DATABASE_PGBOUNCER: The server is reached through PgBouncer in transaction pooling mode,
+  which server-side cursors do not survive, so they are disabled.
+"""
+
+import os
+
+from django.db import DEFAULT_DB_ALIAS
+
+SQLITE_ENGINE = "django.db.backends.sqlite3"
+POSTGRES_ENGINE = "django.db.backends.postgresql"
+
+
+def database_config(base_dir, environ=None):
+    """
+    Build the settings of the default database from the environment.
+
+    Args:
+        base_dir (Path): The project directory, where the SQLite files live.
+        environ (dict): The environment (default `os.environ`).
+
+    Returns:
+        dict: The DATABASES["default"] settings.
+    """
+
+    environ = os.environ if environ is None else environ
+    engine = environ.get("DATABASE_ENGINE", "sqlite").lower()
+    config = {
+        "CONN_MAX_AGE": _conn_max_age(environ.get("DATABASE_CONN_MAX_AGE", "60")),
+        "CONN_HEALTH_CHECKS": env_bool(environ, "DATABASE_CONN_HEALTH_CHECKS", True),
+    }
+
+    if engine == "sqlite":
+        config.update(
+            ENGINE=SQLITE_ENGINE,
+            NAME=environ.get("DATABASE_NAME", base_dir / "db.sqlite3"),
+            OPTIONS=sqlite_options(
+                tuned=env_bool(environ, "DATABASE_SQLITE_TUNING", True),
+                busy_timeout=float(environ.get("DATABASE_SQLITE_BUSY_TIMEOUT", 20)),
+                mmap_size=int(environ.get("DATABASE_SQLITE_MMAP_SIZE", 256 * 2**20)),
+            ),
+            # A file-backed test database, so that concurrency tests get real locking
+            # (the default shared-cache in-memory database fails instead of waiting).
+            TEST={"NAME": base_dir / "test_db.sqlite3"},
+        )
+    elif engine in ("postgres", "postgresql"):
+        config.update(
+            ENGINE=POSTGRES_ENGINE,
+            NAME=environ.get("DATABASE_NAME", "ecommerce"),
+            HOST=environ.get("DATABASE_HOST", ""),
+            PORT=environ.get("DATABASE_PORT", ""),
+            USER=environ.get("DATABASE_USER", ""),
+            PASSWORD=environ.get("DATABASE_PASSWORD", ""),
+            OPTIONS={},
+        )
+        if "DATABASE_POOL_MAX_SIZE" in environ:
+            config["OPTIONS"]["pool"] = {
+                "min_size": int(environ.get("DATABASE_POOL_MIN_SIZE", 2)),
+                "max_size": int(environ["DATABASE_POOL_MAX_SIZE"]),
+                "timeout": float(environ.get("DATABASE_POOL_TIMEOUT", 10)),
+            }
+            # Django refuses persistent connections on top of a pool.
+            config["CONN_MAX_AGE"] = 0
+        if env_bool(environ, "DATABASE_PGBOUNCER", False):
+            config["DISABLE_SERVER_SIDE_CURSORS"] = True
+    else:
+        raise ValueError(f"Unsupported DATABASE_ENGINE: {engine!r}")
+    return config
+
+
+def replica_configs(default, environ=None):
+    """
+    Build the settings of the read replicas listed in DATABASE_READ_REPLICAS.
+
+    Under test, replicas mirror the default database.
+
+    Args:
+        default (dict): The settings of the default database.
+        environ (dict): The environment (default `os.environ`).
+
+    Returns:
+        dict: Maps the replica aliases to their settings.
+    """
+
+    environ = os.environ if environ is None else environ
+    locations = environ.get("DATABASE_READ_REPLICAS", "").split(",")
+    replicas = {}
+    for location in filter(None, (location.strip() for location in locations)):
+        config = {
+            **default,
+            "OPTIONS": dict(default["OPTIONS"]),
+            "TEST": {"MIRROR": DEFAULT_DB_ALIAS},
+        }
+        if default["ENGINE"] == SQLITE_ENGINE:
+            config["NAME"] = location
+        else:
+            host, _, port = location.partition(":")
+            config.update(HOST=host, PORT=port or default["PORT"])
+        replicas[f"replica_{len(replicas) + 1}"] = config
+    return replicas
+
+
+def sqlite_options(tuned=True, busy_timeout=20, mmap_size=256 * 2**20):
+    """
+    Return the SQLite OPTIONS, whose pragmas run on every new connection.
+
+    Tuned connections use write-ahead logging, so readers no longer block on a writer and vice
+    versa, with `synchronous=NORMAL`, which in WAL mode syncs at checkpoints rather than on
+    every commit (a power loss may undo the last commits, never corrupt the file). Reads go
+    through mmap, and transactions start with `BEGIN IMMEDIATE`: a transaction that reads then
+    writes would otherwise fail at once with "database is locked" when another writer got in
+    first, instead of waiting for the busy timeout.
+
+    The journal mode is stored in the database file: turning the tuning off does not switch
+    an existing file back from WAL.
+
+    Args:
+        tuned (bool): Whether to apply the tuning.
+        busy_timeout (float): Seconds a connection waits for a lock before failing.
+        mmap_size (int): Bytes of the file read through mmap.
+
+    Returns:
+        dict: The OPTIONS of the DATABASES entry.
+    """
+
+    if not tuned:
+        return {}
+    return {
+        "timeout": busy_timeout,
+        "transaction_mode": "IMMEDIATE",
+        "init_command": (
+            "PRAGMA journal_mode=WAL; "
+            "PRAGMA synchronous=NORMAL; "
+            f"PRAGMA mmap_size={mmap_size}"
+        ),
+    }
+
+
+def env_bool(environ, name, default):
+    value = environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _conn_max_age(value):
+    return None if value.strip().lower() == "none" else int(value)
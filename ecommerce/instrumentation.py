@@ -0,0 +1,237 @@
+import cProfile
+import math
+import threading
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.serializers import BaseSerializer
+
+from .serializers import ValuesSerializer
+
+# Metrics of the request being handled, while instrumentation is enabled.
+current_metrics = ContextVar("current_metrics", default=None)
+
+
+class RequestMetrics:
+    """
+    Timings collected for a single request.
+
+    Attributes:
+    - queries: The number of database queries run.
+    - db_time: Seconds spent executing those queries.
+    - serializer_time: Seconds spent producing serializer `.data`.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self._serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        # Database execute wrapper, see `connection.execute_wrapper()`.
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed histogram of request durations, with ~5% precision and bounded memory.
+    """
+
+    base = 0.1  # Upper bound of the first bucket, in milliseconds.
+    growth = 1.05
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, duration_ms):
+        index = max(0, math.ceil(math.log(duration_ms / self.base, self.growth)))
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += duration_ms
+        self.max = max(self.max, duration_ms)
+
+    def percentile(self, percentile):
+        """
+        Return the upper bound of the bucket holding the given percentile, in milliseconds.
+        """
+
+        rank = math.ceil(self.count * percentile / 100)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(self.base * self.growth**index, self.max)
+        return self.max
+
+
+class EndpointMetrics:
+    """
+    In-process aggregate of instrumented requests, per URL name (e.g. `add_to_cart`,
+    `view_cart`, `order-create`).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+
+    def record(self, name, duration_ms, metrics, size):
+        with self._lock:
+            endpoint = self._endpoints.get(name)
+            if endpoint is None:
+                endpoint = self._endpoints[name] = {
+                    "latency": LatencyHistogram(),
+                    "queries": 0,
+                    "db_ms": 0.0,
+                    "serializer_ms": 0.0,
+                    "bytes": 0,
+                }
+            endpoint["latency"].record(duration_ms)
+            endpoint["queries"] += metrics.queries
+            endpoint["db_ms"] += metrics.db_time * 1000
+            endpoint["serializer_ms"] += metrics.serializer_time * 1000
+            endpoint["bytes"] += size
+
+    def as_dict(self):
+        """
+        Return the count, latency percentiles and per-request means of each endpoint.
+        """
+
+        with self._lock:
+            result = {}
+            for name, endpoint in sorted(self._endpoints.items()):
+                latency = endpoint["latency"]
+                count = latency.count
+                result[name] = {
+                    "count": count,
+                    "mean_ms": round(latency.total / count, 3),
+                    "p50_ms": round(latency.percentile(50), 3),
+                    "p95_ms": round(latency.percentile(95), 3),
+                    "p99_ms": round(latency.percentile(99), 3),
+                    "max_ms": round(latency.max, 3),
+                    "queries": round(endpoint["queries"] / count, 2),
+                    "db_ms": round(endpoint["db_ms"] / count, 3),
+                    "serializer_ms": round(endpoint["serializer_ms"] / count, 3),
+                    "bytes": round(endpoint["bytes"] / count),
+                }
+            return result
+
+
+endpoint_metrics = EndpointMetrics()
+
+
+class InstrumentationMiddleware:
+    """
+    Record the wall time, database queries, serializer time and response size of each request.
+
+    Opt-in with INSTRUMENTATION_ENABLED; when it is off the middleware removes itself from the
+    chain at startup, so it costs nothing. When on, each response carries a Server-Timing
+    header and its figures are aggregated per URL name in `endpoint_metrics`.
+
+    With INSTRUMENTATION_PROFILE_THRESHOLD_MS set, every request also runs under cProfile and
+    those slower than the threshold are dumped to INSTRUMENTATION_PROFILE_DIR, for reading with
+    `python -m pstats` or snakeviz. Profiling slows requests down noticeably; use it locally.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "INSTRUMENTATION_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.profile_threshold = getattr(
+            settings, "INSTRUMENTATION_PROFILE_THRESHOLD_MS", None
+        )
+        self.profile_dir = Path(
+            getattr(settings, "INSTRUMENTATION_PROFILE_DIR", "profiles")
+        )
+        install_serializer_timing()
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        profiler = cProfile.Profile() if self.profile_threshold is not None else None
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                if profiler is not None:
+                    response = profiler.runcall(self.get_response, request)
+                else:
+                    response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        size = 0 if response.streaming else len(response.content)
+        response["Server-Timing"] = ", ".join(
+            [
+                f"total;dur={duration_ms:.1f}",
+                f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries"',
+                f"serializer;dur={metrics.serializer_time * 1000:.1f}",
+            ]
+        )
+        name = self.endpoint_name(request)
+        endpoint_metrics.record(name, duration_ms, metrics, size)
+        if profiler is not None and duration_ms > self.profile_threshold:
+            self.dump_profile(profiler, name, duration_ms)
+        return response
+
+    def endpoint_name(self, request):
+        match = request.resolver_match
+        if match is None:
+            return "<unresolved>"
+        return match.url_name or match.view_name
+
+    def dump_profile(self, profiler, name, duration_ms):
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        path = self.profile_dir / f"{name}-{time.time_ns()}-{duration_ms:.0f}ms.prof"
+        profiler.dump_stats(path)
+
+
+_timed_serializers = set()
+
+
+def install_serializer_timing():
+    """
+    Wrap the `data` property of DRF serializers and ValuesSerializers so that its time counts
+    towards the current request's `serializer_time`. Only installed when instrumentation is
+    enabled.
+    """
+
+    for serializer_class in (BaseSerializer, ValuesSerializer):
+        if serializer_class not in _timed_serializers:
+            serializer_class.data = _timed_property(serializer_class.data)
+            _timed_serializers.add(serializer_class)
+
+
+def _timed_property(prop):
+    def data(self):
+        metrics = current_metrics.get()
+        if metrics is None or metrics._serializing:
+            return prop.fget(self)
+        metrics._serializing = True
+        start = time.perf_counter()
+        try:
+            return prop.fget(self)
+        finally:
+            metrics.serializer_time += time.perf_counter() - start
+            metrics._serializing = False
+
+    return property(data)
@@ -0,0 +1,126 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+def optimize_queryset(queryset, serializer):
+    """
+    Apply select_related/prefetch_related/only() to a queryset based on a serializer's fields.
+
+    Forward relations read by nested serializers or related fields (e.g. StringRelatedField)
+    are joined with select_related, reverse and many-to-many relations are prefetched with
+    their own optimized querysets, and when every field maps onto a model field the columns
+    are narrowed with only(). Fields backed by model methods or properties keep the full row,
+    since their dependencies cannot be inferred.
+
+    Args:
+        queryset (QuerySet): The base queryset, e.g. the viewset's queryset.
+        serializer (Serializer | type): The serializer class or instance used to render the rows.
+
+    Returns:
+        QuerySet: The optimized queryset.
+    """
+
+    return _optimize(queryset, serializer)
+
+
+def _optimize(queryset, serializer, required=()):
+    if isinstance(serializer, type):
+        serializer = serializer()
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+
+    select, prefetch, only = [], [], set(required)
+    if not _collect(queryset.model, serializer, "", select, prefetch, only):
+        only = None
+
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    if only:
+        queryset = queryset.only(*only)
+    return queryset
+
+
+def _collect(model, serializer, prefix, select, prefetch, only):
+    """
+    Walk the serializer's readable fields and record the lookups they need.
+
+    Returns:
+        bool: Whether every field could be mapped to a model field, i.e. only() is safe.
+    """
+
+    # Foreign key columns are cheap and read by related managers, so always keep them.
+    only.add(f"{prefix}{model._meta.pk.name}")
+    only.update(
+        f"{prefix}{field.name}"
+        for field in model._meta.concrete_fields
+        if field.is_relation
+    )
+    narrowable = True
+
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == "*" or "." in field.source:
+            narrowable = False
+            continue
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            narrowable = False
+            continue
+
+        path = f"{prefix}{field.source}"
+        if isinstance(field, serializers.ListSerializer) or isinstance(
+            field, serializers.ManyRelatedField
+        ):
+            if model_field.one_to_many or model_field.many_to_many:
+                prefetch.append(_prefetch(model_field, field, path))
+            else:
+                narrowable = False
+            continue
+
+        if not model_field.concrete and not model_field.one_to_one:
+            narrowable = False
+            continue
+
+        if model_field.is_relation and not model_field.many_to_many:
+            if isinstance(field, serializers.BaseSerializer):
+                select.append(path)
+                if not _collect(
+                    model_field.related_model,
+                    field,
+                    f"{path}__",
+                    select,
+                    prefetch,
+                    only,
+                ):
+                    narrowable = False
+                continue
+            if isinstance(field, serializers.PrimaryKeyRelatedField):
+                only.add(path)
+                continue
+            # StringRelatedField, SlugRelatedField and friends read the related row.
+            select.append(path)
+            narrowable = False
+            continue
+
+        only.add(path)
+
+    return narrowable
+
+
+def _prefetch(model_field, field, path):
+    """
+    Build a Prefetch for a to-many relation, optimized for the nested serializer.
+    """
+
+    queryset = model_field.related_model._default_manager.all()
+    child = getattr(field, "child", None) or getattr(field, "child_relation", None)
+    if isinstance(child, serializers.BaseSerializer):
+        # Reverse foreign keys need the key column to attach prefetched rows.
+        required = [model_field.field.name] if model_field.one_to_many else []
+        queryset = _optimize(queryset, child, required)
+    return Prefetch(path, queryset=queryset)
@@ -0,0 +1,48 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer producing the same bytes as DRF's, encoded with orjson when it is installed.
+
+    Values orjson does not handle the way DRF does are passed to DRF's JSONEncoder: datetimes,
+    dates and times (millisecond precision, `Z` for UTC) and raw Decimals (as numbers, e.g. a
+    SerializerMethodField total). Decimal model fields are already strings, per
+    COERCE_DECIMAL_TO_STRING. Without orjson, when indented or ASCII-only output is asked for,
+    or when orjson rejects the data (e.g. integers beyond 64 bits, or types the encoder does not
+    know, so DRF raises its own error), rendering falls back to the stdlib json module.
+
+    Floats are the exception to identical output: orjson writes exponents without a sign or
+    padding (`1e16` and `1e-7`, where the stdlib writes `1e+16` and `1e-07`), and renders NaN
+    and infinity as null where the stdlib raises ValueError. Prices are Decimals and the metrics'
+    floats are rounded milliseconds, so API responses do not meet these cases in practice.
+    """
+
+    if orjson is not None:
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b""
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder_class().default, option=self.options
+            )
+        except (orjson.JSONEncodeError, TypeError):
+            return super().render(data, accepted_media_type, renderer_context)
+        # As JSONRenderer, escape the separators that are not valid in javascript strings.
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                b"\xe2\x80\xa9", b"\\u2029"
+            )
+        return ret
@@ -0,0 +1,217 @@
+import random
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS", "TRACE")
+
+# The replica reads of the request being handled, see `replica_reads()`.
+current_reads = ContextVar("current_replica_reads", default=None)
+
+
+def get_replicas():
+    return getattr(settings, "DATABASE_REPLICAS", [])
+
+
+class ReplicaHealth:
+    """
+    In-process health of the replicas.
+
+    A replica is checked with `SELECT 1` when first routed to, then again at most every
+    REPLICA_HEALTH_CHECK_INTERVAL seconds (default 5); an unhealthy replica is skipped until a
+    later check succeeds.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._checks = {}
+
+    def is_healthy(self, alias):
+        interval = getattr(settings, "REPLICA_HEALTH_CHECK_INTERVAL", 5)
+        now = time.monotonic()
+        with self._lock:
+            check = self._checks.get(alias)
+        if check is not None and now - check[1] < interval:
+            return check[0]
+        healthy = self.check(alias)
+        with self._lock:
+            self._checks[alias] = (healthy, now)
+        return healthy
+
+    def check(self, alias):
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute("SELECT 1")
+        except DatabaseError:
+            connections[alias].close()
+            return False
+        return True
+
+    def as_dict(self):
+        with self._lock:
+            return {alias: healthy for alias, (healthy, _) in self._checks.items()}
+
+
+health = ReplicaHealth()
+
+
+def get_pin_cache():
+    return caches[getattr(settings, "REPLICA_PIN_CACHE_ALIAS", "default")]
+
+
+def pin_to_primary(user_id):
+    """
+    Send the user's replica reads to the primary for the next REPLICA_PIN_SECONDS (default 5),
+    so that they read their own writes while the replicas catch up.
+    """
+
+    get_pin_cache().set(
+        f"replicas:pinned:{user_id}",
+        True,
+        timeout=getattr(settings, "REPLICA_PIN_SECONDS", 5),
+    )
+
+
+def is_pinned(user_id):
+    return get_pin_cache().get(f"replicas:pinned:{user_id}", False)
+
+
+class ReplicaReads:
+    """
+    The state of a `replica_reads()` block: its request, and whether it must read from the
+    primary because the user is pinned or the block itself wrote.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self.wrote = False
+        self._pinned = None
+
+    def use_primary(self):
+        if self.wrote:
+            return True
+        if self._pinned is None:
+            # Provisional, in case resolving the user queries the database.
+            self._pinned = False
+            user = getattr(self.request, "user", None)
+            self._pinned = bool(
+                user is not None and user.is_authenticated and is_pinned(user.pk)
+            )
+        return self._pinned
+
+
+@contextmanager
+def replica_reads(request=None):
+    """
+    Route the reads of the enclosed code to a healthy replica, unless the request's user is
+    pinned to the primary (see `pin_to_primary`). Reads after a write go to the primary.
+
+    The user is only looked up at the first read, once the view has authenticated the request.
+    """
+
+    token = current_reads.set(ReplicaReads(request))
+    try:
+        yield
+    finally:
+        current_reads.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Database router sending the reads of `replica_reads()` blocks to the DATABASE_REPLICAS
+    aliases, picked at random among the healthy ones. Everything else, including all writes,
+    goes to the default database, which is also the fallback when no replica is healthy.
+    """
+
+    def db_for_read(self, model, **hints):
+        reads = current_reads.get()
+        if reads is None or reads.use_primary():
+            return None
+        replicas = [alias for alias in get_replicas() if health.is_healthy(alias)]
+        if not replicas:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        reads = current_reads.get()
+        if reads is not None:
+            reads.wrote = True
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaReadMixin:
+    """
+    ViewSet mixin reading `replica_actions` from the replicas, see ReplicaRouter.
+    """
+
+    replica_actions = ()
+
+    def replica_reads(self, request, action):
+        """
+        Return the context in which the action's queries run.
+        """
+
+        if action in self.replica_actions and get_replicas():
+            return replica_reads(request)
+        return nullcontext()
+
+    def dispatch(self, request, *args, **kwargs):
+        action = getattr(self, "action_map", {}).get(request.method.lower())
+        with self.replica_reads(request, action):
+            return super().dispatch(request, *args, **kwargs)
+
+
+class ReplicaPinningMiddleware:
+    """
+    Pin the user to the primary after every successful write request (cart changes, checkout),
+    see `pin_to_primary`. Removed from the chain when no replica is configured.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not get_replicas():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        self.pin(request, response)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if request.method not in SAFE_METHODS:
+            # Resolving a session user queries the database.
+            await sync_to_async(self.pin)(request, response)
+        return response
+
+    def pin(self, request, response):
+        if request.method in SAFE_METHODS or response.status_code >= 400:
+            return
+        # Token authentication sets the user on the request as the view runs.
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            pin_to_primary(user.pk)
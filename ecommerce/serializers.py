@@ -0,0 +1,198 @@
+from decimal import Decimal
+
+from django.db.models import F
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+from rest_framework.relations import ManyRelatedField, RelatedField
+
+
+class ValuesSerializer:
+    """
+    Read-only fast path reproducing a ModelSerializer's output from `.values()` rows.
+
+    A ModelSerializer resolves every field of every instance through its own field machinery.
+    A ValuesSerializer selects only the needed columns with `.values()` (related values and
+    computed fields as SQL expressions) and converts them with the model serializer's own field
+    instances, so the output is identical at a fraction of the cost. It only reads; writes keep
+    going through the model serializer and its validation.
+
+    Subclasses set:
+    - serializer_class: The ModelSerializer whose output is reproduced.
+    - values: Maps output fields to the `.values()` lookup or expression providing them, or to a
+      `(lookup, converter)` pair whose converter receives the raw value (None included). Other
+      fields use their `source`; related fields must be listed here.
+    - nested: Maps nested list fields to `(ValuesSerializer, foreign key)` pairs; the children
+      of all rows are loaded in one query.
+    - extra_values: Lookups selected without being output, e.g. the paginator's keys.
+    - omit: Fields the model serializer never outputs.
+    """
+
+    serializer_class = None
+    values = {}
+    nested = {}
+    extra_values = ()
+    omit = ()
+
+    def __init__(self, instance=None, many=False, context=None, **kwargs):
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+
+    @classmethod
+    def values_queryset(cls, queryset, extra=()):
+        """
+        Turn a model queryset into the `.values()` queryset this serializer reads.
+
+        Args:
+            queryset (QuerySet): The model queryset, filtered and annotated as usual.
+            extra (tuple): Further lookups to select, e.g. a foreign key to group rows by.
+
+        Returns:
+            QuerySet: The queryset of row dicts.
+        """
+
+        lookups = ["pk", *cls.extra_values, *extra]
+        expressions = {}
+        for name, key, lookup, _, _ in cls._columns():
+            if name in cls.nested:
+                continue
+            if key == lookup:
+                lookups.append(lookup)
+            else:
+                expressions[key] = F(lookup) if isinstance(lookup, str) else lookup
+        return queryset.prefetch_related(None).values(
+            *dict.fromkeys(lookups), **expressions
+        )
+
+    @property
+    def data(self):
+        rows = list(self.instance) if self.many else [self.instance]
+        children = self._load_nested(rows)
+        data = [self.to_representation(row, children) for row in rows]
+        return data if self.many else data[0]
+
+    def to_representation(self, row, children=None):
+        ret = {}
+        for name, key, _, convert, raw in self._columns():
+            if name in self.nested:
+                child, _ = self.nested[name]
+                ret[name] = [
+                    child().to_representation(child_row)
+                    for child_row in children[name].get(row["pk"], [])
+                ]
+                continue
+            value = row[key]
+            if convert is not None and (value is not None or raw):
+                value = convert(value)
+            ret[name] = value
+        return ret
+
+    def _load_nested(self, rows):
+        children = {}
+        pks = [row["pk"] for row in rows]
+        for name, (child, foreign_key) in self.nested.items():
+            model = child.serializer_class.Meta.model
+            grouped = {}
+            queryset = model._default_manager.filter(**{f"{foreign_key}__in": pks})
+            for child_row in child.values_queryset(queryset, extra=(foreign_key,)):
+                grouped.setdefault(child_row[foreign_key], []).append(child_row)
+            children[name] = grouped
+        return children
+
+    @classmethod
+    def _columns(cls):
+        """
+        Return `(name, row key, lookup, converter, raw)` for each output field, computed once.
+
+        Converters are skipped for None values, as in Serializer.to_representation, unless
+        `raw` is set.
+        """
+
+        if "_column_cache" not in cls.__dict__:
+            cls._column_cache = [
+                cls._column(name, field)
+                for name, field in cls.serializer_class().fields.items()
+                if not field.write_only and name not in cls.omit
+            ]
+        return cls._column_cache
+
+    @classmethod
+    def _column(cls, name, field):
+        if name in cls.nested:
+            return name, None, None, None, False
+        declared = cls.values.get(name)
+        if isinstance(declared, tuple):
+            lookup, convert = declared
+            return name, f"values_{name}", lookup, convert, True
+        if declared is not None:
+            key = declared if isinstance(declared, str) else f"values_{name}"
+            return name, key, declared, None, False
+        if isinstance(
+            field, (RelatedField, ManyRelatedField, serializers.BaseSerializer)
+        ):
+            raise TypeError(
+                f"{cls.__name__}.values must provide the related field {name!r}."
+            )
+        lookup = field.source.replace(".", "__")
+        convert = None
+        if isinstance(field, serializers.DecimalField):
+            convert = _decimal_representation(field)
+        elif not isinstance(
+            field, (serializers.ReadOnlyField, serializers.IntegerField)
+        ):
+            convert = field.to_representation
+        return name, lookup, lookup, convert, False
+
+
+def _decimal_representation(field):
+    """
+    Return a converter equivalent to `field.to_representation` for DecimalField values.
+
+    Model DecimalField values are read with the field's decimal places already, so quantizing
+    them again (with a fresh decimal context per value) is skipped when the exponent matches.
+    """
+
+    exponent = -field.decimal_places if field.decimal_places is not None else None
+    coerce_to_string = getattr(
+        field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING
+    )
+    if exponent is None or not coerce_to_string or field.localize:
+        return field.to_representation
+
+    def convert(value):
+        if isinstance(value, Decimal) and value.as_tuple().exponent == exponent:
+            return f"{value:f}"
+        return field.to_representation(value)
+
+    return convert
+
+
+class ValuesReadMixin:
+    """
+    ViewSet mixin serving `values_actions` (list and retrieve) through `values_serializer_class`,
+    a ValuesSerializer, while the other actions keep the model serializer.
+    """
+
+    values_serializer_class = None
+    values_actions = ("list", "retrieve")
+
+    def reads_values(self):
+        return self.action in self.values_actions
+
+    def get_values_serializer_class(self):
+        """
+        Return the ValuesSerializer of this request, by default `values_serializer_class`.
+        """
+
+        return self.values_serializer_class
+
+    def get_serializer_class(self):
+        if self.reads_values():
+            return self.get_values_serializer_class()
+        return super().get_serializer_class()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.reads_values():
+            return self.get_values_serializer_class().values_queryset(queryset)
+        return queryset
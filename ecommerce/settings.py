@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 from datetime import timedelta
 from pathlib import Path
 
+from .database import database_config, replica_configs
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -43,23 +45,34 @@ INSTALLED_APPS = [
     "products",
     "cart",
     "orders",
+    "inventory",
+    "idempotency",
+    "jobs",
+    "benchmarks",
     ## 3rd party apps
     "rest_framework",
     "rest_framework_simplejwt",
 ]
 
 MIDDLEWARE = [
+    # Removes itself unless INSTRUMENTATION_ENABLED is set, see below.
+    "ecommerce.instrumentation.InstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "ecommerce.replicas.ReplicaPinningMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
 ROOT_URLCONF = "ecommerce.urls"
 
+# URLconf of the ASGI application (ecommerce.asgi): the same routes, with the read-heavy
+# endpoints served by async views.
+ASGI_URLCONF = "ecommerce.asgi_urls"
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
@@ -78,7 +91,17 @@ TEMPLATES = [
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "rest_framework_simplejwt.authentication.JWTStatelessUserAuthentication",
+    ),
+    # orjson-backed JSON, falling back to the stdlib when orjson is not installed.
+    "DEFAULT_RENDERER_CLASSES": (
+        "ecommerce.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "ecommerce.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
     ),
 }
 
@@ -88,21 +111,90 @@ SIMPLE_JWT = {
     "BLACKLIST_AFTER_ROTATION": True,
     "AUTH_HEADER_TYPES": ("Bearer",),
     "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
+    # Requests authenticate from the token's claims, loading the User row only on demand.
+    "TOKEN_USER_CLASS": "users.authentication.LazyTokenUser",
+    "TOKEN_OBTAIN_SERIALIZER": "users.authentication.UserClaimsTokenObtainPairSerializer",
 }
 
+# Size and TTL (seconds) of the in-process cache of full users behind token users.
+TOKEN_USER_CACHE_SIZE = 1024
+TOKEN_USER_CACHE_TTL = 60
+
 WSGI_APPLICATION = "ecommerce.wsgi.application"
 
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
+# Configured from DATABASE_* environment variables, see ecommerce.database: SQLite by
+# default, tuned for concurrent requests, or Postgres with optional pooling.
+DATABASES = {"default": database_config(BASE_DIR)}
+DATABASES.update(replica_configs(DATABASES["default"]))
+
+# Read replicas serve the reads of replica-safe actions (product lists, order history), see
+# ecommerce.replicas; a user's reads go to the primary for REPLICA_PIN_SECONDS after a write,
+# and to the primary as well while no replica passes its health check.
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["ecommerce.replicas.ReplicaRouter"]
+REPLICA_PIN_SECONDS = 5
+REPLICA_PIN_CACHE_ALIAS = "default"
+REPLICA_HEALTH_CHECK_INTERVAL = 5
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
     }
 }
 
+# Cache alias and timeout (seconds) of the products response cache.
+PRODUCTS_CACHE_ALIAS = "default"
+PRODUCTS_CACHE_TIMEOUT = 300
+
+
+# Seconds the stock reserved for a checkout is held (inventory.stock.reserve); expired
+# reservations are returned to stock by the release_reservations command.
+INVENTORY_RESERVATION_SECONDS = 15 * 60
+
+
+# Idempotency-Key handling of checkout and add to cart (idempotency.decorators). Responses are
+# replayed for IDEMPOTENCY_TTL seconds; a retry of an in-flight request waits up to
+# IDEMPOTENCY_WAIT_SECONDS for it, and an abandoned request frees its key after
+# IDEMPOTENCY_LOCK_SECONDS. Keys are stored in the database (swept by the
+# purge_idempotency_keys command), or in the IDEMPOTENCY_CACHE_ALIAS cache with
+# "idempotency.backends.CacheIdempotencyBackend".
+IDEMPOTENCY_BACKEND = "idempotency.backends.DatabaseIdempotencyBackend"
+IDEMPOTENCY_CACHE_ALIAS = "default"
+IDEMPOTENCY_TTL = 24 * 60 * 60
+IDEMPOTENCY_WAIT_SECONDS = 10
+IDEMPOTENCY_LOCK_SECONDS = 60
+
+
+# Background jobs (jobs.queue), run by `manage.py run_jobs`. A failed job is retried up to
+# JOBS_MAX_ATTEMPTS times, after JOBS_RETRY_BACKOFF seconds doubled at each attempt (at most
+# JOBS_RETRY_BACKOFF_MAX); a job held longer than JOBS_LOCK_TIMEOUT by a worker is deemed
+# abandoned and run again.
+JOBS_MAX_ATTEMPTS = 5
+JOBS_RETRY_BACKOFF = 5
+JOBS_RETRY_BACKOFF_MAX = 3600
+JOBS_LOCK_TIMEOUT = 300
+
+
+# Email, e.g. order confirmations: printed to the worker's output until an SMTP server is
+# configured.
+EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
+
+
+# Request instrumentation: Server-Timing headers and per-endpoint latency histograms
+# (ecommerce.instrumentation.endpoint_metrics). Set a threshold to dump cProfile stats of
+# slower requests to INSTRUMENTATION_PROFILE_DIR.
+INSTRUMENTATION_ENABLED = False
+INSTRUMENTATION_PROFILE_THRESHOLD_MS = None
+INSTRUMENTATION_PROFILE_DIR = BASE_DIR / "profiles"
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -122,6 +214,22 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing
+# https://docs.djangoproject.com/en/5.1/topics/auth/passwords/
+
+PASSWORD_HASHERS = [
+    "users.hashers.ConfigurablePBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+
+# PBKDF2 work factor, the main CPU cost of a login. 600,000 is the OWASP recommendation for
+# PBKDF2-HMAC-SHA256 and verifies ~1.6x faster than Django's default of 1,000,000
+# (see `manage.py bench_login`).
+PASSWORD_HASH_ITERATIONS = 600_000
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
@@ -0,0 +1,92 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.test import AsyncClient, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+
+
+class QueryCountAssertionsMixin:
+    """
+    TestCase mixin with assertions about how an endpoint's query count scales.
+    """
+
+    def assertConstantQueries(self, populate, request, sizes=(1, 10, 50)):
+        """
+        Fail if the number of queries run by `request` changes with the result size.
+
+        Args:
+            populate (callable): Called with each size to create that many rows; its return
+                value is passed to `request`.
+            request (callable): Performs the request under test, e.g. a test client call.
+            sizes (tuple): The result sizes to compare.
+
+        Returns:
+            int: The (constant) number of queries the request ran.
+        """
+
+        counts = {}
+        for size in sizes:
+            state = populate(size)
+            with CaptureQueriesContext(connection) as context:
+                request(state)
+            counts[size] = len(context.captured_queries)
+
+        if len(set(counts.values())) > 1:
+            self.fail(
+                "Query count grows with result size: "
+                + ", ".join(f"{size} rows -> {count}" for size, count in counts.items())
+                + "\n"
+                + "\n".join(query["sql"] for query in context.captured_queries)
+            )
+        return counts[sizes[0]]
+
+
+class ValuesSerializerAssertionsMixin:
+    """
+    TestCase mixin comparing a ValuesSerializer with the model serializer it reproduces.
+    """
+
+    def assertSameRepresentation(self, values_serializer, queryset):
+        """
+        Fail unless `values_serializer` renders `queryset`, as a list and row by row, to the same
+        JSON bytes as its model serializer renders the model instances.
+        """
+
+        model_serializer = values_serializer.serializer_class
+        rows = values_serializer.values_queryset(queryset)
+        self.assertEqual(
+            JSONRenderer().render(values_serializer(rows, many=True).data),
+            JSONRenderer().render(model_serializer(queryset, many=True).data),
+        )
+        for instance, row in zip(queryset, rows):
+            self.assertEqual(
+                JSONRenderer().render(values_serializer(row).data),
+                JSONRenderer().render(model_serializer(instance).data),
+            )
+
+
+class AsyncViewAssertionsMixin:
+    """
+    TestCase mixin comparing the async views of ASGI_URLCONF with the sync views they stand in for.
+    """
+
+    compared_headers = ("Content-Type", "Allow", "Vary", "ETag", "Last-Modified")
+
+    async def assertSameResponse(self, path, headers=None):
+        """
+        Fail unless a GET of `path` gets the same status, body and headers from the ASGI
+        URLconf, through an async client, as from ROOT_URLCONF.
+
+        Returns:
+            HttpResponse: The response of the ASGI URLconf.
+        """
+
+        expected = await sync_to_async(Client().get)(path, headers=headers)
+        with override_settings(ROOT_URLCONF=settings.ASGI_URLCONF):
+            response = await AsyncClient().get(path, headers=headers)
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.content, expected.content)
+        for header in self.compared_headers:
+            self.assertEqual(response.get(header), expected.get(header), header)
+        return response
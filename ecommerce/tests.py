@@ -0,0 +1,371 @@
+import datetime
+import io
+import tempfile
+import uuid
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection, connections
+from django.db.utils import load_backend
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from orders.models import OrderModel
+from products.cache import get_cache
+from products.models import ProductModel
+from .database import database_config, replica_configs
+from .instrumentation import LatencyHistogram, endpoint_metrics
+from .parsers import FastJSONParser
+from .replicas import get_pin_cache, health, is_pinned
+from .renderers import FastJSONRenderer
+
+
+class DatabaseConfigTests(TestCase):
+    """
+    DATABASES is built from the environment, with SQLite tuned for concurrent requests.
+    """
+
+    def test_sqlite(self):
+        config = database_config(Path("/srv"), {"DATABASE_CONN_MAX_AGE": "none"})
+        self.assertEqual(config["ENGINE"], "django.db.backends.sqlite3")
+        self.assertEqual(config["NAME"], Path("/srv/db.sqlite3"))
+        self.assertIsNone(config["CONN_MAX_AGE"])
+        self.assertTrue(config["CONN_HEALTH_CHECKS"])
+        self.assertEqual(config["OPTIONS"]["transaction_mode"], "IMMEDIATE")
+
+        config = database_config(Path("/srv"), {"DATABASE_SQLITE_TUNING": "0"})
+        self.assertEqual(config["CONN_MAX_AGE"], 60)
+        self.assertEqual(config["OPTIONS"], {})
+
+    def test_postgres(self):
+        environ = {
+            "DATABASE_ENGINE": "postgres",
+            "DATABASE_HOST": "db",
+            "DATABASE_POOL_MAX_SIZE": "20",
+            "DATABASE_PGBOUNCER": "true",
+        }
+        config = database_config(Path("/srv"), environ)
+        self.assertEqual(config["ENGINE"], "django.db.backends.postgresql")
+        self.assertEqual(config["HOST"], "db")
+        self.assertEqual(
+            config["OPTIONS"]["pool"], {"min_size": 2, "max_size": 20, "timeout": 10}
+        )
+        self.assertEqual(config["CONN_MAX_AGE"], 0)
+        self.assertTrue(config["DISABLE_SERVER_SIDE_CURSORS"])
+
+    def test_replicas(self):
+        default = database_config(Path("/srv"), {"DATABASE_ENGINE": "postgres"})
+        replicas = replica_configs(
+            default, {"DATABASE_READ_REPLICAS": "replica-a, replica-b:6432"}
+        )
+        self.assertEqual(list(replicas), ["replica_1", "replica_2"])
+        self.assertEqual(replicas["replica_1"]["HOST"], "replica-a")
+        self.assertEqual(replicas["replica_2"]["PORT"], "6432")
+        self.assertEqual(replicas["replica_2"]["TEST"], {"MIRROR": "default"})
+        self.assertEqual(replica_configs(default, {}), {})
+
+    def test_connection_is_tuned(self):
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0], "wal")
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+
+class InstrumentationTests(TestCase):
+    """
+    The opt-in instrumentation middleware times requests per endpoint, here the cart's.
+    """
+
+    def setUp(self):
+        endpoint_metrics.reset()
+        self.user = User.objects.create(username="shopper")
+        self.product = ProductModel.objects.create(name="Mug", price=Decimal("5.00"))
+        self.add = reverse("cart:add_to_cart", kwargs={"user_id": self.user.id})
+        self.view = reverse("cart:view_cart", kwargs={"user_id": self.user.id})
+
+    def client_for(self, **settings):
+        with self.settings(**settings):
+            client = APIClient()
+            client.force_authenticate(self.user)
+            # The middleware chain is built on the first request.
+            client.get(self.view)
+        endpoint_metrics.reset()
+        return client
+
+    def test_disabled_by_default(self):
+        client = self.client_for()
+        self.assertNotIn("Server-Timing", client.get(self.view))
+        self.assertEqual(endpoint_metrics.as_dict(), {})
+
+    def test_records_endpoints(self):
+        client = self.client_for(INSTRUMENTATION_ENABLED=True)
+        for _ in range(3):
+            client.post(self.add, {"product": self.product.pk})
+        response = client.get(self.view)
+
+        self.assertRegex(
+            response["Server-Timing"],
+            r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries", serializer;dur=[\d.]+$',
+        )
+        metrics = endpoint_metrics.as_dict()
+        self.assertEqual(set(metrics), {"add_to_cart", "view_cart"})
+        self.assertEqual(metrics["add_to_cart"]["count"], 3)
+        view_cart = metrics["view_cart"]
+        self.assertGreater(view_cart["queries"], 0)
+        self.assertGreater(view_cart["serializer_ms"], 0)
+        self.assertEqual(view_cart["bytes"], len(response.content))
+        self.assertLessEqual(view_cart["p50_ms"], view_cart["p99_ms"])
+
+    def test_profiles_slow_requests(self):
+        with tempfile.TemporaryDirectory() as directory:
+            client = self.client_for(
+                INSTRUMENTATION_ENABLED=True,
+                INSTRUMENTATION_PROFILE_THRESHOLD_MS=0,
+                INSTRUMENTATION_PROFILE_DIR=directory,
+            )
+            client.get(self.view)
+            profiles = [path.name for path in Path(directory).iterdir()]
+        # One for the request that built the middleware chain, one for this one.
+        self.assertEqual(len(profiles), 2)
+        self.assertTrue(all(name.startswith("view_cart-") for name in profiles))
+
+    def test_histogram_percentiles(self):
+        histogram = LatencyHistogram()
+        for duration in range(1, 101):
+            histogram.record(duration)
+        self.assertAlmostEqual(histogram.percentile(50), 50, delta=50 * 0.05)
+        self.assertAlmostEqual(histogram.percentile(99), 99, delta=99 * 0.05)
+        self.assertEqual(histogram.percentile(100), 100)
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRoutingTests(TestCase):
+    """
+    Catalogue and order history reads go to a healthy replica, except after the user's writes.
+
+    A second SQLite file stands in for the replica, holding different rows than the primary.
+    It is a connection of this thread only, outside the test transaction.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.TemporaryDirectory()
+        settings_dict = {
+            **connections["default"].settings_dict,
+            "NAME": Path(cls.directory.name) / "replica.sqlite3",
+        }
+        connections["replica"] = load_backend(settings_dict["ENGINE"]).DatabaseWrapper(
+            settings_dict, "replica"
+        )
+        call_command("migrate", database="replica", verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        connections["replica"].close()
+        del connections["replica"]
+        cls.directory.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        health.reset()
+        get_pin_cache().clear()
+        get_cache().clear()
+        self.user = User.objects.create(username="buyer")
+        self.product = ProductModel.objects.create(name="Primary mug", price=1)
+        self.create_order("default")
+
+        User.objects.using("replica").bulk_create(
+            [User(pk=self.user.pk, username="buyer")]
+        )
+        ProductModel.objects.using("replica").bulk_create(
+            [ProductModel(name="Replica mug", price=1)]
+        )
+        for _ in range(2):
+            self.create_order("replica")
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.orders = reverse("orders:order-history", kwargs={"user_id": self.user.pk})
+        self.products = reverse("products:product-list")
+
+    def tearDown(self):
+        for model in (OrderModel, ProductModel, User):
+            model.objects.using("replica").all().delete()
+        with connections["replica"].cursor() as cursor:
+            cursor.execute("DELETE FROM products_productmodel_fts")
+
+    def create_order(self, using):
+        OrderModel.objects.using(using).bulk_create(
+            [
+                OrderModel(
+                    user_id=self.user.pk,
+                    country="EG",
+                    city="Cairo",
+                    state="Cairo",
+                    street="Tahrir",
+                    phone="0100",
+                )
+            ]
+        )
+
+    def order_count(self, client=None):
+        response = (client or self.client).get(self.orders)
+        return len(response.data["results"])
+
+    def product_names(self):
+        response = self.client.get(self.products)
+        return [product["name"] for product in response.data["results"]]
+
+    def test_reads_from_replica(self):
+        self.assertEqual(self.product_names(), ["Replica mug"])
+        self.assertEqual(self.order_count(), 2)
+
+    def test_searches_read_from_replica(self):
+        with connections["replica"].cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO products_productmodel_fts (rowid, name) "
+                "SELECT id, name FROM products_productmodel"
+            )
+        for ordering in ("rank", "price"):
+            with self.subTest(ordering=ordering):
+                get_cache().clear()
+                response = self.client.get(
+                    self.products, {"search": "replica", "ordering": ordering}
+                )
+                self.assertEqual(
+                    [product["name"] for product in response.data["results"]],
+                    ["Replica mug"],
+                )
+
+    def test_writes_go_to_primary(self):
+        response = self.client.post(self.products, {"name": "Cup", "price": "2.00"})
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(ProductModel.objects.filter(name="Cup").exists())
+        self.assertFalse(
+            ProductModel.objects.using("replica").filter(name="Cup").exists()
+        )
+
+    def test_reads_own_writes(self):
+        response = self.client.post(
+            reverse("cart:add_to_cart", kwargs={"user_id": self.user.pk}),
+            {"product": self.product.pk},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(is_pinned(self.user.pk))
+        self.assertEqual(self.order_count(), 1)
+
+        # Other users, here staff allowed to read the buyer's orders, keep reading from the replica.
+        other = APIClient()
+        other.force_authenticate(User.objects.create(username="other", is_staff=True))
+        self.assertEqual(self.order_count(other), 2)
+
+        get_pin_cache().clear()
+        self.assertEqual(self.order_count(), 2)
+
+    def test_unhealthy_replica_falls_back_to_primary(self):
+        replica = connections["replica"]
+        name = replica.settings_dict["NAME"]
+        replica.close()
+        replica.settings_dict["NAME"] = Path(self.directory.name) / "missing" / "db"
+        try:
+            self.assertEqual(self.product_names(), ["Primary mug"])
+            self.assertEqual(health.as_dict(), {"replica": False})
+        finally:
+            replica.settings_dict["NAME"] = name
+
+    @override_settings(ROOT_URLCONF=settings.ASGI_URLCONF)
+    async def test_async_views_read_from_replica(self):
+        response = await AsyncClient().get(self.products)
+        self.assertEqual(
+            [product["name"] for product in response.json()["results"]],
+            ["Replica mug"],
+        )
+
+
+class FastJSONTests(TestCase):
+    """
+    The orjson renderer and parser behave exactly like DRF's stdlib ones.
+    """
+
+    def test_renders_identical_bytes(self):
+        utc = datetime.timezone.utc
+        cairo = datetime.timezone(datetime.timedelta(hours=2))
+        data = {
+            "price": "5.00",
+            "total": Decimal("12.30"),
+            "zero": Decimal("0"),
+            "created_at": datetime.datetime(2024, 8, 10, 18, 58, 1, 123456, tzinfo=utc),
+            "local": datetime.datetime(2024, 8, 10, 18, 58, tzinfo=cairo),
+            "naive": datetime.datetime(2024, 8, 10, 18, 58, 1, 5000),
+            "date": datetime.date(2024, 8, 10),
+            "time": datetime.time(18, 58, 1, 250000),
+            "duration": datetime.timedelta(minutes=90),
+            "id": uuid.UUID(int=1),
+            "lazy": gettext_lazy("This field is required."),
+            "text": "Caf\u00e9 \u2028 \u2029 \U0001f600",
+            1: [None, True, 1.5, (2, 3)],
+        }
+        for payload in (data, [data, data], None, []):
+            with self.subTest(payload=payload):
+                self.assertEqual(
+                    FastJSONRenderer().render(payload), JSONRenderer().render(payload)
+                )
+        self.assertEqual(
+            FastJSONRenderer().render(data, "application/json; indent=4"),
+            JSONRenderer().render(data, "application/json; indent=4"),
+        )
+
+    def test_falls_back_on_values_orjson_rejects(self):
+        for payload in ({"big": 2**64}, [-(2**70)], {"set": {1}}):
+            with self.subTest(payload=payload):
+                self.assertEqual(
+                    FastJSONRenderer().render(payload), JSONRenderer().render(payload)
+                )
+        with self.assertRaises(TypeError):
+            FastJSONRenderer().render({"object": object()})
+
+    def test_endpoint_output_is_unchanged(self):
+        ProductModel.objects.create(name="Caf\u00e9 mug", price=Decimal("1234.50"))
+        get_cache().clear()
+        response = APIClient().get(reverse("products:product-list"))
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+    def test_stdlib_fallback(self):
+        with mock.patch("ecommerce.renderers.orjson", None):
+            self.assertEqual(
+                FastJSONRenderer().render({"a": Decimal("1.5")}), b'{"a":1.5}'
+            )
+        with mock.patch("ecommerce.parsers.orjson", None):
+            self.assertEqual(self.parse(FastJSONParser, b'{"a": 1}'), {"a": 1})
+
+    def parse(self, parser, body):
+        return parser().parse(io.BytesIO(body))
+
+    def test_parses_like_json_parser(self):
+        for body in (
+            b'{"product": "red-mug", "quantity": 2}',
+            b"[1.5, null]",
+            b'{"big": 123456789012345678901234567890}',
+        ):
+            with self.subTest(body=body):
+                self.assertEqual(
+                    self.parse(FastJSONParser, body), self.parse(JSONParser, body)
+                )
+        for body in (b"{", b'{"price": NaN}'):
+            with self.subTest(body=body):
+                with self.assertRaises(ParseError) as expected:
+                    self.parse(JSONParser, body)
+                with self.assertRaises(ParseError) as fast:
+                    self.parse(FastJSONParser, body)
+                self.assertEqual(str(fast.exception), str(expected.exception))
@@ -0,0 +1,20 @@
+from django.contrib import admin
+
+from .models import IdempotencyKey
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    """
+    Admin interface configuration for the IdempotencyKey model.
+
+    List Display:
+        scope: The user who sent the key.
+        key: The client's Idempotency-Key.
+        status_code: The stored response's status, empty while in flight.
+        expires_at: When the key may be reused.
+    """
+
+    list_display = ["scope", "key", "status_code", "expires_at"]
+    search_fields = ["key"]
+    exclude = ["content"]
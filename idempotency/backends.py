@@ -0,0 +1,193 @@
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import IdempotencyKey
+
+
+class BaseIdempotencyBackend:
+    """
+    Interface for the storage of idempotency keys.
+
+    Records are dicts with the request's `fingerprint` and the stored response's `status_code`
+    (None while the request is in flight), `content` and `content_type`.
+    """
+
+    def claim(self, scope, key, fingerprint, timeout):
+        """
+        Record that a request with this key is in flight, unless the key is in use.
+
+        Args:
+            scope (str): The namespace of the key.
+            key (str): The Idempotency-Key.
+            fingerprint (str): A hash of the request.
+            timeout (float): Seconds after which an unfinished claim lapses.
+
+        Returns:
+            dict: None if the caller claimed the key and must run the request, otherwise
+            the key's record.
+        """
+
+        raise NotImplementedError
+
+    def get(self, scope, key):
+        """
+        Return the key's record, or None if the key is unused or lapsed.
+        """
+
+        raise NotImplementedError
+
+    def complete(self, scope, key, status_code, content, content_type, timeout):
+        """
+        Store the response of the claimed request, replayed for `timeout` seconds.
+        """
+
+        raise NotImplementedError
+
+    def release(self, scope, key):
+        """
+        Give up a claim, so that a retry runs the request again.
+        """
+
+        raise NotImplementedError
+
+    def purge_expired(self):
+        """
+        Delete lapsed keys.
+
+        Returns:
+            int: The number of keys deleted.
+        """
+
+        return 0
+
+
+class DatabaseIdempotencyBackend(BaseIdempotencyBackend):
+    """
+    Stores keys in the IdempotencyKey table, claimed by inserting their row: the unique
+    (scope, key) constraint lets a single concurrent request claim a key. Lapsed rows are
+    deleted by the purge_idempotency_keys command.
+    """
+
+    fields = ("fingerprint", "status_code", "content", "content_type")
+
+    def claim(self, scope, key, fingerprint, timeout):
+        expires_at = timezone.now() + timedelta(seconds=timeout)
+        while True:
+            try:
+                with transaction.atomic():
+                    IdempotencyKey.objects.create(
+                        scope=scope,
+                        key=key,
+                        fingerprint=fingerprint,
+                        expires_at=expires_at,
+                    )
+                return None
+            except IntegrityError:
+                record = self.get(scope, key)
+                if record is not None:
+                    return record
+                # The key lapsed: delete it and claim it again. A concurrent request may claim it
+                # first, whose record is then returned, so the key is never left unheld.
+                IdempotencyKey.objects.filter(
+                    scope=scope, key=key, expires_at__lte=timezone.now()
+                ).delete()
+
+    def get(self, scope, key):
+        record = (
+            IdempotencyKey.objects.filter(
+                scope=scope, key=key, expires_at__gt=timezone.now()
+            )
+            .values(*self.fields)
+            .first()
+        )
+        if record is not None:
+            record["content"] = bytes(record["content"])
+        return record
+
+    def complete(self, scope, key, status_code, content, content_type, timeout):
+        IdempotencyKey.objects.filter(scope=scope, key=key).update(
+            status_code=status_code,
+            content=content,
+            content_type=content_type,
+            expires_at=timezone.now() + timedelta(seconds=timeout),
+        )
+
+    def release(self, scope, key):
+        IdempotencyKey.objects.filter(
+            scope=scope, key=key, status_code__isnull=True
+        ).delete()
+
+    def purge_expired(self):
+        deleted, _ = IdempotencyKey.objects.filter(
+            expires_at__lte=timezone.now()
+        ).delete()
+        return deleted
+
+
+class CacheIdempotencyBackend(BaseIdempotencyBackend):
+    """
+    Stores keys in the IDEMPOTENCY_CACHE_ALIAS cache, claimed with `cache.add`. Keys need no
+    purge, but a cache that is not shared by all workers (e.g. the default LocMemCache) only
+    deduplicates retries reaching the same worker, and evicted keys are forgotten early.
+    """
+
+    def get_cache(self):
+        return caches[getattr(settings, "IDEMPOTENCY_CACHE_ALIAS", "default")]
+
+    def cache_key(self, scope, key):
+        return f"idempotency:{scope}:{key}"
+
+    def claim(self, scope, key, fingerprint, timeout):
+        record = {"fingerprint": fingerprint, "status_code": None}
+        cache_key = self.cache_key(scope, key)
+        cache = self.get_cache()
+        if cache.add(cache_key, record, timeout=timeout):
+            return None
+        return cache.get(cache_key) or self.claim(scope, key, fingerprint, timeout)
+
+    def get(self, scope, key):
+        return self.get_cache().get(self.cache_key(scope, key))
+
+    def complete(self, scope, key, status_code, content, content_type, timeout):
+        cache_key = self.cache_key(scope, key)
+        cache = self.get_cache()
+        record = cache.get(cache_key) or {}
+        cache.set(
+            cache_key,
+            {
+                "fingerprint": record.get("fingerprint"),
+                "status_code": status_code,
+                "content": content,
+                "content_type": content_type,
+            },
+            timeout=timeout,
+        )
+
+    def release(self, scope, key):
+        self.get_cache().delete(self.cache_key(scope, key))
+
+
+@lru_cache(maxsize=None)
+def _load_backend(path):
+    return import_string(path)()
+
+
+def get_idempotency_backend():
+    """
+    Return the backend configured by the IDEMPOTENCY_BACKEND setting (default
+    DatabaseIdempotencyBackend).
+    """
+
+    return _load_backend(
+        getattr(
+            settings,
+            "IDEMPOTENCY_BACKEND",
+            "idempotency.backends.DatabaseIdempotencyBackend",
+        )
+    )
@@ -0,0 +1,120 @@
+import functools
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.response import Response
+
+from .backends import get_idempotency_backend
+
+HEADER = "Idempotency-Key"
+
+
+def idempotent(action):
+    """
+    Honor the Idempotency-Key header on a viewset action that creates something.
+
+    The first request with a key runs the action; its response, unless the action raised or
+    answered a server error, is stored for IDEMPOTENCY_TTL seconds and replayed, marked `Idempotent-Replayed: true`, to
+    retries with the same key. A retry arriving while the first request is still in flight
+    waits up to IDEMPOTENCY_WAIT_SECONDS for its response instead of running the action again.
+    Keys are scoped to the user. Requests without the header are unaffected.
+
+    Responses:
+    - If the key was used with another request: HTTP 422 Unprocessable Entity.
+    - If the first request is still in flight after the wait: HTTP 409 Conflict.
+    - If the key is longer than 255 characters: HTTP 400 Bad Request.
+
+    Args:
+        action (function): The viewset method.
+
+    Returns:
+        function: The wrapped method.
+    """
+
+    @functools.wraps(action)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return action(self, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response(
+                {"detail": f"{HEADER} must be at most 255 characters."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        backend = get_idempotency_backend()
+        scope = str(request.user.pk)
+        fingerprint = request_fingerprint(request)
+        lock_timeout = getattr(settings, "IDEMPOTENCY_LOCK_SECONDS", 60)
+        deadline = time.monotonic() + getattr(settings, "IDEMPOTENCY_WAIT_SECONDS", 10)
+        record = backend.claim(scope, key, fingerprint, lock_timeout)
+        while record is not None:
+            if record["fingerprint"] != fingerprint:
+                return Response(
+                    {"detail": f"{HEADER} was already used with another request."},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+            if record["status_code"] is not None:
+                return replay(record)
+            if time.monotonic() >= deadline:
+                return Response(
+                    {"detail": f"A request with this {HEADER} is in progress."},
+                    status=status.HTTP_409_CONFLICT,
+                    headers={"Retry-After": "1"},
+                )
+            time.sleep(getattr(settings, "IDEMPOTENCY_POLL_INTERVAL", 0.05))
+            # Polled without writing; the key is claimed again if the request failed.
+            record = backend.get(scope, key) or backend.claim(
+                scope, key, fingerprint, lock_timeout
+            )
+
+        try:
+            response = action(self, request, *args, **kwargs)
+            response = self.finalize_response(request, response, *args, **kwargs)
+            if hasattr(response, "render"):
+                response.render()
+        except BaseException:
+            backend.release(scope, key)
+            raise
+        if response.status_code >= 500:
+            backend.release(scope, key)
+        else:
+            backend.complete(
+                scope,
+                key,
+                response.status_code,
+                response.content,
+                response.get("Content-Type", ""),
+                getattr(settings, "IDEMPOTENCY_TTL", 24 * 60 * 60),
+            )
+        return response
+
+    return wrapper
+
+
+def request_fingerprint(request):
+    """
+    Hash the method, path and parsed body of a request.
+    """
+
+    data = request.data
+    if hasattr(data, "lists"):
+        data = dict(data.lists())
+    payload = json.dumps(
+        [request.method, request.get_full_path(), data], sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def replay(record):
+    response = HttpResponse(
+        record["content"],
+        status=record["status_code"],
+        content_type=record["content_type"] or None,
+    )
+    response["Idempotent-Replayed"] = "true"
+    return response
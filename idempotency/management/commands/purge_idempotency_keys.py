@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from idempotency.backends import get_idempotency_backend
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the idempotency keys past their replay window, e.g. from cron every hour. "
+        "Cache-backed keys expire on their own."
+    )
+
+    def handle(self, *args, **options):
+        deleted = get_idempotency_backend().purge_expired()
+        self.stdout.write(f"Deleted {deleted} expired idempotency keys.")
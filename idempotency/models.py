@@ -0,0 +1,39 @@
+from django.db import models
+
+
+class IdempotencyKey(models.Model):
+    """
+    A request made with an Idempotency-Key header, and the response replayed to its retries.
+
+    Attributes:
+        scope (str): The namespace of the key, the user who sent it.
+        key (str): The client's Idempotency-Key.
+        fingerprint (str): A hash of the request the key was first used with.
+        status_code (int): The stored response's status, or None while the request is in flight.
+        content (bytes): The stored response's body.
+        content_type (str): The stored response's Content-Type.
+        created_at (datetime): When the key was first used.
+        expires_at (datetime): When the key may be reused: the end of the in-flight lock, then
+            of the replay window.
+    """
+
+    scope = models.CharField(max_length=100)
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    content = models.BinaryField(default=b"")
+    content_type = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.scope}:{self.key}"
+
+    class Meta:
+        verbose_name = "Idempotency key"
+        verbose_name_plural = "Idempotency keys"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["scope", "key"], name="unique_idempotency_scope_key"
+            )
+        ]
@@ -0,0 +1,204 @@
+import io
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from cart.models import Cart, CartItem, CartItemQuerySet
+from orders.models import OrderModel
+from products.models import ProductModel
+from .backends import DatabaseIdempotencyBackend
+from .models import IdempotencyKey
+
+ADDRESS = {
+    "country": "EG",
+    "city": "Cairo",
+    "state": "Cairo",
+    "street": "Tahrir",
+    "phone": "0100",
+}
+
+
+class IdempotencyKeyTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="buyer")
+        self.product = ProductModel.objects.create(name="Mug", price=Decimal("3.00"))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add(self, key, quantity=1):
+        return self.client.post(
+            reverse("cart:add_to_cart", kwargs={"user_id": self.user.id}),
+            {"product": self.product.pk, "quantity": quantity},
+            headers={"Idempotency-Key": key} if key else {},
+        )
+
+    def checkout(self, key):
+        return self.client.post(
+            reverse("orders:order-create", kwargs={"user_id": self.user.id}),
+            ADDRESS,
+            headers={"Idempotency-Key": key},
+        )
+
+    def quantity(self):
+        return CartItem.objects.get(product=self.product).quantity
+
+    def test_retry_replays_the_first_response(self):
+        first = self.add("a1")
+        retry = self.add("a1")
+        self.assertEqual(retry.status_code, first.status_code)
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(retry["Content-Type"], first["Content-Type"])
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertFalse(first.has_header("Idempotent-Replayed"))
+        self.assertEqual(self.quantity(), 1)
+
+        self.add("a2")
+        self.add(None)
+        self.assertEqual(self.quantity(), 3)
+
+    def test_key_reused_with_another_request(self):
+        self.add("a1")
+        self.assertEqual(self.add("a1", quantity=2).status_code, 422)
+        self.assertEqual(self.quantity(), 1)
+
+    def test_keys_are_scoped_to_the_user(self):
+        self.add("a1")
+        other = User.objects.create(username="other")
+        self.client.force_authenticate(other)
+        response = self.client.post(
+            reverse("cart:add_to_cart", kwargs={"user_id": other.id}),
+            {"product": self.product.pk, "quantity": 1},
+            headers={"Idempotency-Key": "a1"},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("Idempotent-Replayed"))
+
+    def test_checkout_is_placed_once(self):
+        self.add(None, quantity=2)
+        first = self.checkout("c1")
+        self.assertEqual(first.status_code, 201)
+        retry = self.checkout("c1")
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(OrderModel.objects.count(), 1)
+
+    def test_failed_request_frees_its_key(self):
+        # Checking out an empty cart raises a validation error.
+        self.assertEqual(self.checkout("c1").status_code, 400)
+        self.add(None)
+        self.assertEqual(self.checkout("c1").status_code, 201)
+
+    def test_lapsed_keys_are_reused_and_purged(self):
+        self.add("a1")
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertFalse(self.add("a1").has_header("Idempotent-Replayed"))
+        self.assertEqual(self.quantity(), 2)
+
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        out = io.StringIO()
+        call_command("purge_idempotency_keys", stdout=out)
+        self.assertIn("Deleted 1 ", out.getvalue())
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_lost_takeover_returns_the_winners_record(self):
+        backend = DatabaseIdempotencyBackend()
+        self.assertIsNone(backend.claim("s", "k1", "first", 0))
+        now = timezone.now()
+        # Other requests claim the key each time a lapsed row is deleted; the first two claims
+        # lapse in turn, the third is in flight.
+        expiries = iter([now, now, now + timedelta(seconds=60)])
+        delete = QuerySet.delete
+
+        def delete_then_claim(queryset):
+            result = delete(queryset)
+            IdempotencyKey.objects.create(
+                scope="s", key="k1", fingerprint="other", expires_at=next(expiries)
+            )
+            return result
+
+        with mock.patch.object(QuerySet, "delete", delete_then_claim):
+            record = backend.claim("s", "k1", "mine", 60)
+        self.assertEqual(record["fingerprint"], "other")
+        self.assertIsNone(record["status_code"])
+        self.assertEqual(IdempotencyKey.objects.get().fingerprint, "other")
+
+    @override_settings(
+        IDEMPOTENCY_BACKEND="idempotency.backends.CacheIdempotencyBackend"
+    )
+    def test_cache_backend(self):
+        caches["default"].clear()
+        first = self.add("a1")
+        retry = self.add("a1")
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(self.add("a1", quantity=2).status_code, 422)
+        self.assertEqual(self.quantity(), 1)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+
+class ConcurrentRetryTests(TransactionTestCase):
+    """
+    Retries racing the first request wait for its response instead of running again.
+    """
+
+    retries = 8
+
+    def test_in_flight_duplicates_wait(self):
+        user = User.objects.create(username="buyer")
+        product = ProductModel.objects.create(name="Mug", price=Decimal("3.00"))
+        url = reverse("cart:add_to_cart", kwargs={"user_id": user.id})
+        start = threading.Barrier(self.retries)
+        responses = []
+        add = CartItemQuerySet.add
+
+        def slow_add(self, *args, **kwargs):
+            time.sleep(0.2)
+            return add(self, *args, **kwargs)
+
+        def retry():
+            client = APIClient()
+            client.force_authenticate(user)
+            try:
+                start.wait()
+                responses.append(
+                    client.post(
+                        url,
+                        {"product": product.pk, "quantity": 1},
+                        headers={"Idempotency-Key": "k"},
+                    )
+                )
+            except Exception as exc:
+                responses.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=retry) for _ in range(self.retries)]
+        with mock.patch.object(CartItemQuerySet, "add", slow_add):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(
+            [response.status_code for response in responses], [200] * self.retries
+        )
+        self.assertEqual(len({response.content for response in responses}), 1)
+        self.assertEqual(
+            sum(response.has_header("Idempotent-Replayed") for response in responses),
+            self.retries - 1,
+        )
+        self.assertEqual(
+            CartItem.objects.get(cart=Cart.objects.for_user(user)).quantity, 1
+        )
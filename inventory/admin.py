@@ -0,0 +1,35 @@
+from django.contrib import admin
+
+from .models import Reservation, Stock
+
+
+@admin.register(Stock)
+class StockAdmin(admin.ModelAdmin):
+    """
+    Admin interface configuration for the Stock model.
+
+    List Display:
+        product: The product.
+        shard: The shard of the product's stock held by the row.
+        quantity: The units held by the row.
+    """
+
+    list_display = ["product", "shard", "quantity"]
+    list_select_related = ["product"]
+    ordering = ["product", "shard"]
+
+
+@admin.register(Reservation)
+class ReservationAdmin(admin.ModelAdmin):
+    """
+    Admin interface configuration for the Reservation model.
+
+    List Display:
+        user: The user the units are held for.
+        product: The product.
+        quantity: The units held.
+        expires_at: When the units return to stock.
+    """
+
+    list_display = ["user", "product", "quantity", "expires_at"]
+    list_select_related = ["user", "product"]
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from inventory.models import Reservation
+
+
+class Command(BaseCommand):
+    help = (
+        "Return the stock of expired checkout reservations, e.g. from cron every minute. "
+        "Checkouts short of stock also release the expired reservations of their products."
+    )
+
+    def handle(self, *args, **options):
+        released = Reservation.objects.release_expired()
+        self.stdout.write(
+            f"Released {sum(released.values())} units of {len(released)} products."
+        )
@@ -0,0 +1,292 @@
+from django.contrib.auth.models import User
+from django.db import connections, models, router, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from products.models import ProductModel
+
+
+def _names(queryset, fields):
+    connection = connections[queryset._db or router.db_for_write(queryset.model)]
+    opts = queryset.model._meta
+    names = {
+        name: connection.ops.quote_name(opts.get_field(name).column) for name in fields
+    }
+    names["table"] = connection.ops.quote_name(opts.db_table)
+    return connection, names
+
+
+def _case(column, values):
+    # CASE mapping the products of `values` to their quantity, and its parameters.
+    sql = f"CASE {column} " + " ".join(["WHEN %s THEN %s"] * len(values)) + " END"
+    return sql, [value for item in values.items() for value in item]
+
+
+class StockQuerySet(models.QuerySet):
+    def decrement(self, quantities):
+        """
+        Take units of several products in a single conditional UPDATE.
+
+        Each product takes its units from one of its stock rows (shards) holding enough of them,
+        picked at random, and only while that row still holds enough when it is updated: no
+        product's stock ever goes below zero, whatever the concurrency, and contention on a
+        product is spread over its shards.
+
+        Args:
+            quantities (dict): Maps product ids to the number of units to take.
+
+        Returns:
+            set: The ids of the products whose units were taken. The others lack stock, have
+            it spread over several shards, or lost a race for it.
+        """
+
+        if not quantities:
+            return set()
+
+        connection, names = _names(self, ("id", "product", "quantity"))
+        case, case_params = _case(names["product"], quantities)
+        sql = (
+            "UPDATE {table} SET {quantity} = {quantity} - " + case + " WHERE {id} IN ("
+            "SELECT (SELECT shard.{id} FROM {table} shard "
+            "WHERE shard.{product} = wanted.column1 AND shard.{quantity} >= wanted.column2 "
+            "ORDER BY RANDOM() LIMIT 1) "
+            "FROM (VALUES " + ", ".join(["(%s, %s)"] * len(quantities)) + ") wanted"
+            ") AND {quantity} >= " + case + " RETURNING {product}"
+        ).format(**names)
+        params = [
+            *case_params,
+            *(value for item in quantities.items() for value in item),
+            *case_params,
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return {product for (product,) in cursor.fetchall()}
+
+    def restock(self, quantities):
+        """
+        Return units of several products to stock, spread evenly over their shards, in a single
+        UPDATE.
+
+        Each product's units are split like `set_stock` splits them: every shard gets the same
+        share, and the remainder goes one unit each to its first shards.
+
+        Args:
+            quantities (dict): Maps product ids to the number of units to return.
+        """
+
+        if not quantities:
+            return
+
+        connection, names = _names(self, ("product", "shard", "quantity"))
+        case, case_params = _case(names["product"], quantities)
+        # The number of shards of the updated row's product, and the row's rank among them.
+        count = (
+            "(SELECT COUNT(*) FROM {table} sibling "
+            "WHERE sibling.{product} = {table}.{product})"
+        )
+        rank = (
+            "(SELECT COUNT(*) FROM {table} sibling "
+            "WHERE sibling.{product} = {table}.{product} AND sibling.{shard} < {table}.{shard})"
+        )
+        sql = (
+            "UPDATE {table} SET {quantity} = {quantity} + ("
+            + case
+            + ") / "
+            + count
+            + " + CASE WHEN "
+            + rank
+            + " < ("
+            + case
+            + ") %% "
+            + count
+            + " THEN 1 ELSE 0 END "
+            "WHERE {product} IN (" + ", ".join(["%s"] * len(quantities)) + ")"
+        ).format(**names)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [*case_params, *case_params, *quantities])
+
+    def available(self, products):
+        """
+        Return the units in stock of several products, over all their shards.
+
+        Args:
+            products (iterable): The product ids.
+
+        Returns:
+            dict: Maps the tracked products among them to their units in stock.
+        """
+
+        return dict(
+            self.filter(product__in=products)
+            .values("product")
+            .annotate(total=Sum("quantity"))
+            .values_list("product", "total")
+        )
+
+    def rebalance(self, quantities):
+        """
+        Take units of several products whose shards each hold too few of them, then spread the
+        rest of their stock evenly over their shards again.
+
+        An order for more units than any single shard holds cannot be served by `decrement`.
+        This locks the product's shards, takes the units from their total, and splits what
+        remains as `set_stock` does, so that later decrements keep spreading over the shards.
+
+        Args:
+            quantities (dict): Maps product ids to the number of units to take.
+
+        Returns:
+            set: The ids of the products whose units were taken; the others lack stock.
+        """
+
+        taken = set()
+        with transaction.atomic(using=self.db):
+            rows = list(
+                self.select_for_update()
+                .filter(product__in=quantities)
+                .order_by("product", "shard")
+            )
+            shards = {}
+            for row in rows:
+                shards.setdefault(row.product_id, []).append(row)
+            for product, product_shards in shards.items():
+                total = sum(shard.quantity for shard in product_shards)
+                if total >= quantities[product]:
+                    total -= quantities[product]
+                    taken.add(product)
+                share, extra = divmod(total, len(product_shards))
+                for index, shard in enumerate(product_shards):
+                    shard.quantity = share + (1 if index < extra else 0)
+            self.bulk_update(rows, ["quantity"])
+        return taken
+
+    def set_stock(self, product, quantity, shards=1):
+        """
+        Set the units in stock of a product, split evenly over `shards` rows.
+
+        Hot products are sharded so that concurrent checkouts update different rows instead
+        of queueing on a single row's lock.
+
+        Args:
+            product (ProductModel | int): The product, or its primary key.
+            quantity (int): The units in stock.
+            shards (int): The number of rows the stock is split over.
+        """
+
+        product_id = getattr(product, "pk", product)
+        share, extra = divmod(quantity, shards)
+        with transaction.atomic(using=self.db):
+            self.filter(product=product_id).delete()
+            self.bulk_create(
+                self.model(
+                    product_id=product_id,
+                    shard=shard,
+                    quantity=share + (1 if shard < extra else 0),
+                )
+                for shard in range(shards)
+            )
+
+
+class Stock(models.Model):
+    """
+    Units in stock of a product, held in one row or sharded over several.
+
+    Products without stock rows are not stock-managed: they are never out of stock.
+
+    Attributes:
+        product (ProductModel): The product.
+        shard (int): The shard number, 0 for a product whose stock is not sharded.
+        quantity (int): The units held by the shard, not reserved and not sold.
+    """
+
+    product = models.ForeignKey(
+        ProductModel, on_delete=models.CASCADE, related_name="stock"
+    )
+    shard = models.PositiveSmallIntegerField(default=0)
+    quantity = models.PositiveIntegerField(default=0)
+
+    objects = StockQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.quantity} of {self.product_id} (shard {self.shard})"
+
+    class Meta:
+        verbose_name = "Stock"
+        verbose_name_plural = "Stock"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "shard"], name="unique_stock_product_shard"
+            )
+        ]
+
+
+class ReservationQuerySet(models.QuerySet):
+    def take(self, **filters):
+        """
+        Delete the matching reservations in a single statement, returning their units.
+
+        A reservation is returned by exactly one of concurrent callers, so its units are never
+        released or consumed twice.
+
+        Returns:
+            dict: Maps product ids to the units of the deleted reservations.
+        """
+
+        queryset = self.filter(**filters)
+        connection, names = _names(queryset, ("id", "product", "quantity"))
+        where, params = queryset.values("pk").query.sql_with_params()
+        # The subquery is not formatted: its literals may contain braces.
+        sql = (
+            "DELETE FROM {table} WHERE {id} IN (".format(**names)
+            + where
+            + ") RETURNING {product}, {quantity}".format(**names)
+        )
+        units = {}
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            for product, quantity in cursor.fetchall():
+                units[product] = units.get(product, 0) + quantity
+        return units
+
+    def release_expired(self, products=None):
+        """
+        Return the units of expired reservations to stock.
+
+        Args:
+            products (iterable): Only release the reservations of these product ids.
+
+        Returns:
+            dict: Maps product ids to the units returned.
+        """
+
+        filters = {"expires_at__lte": timezone.now()}
+        if products is not None:
+            filters["product__in"] = products
+        with transaction.atomic(using=self.db):
+            units = self.take(**filters)
+            Stock.objects.restock(units)
+        return units
+
+
+class Reservation(models.Model):
+    """
+    Units of a product held for a user's checkout, taken from stock until they are consumed
+    by an order or released after `expires_at`.
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="reservations"
+    )
+    product = models.ForeignKey(ProductModel, on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    objects = ReservationQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.quantity} of {self.product_id} for {self.user_id}"
+
+    class Meta:
+        verbose_name = "Reservation"
+        verbose_name_plural = "Reservations"
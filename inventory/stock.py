@@ -0,0 +1,153 @@
+"""
+Stock allocation for checkouts.
+
+Stock is taken with conditional UPDATEs (see `StockQuerySet.decrement`), never read then
+written, so concurrent checkouts of the last units cannot oversell them and do not hold row
+locks while computing. A checkout first uses the units its user reserved (see `reserve`), then
+takes the rest from stock.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Reservation, Stock
+
+# Decrements retried after losing races for a product's units.
+DECREMENT_ATTEMPTS = 3
+
+
+class InsufficientStock(Exception):
+    """
+    Raised when products lack the units asked for.
+
+    Attributes:
+        products (list): The ids of the products out of stock.
+    """
+
+    def __init__(self, products):
+        self.products = sorted(products)
+        super().__init__(f"Insufficient stock for products {self.products}")
+
+
+def take(quantities):
+    """
+    Take units of several products from stock, all or none.
+
+    The common case is a single UPDATE. Products it could not serve are then looked at: their
+    expired reservations are released, and those with enough stock spread over several shards
+    are taken from all of their shards at once (see `StockQuerySet.rebalance`).
+
+    Args:
+        quantities (dict): Maps product ids to the number of units to take.
+
+    Raises:
+        InsufficientStock: If a stock-managed product lacks the units; nothing is taken.
+    """
+
+    with transaction.atomic():
+        pending = dict(quantities)
+        for attempt in range(DECREMENT_ATTEMPTS):
+            for product in Stock.objects.decrement(pending):
+                del pending[product]
+            if not pending:
+                return
+
+            available = Stock.objects.available(pending)
+            # Products without stock rows are not stock-managed.
+            pending = {
+                product: quantity
+                for product, quantity in pending.items()
+                if product in available
+            }
+            if attempt == 0:
+                short = [
+                    product
+                    for product in pending
+                    if available[product] < pending[product]
+                ]
+                released = Reservation.objects.release_expired(short) if short else {}
+                for product, units in released.items():
+                    available[product] += units
+            short = [
+                product for product in pending if available[product] < pending[product]
+            ]
+            if short:
+                raise InsufficientStock(short)
+            if not pending:
+                return
+            for product in Stock.objects.rebalance(pending):
+                del pending[product]
+            if not pending:
+                return
+        raise InsufficientStock(pending)
+
+
+def reserve(user, quantities, seconds=None):
+    """
+    Hold units of several products for the user's checkout, in place of the units they held.
+
+    Args:
+        user (User | int): The user, or their primary key.
+        quantities (dict): Maps product ids to the number of units to hold.
+        seconds (int): How long the units are held (default INVENTORY_RESERVATION_SECONDS).
+
+    Returns:
+        datetime: When the reservation expires.
+
+    Raises:
+        InsufficientStock: If a stock-managed product lacks the units; the user's previous
+        reservation is kept.
+    """
+
+    if seconds is None:
+        seconds = getattr(settings, "INVENTORY_RESERVATION_SECONDS", 15 * 60)
+    expires_at = timezone.now() + timedelta(seconds=seconds)
+    with transaction.atomic():
+        Stock.objects.restock(Reservation.objects.take(user=user))
+        take(quantities)
+        tracked = Stock.objects.filter(product__in=quantities).values_list(
+            "product", flat=True
+        )
+        Reservation.objects.bulk_create(
+            Reservation(
+                user_id=getattr(user, "pk", user),
+                product_id=product,
+                quantity=quantities[product],
+                expires_at=expires_at,
+            )
+            for product in set(tracked)
+        )
+    return expires_at
+
+
+def allocate(user, quantities):
+    """
+    Allocate the units of a checkout: the user's reservation is consumed, its units beyond
+    the checkout's are returned to stock, and the units it lacks are taken from stock.
+
+    Args:
+        user (User | int): The user checking out, or their primary key.
+        quantities (dict): Maps product ids to the number of units bought.
+
+    Raises:
+        InsufficientStock: If a stock-managed product lacks the units; nothing is allocated.
+    """
+
+    with transaction.atomic():
+        reserved = Reservation.objects.take(user=user)
+        surplus = {
+            product: units - quantities.get(product, 0)
+            for product, units in reserved.items()
+            if units > quantities.get(product, 0)
+        }
+        Stock.objects.restock(surplus)
+        take(
+            {
+                product: quantity - reserved.get(product, 0)
+                for product, quantity in quantities.items()
+                if quantity > reserved.get(product, 0)
+            }
+        )
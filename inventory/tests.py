@@ -0,0 +1,213 @@
+import io
+import threading
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from cart.models import Cart, CartItem
+from orders.models import OrderItemModel, OrderModel
+from products.models import ProductModel
+from .models import Reservation, Stock
+from .stock import InsufficientStock, allocate, take
+
+ADDRESS = {
+    "country": "EG",
+    "city": "Cairo",
+    "state": "Cairo",
+    "street": "Tahrir",
+    "phone": "0100",
+}
+
+
+def stock_of(product):
+    return list(
+        Stock.objects.filter(product=product)
+        .order_by("shard")
+        .values_list("quantity", flat=True)
+    )
+
+
+class StockTests(TestCase):
+    def setUp(self):
+        self.mug, self.cup, self.pen = ProductModel.objects.bulk_create(
+            ProductModel(name=name, price=Decimal("1.00"))
+            for name in ("Mug", "Cup", "Pen")
+        )
+        Stock.objects.set_stock(self.mug, 5)
+        Stock.objects.set_stock(self.cup, 2)
+
+    def test_take_is_all_or_none(self):
+        take({self.mug.pk: 3, self.cup.pk: 2})
+        self.assertEqual((stock_of(self.mug), stock_of(self.cup)), ([2], [0]))
+
+        with self.assertRaises(InsufficientStock) as raised:
+            take({self.mug.pk: 1, self.cup.pk: 1})
+        self.assertEqual(raised.exception.products, [self.cup.pk])
+        self.assertEqual((stock_of(self.mug), stock_of(self.cup)), ([2], [0]))
+
+    def test_products_without_stock_are_not_managed(self):
+        take({self.pen.pk: 100, self.mug.pk: 1})
+        self.assertEqual(stock_of(self.mug), [4])
+        self.assertFalse(Stock.objects.filter(product=self.pen).exists())
+
+    def test_single_update(self):
+        with self.assertNumQueries(1):
+            Stock.objects.decrement({self.mug.pk: 1, self.cup.pk: 1})
+
+    def test_sharded_stock(self):
+        Stock.objects.set_stock(self.mug, 10, shards=4)
+        self.assertEqual(stock_of(self.mug), [3, 3, 2, 2])
+        for _ in range(4):
+            take({self.mug.pk: 1})
+        self.assertEqual(sum(stock_of(self.mug)), 6)
+
+        # More units than any shard holds are taken from all of them, the rest spread again.
+        take({self.mug.pk: 5})
+        self.assertEqual(stock_of(self.mug), [1, 0, 0, 0])
+        with self.assertRaises(InsufficientStock):
+            take({self.mug.pk: 2})
+
+    def test_units_stay_spread_over_the_shards(self):
+        Stock.objects.set_stock(self.mug, 20, shards=4)
+        take({self.mug.pk: 7})
+        self.assertEqual(stock_of(self.mug), [4, 3, 3, 3])
+
+        with self.assertNumQueries(1):
+            Stock.objects.restock({self.mug.pk: 6, self.cup.pk: 1})
+        self.assertEqual(stock_of(self.mug), [6, 5, 4, 4])
+        self.assertEqual(stock_of(self.cup), [3])
+
+
+class ReservationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="buyer")
+        self.product = ProductModel.objects.create(name="Mug", price=Decimal("4.00"))
+        Stock.objects.set_stock(self.product, 3)
+        CartItem.objects.add(Cart.objects.for_user(self.user), self.product, 2)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def reserve(self):
+        return self.client.post(
+            reverse("cart:reserve_cart", kwargs={"user_id": self.user.id})
+        )
+
+    def checkout(self, user):
+        self.client.force_authenticate(user)
+        return self.client.post(
+            reverse("orders:order-create", kwargs={"user_id": user.id}), ADDRESS
+        )
+
+    def test_reserved_units_are_held_for_the_checkout(self):
+        self.assertEqual(self.reserve().status_code, 200)
+        # Reserving again replaces the previous reservation.
+        self.assertEqual(self.reserve().status_code, 200)
+        self.assertEqual(stock_of(self.product), [1])
+        self.assertEqual(Reservation.objects.get().quantity, 2)
+
+        other = User.objects.create(username="other")
+        CartItem.objects.add(Cart.objects.for_user(other), self.product, 2)
+        self.assertEqual(self.checkout(other).status_code, 400)
+
+        self.assertEqual(self.checkout(self.user).status_code, 201)
+        self.assertEqual(stock_of(self.product), [1])
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_other_users_cannot_reserve(self):
+        self.client.force_authenticate(User.objects.create(username="other"))
+        self.assertEqual(self.reserve().status_code, 403)
+        self.assertEqual(stock_of(self.product), [3])
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_checkout_returns_the_unused_reserved_units(self):
+        self.reserve()
+        CartItem.objects.filter(product=self.product).update(quantity=1)
+        allocate(self.user, {self.product.pk: 1})
+        self.assertEqual(stock_of(self.product), [2])
+
+    def test_expired_reservations_are_released(self):
+        self.reserve()
+        Reservation.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        call_command("release_reservations", stdout=io.StringIO())
+        self.assertEqual(stock_of(self.product), [3])
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_short_checkout_releases_expired_reservations(self):
+        self.reserve()
+        Reservation.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        other = User.objects.create(username="other")
+        CartItem.objects.add(Cart.objects.for_user(other), self.product, 3)
+        self.assertEqual(self.checkout(other).status_code, 201)
+        self.assertEqual(stock_of(self.product), [0])
+
+    def test_out_of_stock_checkout_is_rejected(self):
+        CartItem.objects.filter(product=self.product).update(quantity=4)
+        response = self.checkout(self.user)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data, {"products": [f"Out of stock: {self.product.pk}"]}
+        )
+        self.assertFalse(OrderModel.objects.exists())
+        self.assertEqual(stock_of(self.product), [3])
+        self.assertEqual(Cart.objects.for_user(self.user).items.count(), 1)
+
+
+class ConcurrentCheckoutTests(TransactionTestCase):
+    """
+    Buyers racing for the last units never oversell them.
+    """
+
+    buyers = 24
+    units = 10
+
+    def race(self, shards=1):
+        product = ProductModel.objects.create(name="Mug", price=Decimal("5.00"))
+        Stock.objects.set_stock(product, self.units, shards=shards)
+        users = []
+        for i in range(self.buyers):
+            user = User.objects.create(username=f"buyer-{i}")
+            CartItem.objects.add(Cart.objects.for_user(user), product, 1)
+            users.append(user)
+        start = threading.Barrier(self.buyers)
+        statuses = []
+
+        def buy(user):
+            client = APIClient()
+            client.force_authenticate(user)
+            try:
+                start.wait()
+                response = client.post(
+                    reverse("orders:order-create", kwargs={"user_id": user.id}),
+                    ADDRESS,
+                )
+                statuses.append(response.status_code)
+            except Exception as exc:
+                statuses.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=buy, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(statuses.count(201), self.units)
+        self.assertEqual(statuses.count(400), self.buyers - self.units)
+        self.assertEqual(
+            OrderItemModel.objects.filter(product=product).count(), self.units
+        )
+        self.assertEqual(sum(stock_of(product)), 0)
+
+    def test_no_oversell(self):
+        self.race()
+
+    def test_no_oversell_sharded(self):
+        self.race(shards=4)
@@ -0,0 +1,25 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """
+    Admin interface configuration for the Job model.
+
+    List Display:
+        name: The job function.
+        status: Queued, running or failed.
+        attempts: The attempts made so far.
+        run_at: When the job is due.
+        locked_by: The worker running the job.
+
+    List Filter:
+        status: Filter jobs by status, e.g. to inspect the failed ones.
+        name: Filter jobs by function.
+    """
+
+    list_display = ["name", "status", "attempts", "run_at", "locked_by"]
+    list_filter = ["status", "name"]
+    readonly_fields = ["last_error"]
@@ -0,0 +1,67 @@
+import multiprocessing
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from jobs.queue import run_worker
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the background job workers. Each process claims due jobs from the job table in "
+        "batches and runs them; stop with SIGINT/SIGTERM."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes", type=int, default=1, help="Worker processes to start."
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=10, help="Jobs claimed per query."
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds a worker sleeps while no job is due.",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once no job is due, e.g. for tests or cron.",
+        )
+
+    def handle(self, *args, **options):
+        worker_options = {
+            "batch_size": options["batch_size"],
+            "poll_interval": options["poll_interval"],
+            "burst": options["burst"],
+        }
+        if options["processes"] == 1:
+            stop = threading.Event()
+            signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+            stats = run_worker(stop=stop, **worker_options)
+            self.stdout.write(f"Worker stopped: {stats}")
+            return
+
+        # Forked processes must not share the parent's database connections.
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        stop = context.Event()
+        processes = [
+            context.Process(target=run_worker, kwargs={"stop": stop, **worker_options})
+            for _ in range(options["processes"])
+        ]
+        for process in processes:
+            process.start()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            stop.set()
+            for process in processes:
+                process.join()
+        self.stdout.write(f"{len(processes)} workers stopped.")
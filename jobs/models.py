@@ -0,0 +1,145 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, models, router
+from django.utils import timezone
+
+
+class JobQuerySet(models.QuerySet):
+    def claim(self, worker, limit):
+        """
+        Mark up to `limit` due jobs as running for `worker`, in a single UPDATE.
+
+        Due jobs are the queued ones whose `run_at` has passed, oldest first, and the running
+        ones whose worker has held them for JOBS_LOCK_TIMEOUT seconds (default 300), presumably
+        because it died. A job is claimed by a single worker: the status is re-checked on the
+        updated row, and on databases that support it the candidates are selected with
+        `FOR UPDATE SKIP LOCKED`, so that workers do not queue on each other's rows.
+
+        Args:
+            worker (str): The name of the claiming worker.
+            limit (int): The maximum number of jobs claimed.
+
+        Returns:
+            list: The claimed jobs, as unsaved Job instances.
+        """
+
+        connection = connections[self._db or router.db_for_write(self.model)]
+        opts = self.model._meta
+        names = {
+            name: connection.ops.quote_name(opts.get_field(name).column)
+            for name in (
+                "id",
+                "name",
+                "args",
+                "kwargs",
+                "status",
+                "attempts",
+                "max_attempts",
+                "run_at",
+                "locked_by",
+                "locked_at",
+            )
+        }
+        names["table"] = connection.ops.quote_name(opts.db_table)
+        now = timezone.now()
+        stale = now - timedelta(seconds=getattr(settings, "JOBS_LOCK_TIMEOUT", 300))
+        due = (
+            "({status} = %s AND {run_at} <= %s) OR ({status} = %s AND {locked_at} < %s)"
+        ).format(**names)
+        adapt = connection.ops.adapt_datetimefield_value
+        due_params = [Job.QUEUED, adapt(now), Job.RUNNING, adapt(stale)]
+        skip_locked = (
+            " FOR UPDATE SKIP LOCKED"
+            if connection.features.has_select_for_update_skip_locked
+            else ""
+        )
+        sql = (
+            "UPDATE {table} SET {status} = %s, {locked_by} = %s, {locked_at} = %s, "
+            "{attempts} = {attempts} + 1 WHERE {id} IN ("
+            "SELECT {id} FROM {table} WHERE "
+            + due
+            + " ORDER BY {run_at}, {id} LIMIT %s"
+            + skip_locked
+            + ") AND ("
+            + due
+            + ") "
+            "RETURNING {id}, {name}, {args}, {kwargs}, {attempts}, {max_attempts}"
+        ).format(**names)
+        params = [Job.RUNNING, worker, adapt(now), *due_params, limit, *due_params]
+        args_field, kwargs_field = opts.get_field("args"), opts.get_field("kwargs")
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        jobs = [
+            self.model(
+                pk=pk,
+                name=name,
+                args=args_field.from_db_value(args, None, connection),
+                kwargs=kwargs_field.from_db_value(kwargs, None, connection),
+                status=Job.RUNNING,
+                attempts=attempts,
+                max_attempts=max_attempts,
+                locked_by=worker,
+                locked_at=now,
+            )
+            for pk, name, args, kwargs, attempts, max_attempts in rows
+        ]
+        return sorted(jobs, key=lambda job: job.pk)
+
+
+class Job(models.Model):
+    """
+    A call of a registered job function, run by the workers of the `run_jobs` command.
+
+    The table is the queue and, since jobs are inserted in the transaction of the work that
+    enqueues them, its outbox too: a job only becomes visible to the workers once that
+    transaction commits, and is discarded with it on rollback. Succeeded jobs are deleted;
+    failed ones are kept for inspection.
+
+    Attributes:
+        name (str): The registered name of the job function (see `jobs.queue.job`).
+        args (list): The positional arguments of the call, JSON-serializable.
+        kwargs (dict): The keyword arguments of the call, JSON-serializable.
+        status (str): Queued, running, or failed after `max_attempts` attempts.
+        attempts (int): The number of times the job was started.
+        max_attempts (int): The number of attempts before the job is failed.
+        run_at (datetime): When the job is due: its enqueue time, or its next retry.
+        locked_by (str): The worker running the job.
+        locked_at (datetime): When the worker claimed the job.
+        last_error (str): The traceback of the last failed attempt.
+        created_at (datetime): When the job was enqueued.
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    FAILED = "failed"
+    STATUS = (
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (FAILED, "Failed"),
+    )
+
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = JobQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.name} #{self.pk}"
+
+    class Meta:
+        verbose_name = "job"
+        verbose_name_plural = "jobs"
+        indexes = [
+            models.Index(fields=["status", "run_at"], name="job_status_run_at_idx"),
+        ]
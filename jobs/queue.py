@@ -0,0 +1,159 @@
+"""
+A database-backed job queue, run by the workers of the `run_jobs` command.
+
+Job functions are registered with `@job` in the `jobs` module of an app, and enqueued with
+`<function>.enqueue(*args, **kwargs)`. A job enqueued inside a transaction is part of it: it
+only runs once the transaction commits, and never if it rolls back. Arguments must be
+JSON-serializable, typically primary keys rather than model instances.
+
+Failed jobs are retried with exponential backoff: the n-th retry waits JOBS_RETRY_BACKOFF
+seconds (default 5) times 2**(n - 1), at most JOBS_RETRY_BACKOFF_MAX (default 3600), plus up to
+10% of jitter, until the job's `max_attempts`.
+"""
+
+import logging
+import os
+import random
+import socket
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+def job(func=None, *, max_attempts=None):
+    """
+    Register a function as a job, adding `func.enqueue(*args, **kwargs)`.
+
+    Args:
+        func (function): The job function.
+        max_attempts (int): The attempts before the job is failed (default JOBS_MAX_ATTEMPTS).
+
+    Returns:
+        function: The function itself.
+    """
+
+    if func is None:
+        return lambda func: job(func, max_attempts=max_attempts)
+
+    name = f"{func.__module__}.{func.__qualname__}"
+    registry[name] = func
+
+    def enqueue(*args, delay=0, **kwargs):
+        return Job.objects.create(
+            name=name,
+            args=list(args),
+            kwargs=kwargs,
+            max_attempts=(
+                max_attempts
+                if max_attempts is not None
+                else getattr(settings, "JOBS_MAX_ATTEMPTS", 5)
+            ),
+            run_at=timezone.now() + timedelta(seconds=delay),
+        )
+
+    func.job_name = name
+    func.enqueue = enqueue
+    return func
+
+
+def retry_delay(attempts):
+    """
+    Return the seconds to wait before retrying a job that failed its `attempts`-th attempt.
+    """
+
+    base = getattr(settings, "JOBS_RETRY_BACKOFF", 5)
+    delay = min(
+        base * 2 ** (attempts - 1), getattr(settings, "JOBS_RETRY_BACKOFF_MAX", 3600)
+    )
+    return delay * (1 + random.random() / 10)
+
+
+class Worker:
+    """
+    Claims due jobs in batches and runs them, one at a time.
+
+    Attributes:
+        name (str): The worker's name, recorded on the jobs it claims.
+        batch_size (int): The jobs claimed per query.
+        poll_interval (float): Seconds slept while no job is due.
+        stats (dict): The numbers of jobs `succeeded`, `retried` and `failed`.
+    """
+
+    def __init__(self, name=None, batch_size=10, poll_interval=1.0):
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.stats = {"succeeded": 0, "retried": 0, "failed": 0}
+
+    def run(self, burst=False, stop=None):
+        """
+        Run jobs until `stop` is set, or until none is due if `burst`.
+
+        Args:
+            burst (bool): Whether to return once the queue is drained.
+            stop (threading.Event | multiprocessing.Event): Set to stop the worker.
+        """
+
+        while stop is None or not stop.is_set():
+            # Between batches as between requests, but never inside a transaction (a test's).
+            if not connection.in_atomic_block:
+                close_old_connections()
+            jobs = Job.objects.claim(self.name, self.batch_size)
+            for claimed in jobs:
+                self.execute(claimed)
+            if not jobs:
+                if burst:
+                    return
+                time.sleep(self.poll_interval)
+
+    def execute(self, claimed):
+        """
+        Run a claimed job, then delete it, schedule its retry or fail it.
+        """
+
+        func = registry.get(claimed.name)
+        try:
+            if func is None:
+                raise LookupError(f"Unknown job {claimed.name!r}")
+            if claimed.attempts > claimed.max_attempts:
+                raise RuntimeError("Abandoned by its worker too many times")
+            func(*claimed.args, **claimed.kwargs)
+        except Exception:
+            error = traceback.format_exc()
+            jobs = Job.objects.filter(pk=claimed.pk)
+            if func is not None and claimed.attempts < claimed.max_attempts:
+                self.stats["retried"] += 1
+                jobs.update(
+                    status=Job.QUEUED,
+                    run_at=timezone.now()
+                    + timedelta(seconds=retry_delay(claimed.attempts)),
+                    last_error=error,
+                )
+            else:
+                self.stats["failed"] += 1
+                logger.error("Job %s failed:\n%s", claimed, error)
+                jobs.update(status=Job.FAILED, last_error=error)
+        else:
+            self.stats["succeeded"] += 1
+            Job.objects.filter(pk=claimed.pk).delete()
+
+
+def run_worker(stop=None, **options):
+    """
+    Run a Worker, e.g. in a worker process; its options are those of Worker and `run`.
+    """
+
+    burst = options.pop("burst", False)
+    worker = Worker(**options)
+    worker.run(burst=burst, stop=stop)
+    return worker.stats
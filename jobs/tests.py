@@ -0,0 +1,162 @@
+import io
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from cart.models import Cart, CartItem
+from orders.models import OrderItemModel
+from products.models import ProductModel
+from .models import Job
+from .queue import Worker, job, retry_delay
+
+calls = []
+
+
+@job
+def record(value):
+    calls.append(value)
+
+
+@job(max_attempts=2)
+def flaky(fail_times):
+    calls.append(fail_times)
+    if len(calls) <= fail_times:
+        raise RuntimeError("flaky")
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+        self.worker = Worker(name="test")
+
+    def test_jobs_run_in_order_and_are_deleted(self):
+        for value in range(3):
+            record.enqueue(value)
+        record.enqueue(99, delay=60)
+        self.worker.run(burst=True)
+        self.assertEqual(calls, [0, 1, 2])
+        self.assertEqual(self.worker.stats["succeeded"], 3)
+        self.assertEqual(Job.objects.get().args, [99])
+
+    def test_claims_are_exclusive(self):
+        for value in range(5):
+            record.enqueue(value)
+        first = Job.objects.claim("a", 3)
+        second = Job.objects.claim("b", 3)
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 2)
+        self.assertFalse({job.pk for job in first} & {job.pk for job in second})
+        self.assertEqual(Job.objects.claim("c", 3), [])
+
+    def test_failed_job_is_retried_with_backoff(self):
+        flaky.enqueue(1)
+        self.worker.run(burst=True)
+        failed = Job.objects.get()
+        self.assertEqual((failed.status, failed.attempts), (Job.QUEUED, 1))
+        self.assertGreater(failed.run_at, timezone.now())
+        self.assertIn("RuntimeError: flaky", failed.last_error)
+
+        # Not due yet.
+        self.worker.run(burst=True)
+        self.assertEqual(calls, [1])
+
+        Job.objects.update(run_at=timezone.now())
+        self.worker.run(burst=True)
+        self.assertEqual(calls, [1, 1])
+        self.assertFalse(Job.objects.exists())
+
+    def test_job_fails_after_max_attempts(self):
+        flaky.enqueue(5)
+        for _ in range(2):
+            Job.objects.update(run_at=timezone.now())
+            self.worker.run(burst=True)
+        failed = Job.objects.get()
+        self.assertEqual((failed.status, failed.attempts), (Job.FAILED, 2))
+        self.assertEqual(self.worker.stats, {"succeeded": 0, "retried": 1, "failed": 1})
+
+    def test_unknown_job_fails(self):
+        Job.objects.create(name="jobs.tests.missing")
+        with self.assertLogs("jobs.queue", "ERROR"):
+            self.worker.run(burst=True)
+        self.assertEqual(Job.objects.get().status, Job.FAILED)
+
+    def test_abandoned_job_is_run_again(self):
+        record.enqueue(1)
+        Job.objects.claim("dead", 10)
+        self.worker.run(burst=True)
+        self.assertEqual(calls, [])
+
+        Job.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+        self.worker.run(burst=True)
+        self.assertEqual(calls, [1])
+
+    @override_settings(JOBS_RETRY_BACKOFF=2, JOBS_RETRY_BACKOFF_MAX=10)
+    def test_retry_delay(self):
+        self.assertTrue(2 <= retry_delay(1) <= 2.2)
+        self.assertTrue(8 <= retry_delay(3) <= 8.8)
+        self.assertTrue(10 <= retry_delay(8) <= 11)
+
+    def test_command(self):
+        record.enqueue(1)
+        out = io.StringIO()
+        call_command("run_jobs", burst=True, stdout=out)
+        self.assertEqual(calls, [1])
+        self.assertIn("'succeeded': 1", out.getvalue())
+
+
+class CheckoutJobsTests(TestCase):
+    """
+    Checkout side effects are enqueued in the checkout's transaction.
+    """
+
+    address = {
+        "country": "EG",
+        "city": "Cairo",
+        "state": "Cairo",
+        "street": "Tahrir",
+        "phone": "0100",
+    }
+
+    def setUp(self):
+        self.user = User.objects.create(username="buyer", email="buyer@example.com")
+        product = ProductModel.objects.create(name="Mug", price=Decimal("4.00"))
+        CartItem.objects.add(Cart.objects.for_user(self.user), product, 2)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def checkout(self):
+        return self.client.post(
+            reverse("orders:order-create", kwargs={"user_id": self.user.id}),
+            self.address,
+        )
+
+    def test_side_effects_run_in_the_background(self):
+        self.assertEqual(self.checkout().status_code, 201)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(
+            sorted(Job.objects.values_list("name", flat=True)),
+            ["orders.jobs.record_order_placed", "orders.jobs.send_order_confirmation"],
+        )
+
+        with self.assertLogs("orders.analytics", "INFO"):
+            Worker().run(burst=True)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["buyer@example.com"])
+        self.assertIn("Mug x 2", mail.outbox[0].body)
+        self.assertFalse(Job.objects.exists())
+
+    def test_rolled_back_checkout_enqueues_nothing(self):
+        with mock.patch.object(
+            OrderItemModel.objects, "bulk_create", side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                self.checkout()
+        self.assertFalse(Job.objects.exists())
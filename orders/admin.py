@@ -18,10 +18,18 @@ class OrderAdmin(admin.ModelAdmin):
     List Filter:
         - user: Filter orders by the user who placed them.
         - created_at: Filter orders by their creation date.
+        - order_status: Filter orders by their fulfilment status.
+        - payment_status: Filter orders by their payment status.
     """
 
-    list_display = ["user", "total_price", "created_at"]
-    list_filter = ["user", "created_at"]
+    list_display = [
+        "user",
+        "total_price",
+        "order_status",
+        "payment_status",
+        "created_at",
+    ]
+    list_filter = ["user", "created_at", "order_status", "payment_status"]
 
 
 @admin.register(OrderItemModel)
@@ -36,10 +44,11 @@ class OrderItemAdmin(admin.ModelAdmin):
         - order: The order to which the item belongs.
         - product: The product included in the order item.
         - quantity: The quantity of the product in the order item.
+        - unit_price: The price of the product at checkout.
 
     List Filter:
         - order: Filter order items by the order they belong to.
     """
 
-    list_display = ["order", "product", "quantity"]
+    list_display = ["order", "product", "quantity", "unit_price"]
     list_filter = ["order"]
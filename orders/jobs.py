@@ -0,0 +1,62 @@
+"""
+Checkout side effects run by the background workers (see `jobs.queue`), enqueued in the
+checkout's transaction so that they only run for committed orders.
+"""
+
+import logging
+
+from django.core.mail import send_mail
+
+from jobs.queue import job
+from .models import OrderModel
+
+analytics_logger = logging.getLogger("orders.analytics")
+
+
+@job
+def send_order_confirmation(order_id):
+    """
+    Email the user the confirmation of their order.
+
+    Args:
+        order_id (int): The primary key of the order.
+    """
+
+    order = OrderModel.objects.select_related("user").get(pk=order_id)
+    if not order.user.email:
+        return
+    lines = [
+        f"- {item.product_name} x {item.quantity}" for item in order.order_items.all()
+    ]
+    send_mail(
+        f"Order {order.pk} confirmed",
+        "\n".join(
+            [
+                f"Hello {order.user.username},",
+                "",
+                "Thank you for your order:",
+                *lines,
+                "",
+                f"Total: {order.total_price}",
+            ]
+        ),
+        None,
+        [order.user.email],
+    )
+
+
+@job
+def record_order_placed(order_id):
+    """
+    Record the placed order as an analytics event on the `orders.analytics` logger.
+
+    Args:
+        order_id (int): The primary key of the order.
+    """
+
+    order = (
+        OrderModel.objects.filter(pk=order_id)
+        .values("pk", "user_id", "total_price", "payment_method", "created_at")
+        .get()
+    )
+    analytics_logger.info("order_placed", extra={"order": order})
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from orders.models import OrderItemModel
+from products.models import ProductModel
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the product name and unit price snapshot of order items placed before checkout "
+        "recorded it, from the products' current name and price. Items are updated in chunks, "
+        "each one UPDATE in its own transaction, so memory and lock times stay bounded."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size", type=int, default=1000, help="Order items per UPDATE."
+        )
+
+    def handle(self, *args, **options):
+        missing = OrderItemModel.objects.filter(unit_price__isnull=True).order_by("pk")
+        products = ProductModel.objects.filter(pk=OuterRef("product"))
+        updated, last = 0, 0
+        while True:
+            pks = list(
+                missing.filter(pk__gt=last).values_list("pk", flat=True)[
+                    : options["chunk_size"]
+                ]
+            )
+            if not pks:
+                break
+            with transaction.atomic():
+                updated += OrderItemModel.objects.filter(pk__in=pks).update(
+                    product_name=Subquery(products.values("name")),
+                    unit_price=Subquery(products.values("price")),
+                )
+            last = pks[-1]
+            if options["verbosity"] > 1:
+                self.stdout.write(f"Backfilled order items up to #{last}.")
+        self.stdout.write(f"Backfilled {updated} order items.")
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0002_alter_ordermodel_total_price"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="ordermodel",
+            index=models.Index(fields=["created_at"], name="order_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="ordermodel",
+            index=models.Index(
+                fields=["order_status", "created_at"], name="order_status_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ordermodel",
+            index=models.Index(
+                fields=["payment_status", "created_at"],
+                name="order_payment_created_idx",
+            ),
+        ),
+    ]
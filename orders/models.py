@@ -48,6 +48,20 @@ class OrderModel(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        # The default ordering, the order history of a user, and the status filters of the
+        # admin and back office, each followed by the default ordering so that a filtered list
+        # is read in order.
+        indexes = [
+            models.Index(fields=["created_at"], name="order_created_idx"),
+            models.Index(fields=["user", "created_at"], name="order_user_created_idx"),
+            models.Index(
+                fields=["order_status", "created_at"], name="order_status_created_idx"
+            ),
+            models.Index(
+                fields=["payment_status", "created_at"],
+                name="order_payment_created_idx",
+            ),
+        ]
         verbose_name_plural = "orders"
         verbose_name = "order"
 
@@ -60,11 +74,23 @@ class OrderModel(models.Model):
 
 
 class OrderItemModel(models.Model):
+    """
+    A line of an order.
+
+    The product's name and unit price are copied at checkout, so an order reads the same after
+    its products are renamed or repriced, and without joining them. Items placed before the
+    snapshot existed are filled by the `backfill_order_snapshots` command.
+    """
+
     order = models.ForeignKey(
         OrderModel, on_delete=models.CASCADE, related_name="order_items"
     )
     product = models.ForeignKey(ProductModel, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
+    product_name = models.CharField(max_length=100, blank=True)
+    unit_price = models.DecimalField(
+        null=True, blank=True, max_digits=8, decimal_places=2
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
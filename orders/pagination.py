@@ -0,0 +1,23 @@
+from products.pagination import ProductCursorPagination
+
+
+class OrderCursorPagination(ProductCursorPagination):
+    """
+    Keyset (cursor) pagination for order history, newest first.
+
+    Pages are selected with a `WHERE (created_at, id) < (last_created_at, last_id)` style
+    condition, backed by the (user, created_at) index of OrderModel, so the last page of a
+    customer with thousands of orders costs the same as the first one.
+
+    Query Parameters:
+    - cursor: The opaque cursor returned in `next`/`previous` links.
+    - ordering: "-created_at" (default) or "created_at".
+    - page_size: The number of orders per page, capped at `max_page_size`.
+    """
+
+    orderings = {
+        "-created_at": ("-created_at", "-id"),
+        "created_at": ("created_at", "id"),
+    }
+    default_ordering = "-created_at"
+    search_ordering = None
@@ -1,6 +1,11 @@
+from django.db import transaction
 from rest_framework import serializers
 from .models import OrderModel, OrderItemModel
 from cart.models import Cart
+from ecommerce.serializers import ValuesSerializer
+from inventory.stock import InsufficientStock, allocate
+from .jobs import record_order_placed, send_order_confirmation
+from users.authentication import get_full_user
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -8,15 +13,29 @@ class OrderItemSerializer(serializers.ModelSerializer):
     Serializer for OrderItemModel.
 
     This serializer handles the representation of order items, including the product and quantity.
+    The product's name and unit price are read from the item's checkout snapshot, not from the product.
 
     Attributes:
         product (str): A human-readable representation of the product.
         quantity (int): The quantity of the product in the order item.
+        product_name (str): The name of the product at checkout.
+        unit_price (Decimal): The price of the product at checkout.
     """
 
     class Meta:
         model = OrderItemModel
-        fields = ["product", "quantity"]
+        fields = ["product", "quantity", "product_name", "unit_price"]
+        read_only_fields = ["product_name", "unit_price"]
+
+
+class OrderItemValuesSerializer(ValuesSerializer):
+    """
+    Read-only OrderItemSerializer built from `.values()` rows.
+    """
+
+    serializer_class = OrderItemSerializer
+    # The product is represented by its primary key, the foreign key column.
+    values = {"product": "product"}
 
 
 class OrderSerializer(serializers.ModelSerializer):
@@ -32,6 +51,7 @@ class OrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = OrderModel
         fields = [
+            "id",
             "products",
             "country",
             "city",
@@ -45,7 +65,7 @@ class OrderSerializer(serializers.ModelSerializer):
             "total_price",
             "created_at",
         ]
-        read_only_fields = ["products", "created_at", "total_price"]
+        read_only_fields = ["id", "products", "created_at", "total_price"]
 
     def create(self, validated_data):
         """
@@ -54,6 +74,12 @@ class OrderSerializer(serializers.ModelSerializer):
         This method creates an order and populates it with items from the user's cart. It also calculates the total price of the order
         and clears the cart items once the order is successfully created.
 
+        Checkout runs as a single transaction with a fixed number of queries: the cart lines are loaded with their products once,
+        their units are allocated from the user's reservation and from stock (see `inventory.stock.allocate`), the order is
+        inserted with its total already computed, the order items are bulk created with a snapshot of their product's name and
+        price, and the cart is cleared. The confirmation email and analytics are left to background jobs (see `orders.jobs`),
+        enqueued in the same transaction.
+
         Args:
             validated_data (dict): The validated data for the order.
 
@@ -61,32 +87,73 @@ class OrderSerializer(serializers.ModelSerializer):
             OrderModel: The created order instance.
 
         Raises:
-            serializers.ValidationError: If the user does not have an active cart or if there are no products in the cart.
+            serializers.ValidationError: If there are no products in the cart, or some are out of stock.
         """
 
-        user = self.context["request"].user
-        try:
-            cart = Cart.objects.get(user=user)
-        except Cart.DoesNotExist:
-            raise serializers.ValidationError("The user does not have an active cart.")
+        user = get_full_user(self.context["request"].user)
+        with transaction.atomic():
+            cart = Cart.objects.select_for_update().for_user(user)
+
+            cart_items = list(cart.items.select_related("product"))
+            if not cart_items:
+                raise serializers.ValidationError("No products in the cart.")
+            try:
+                allocate(
+                    user,
+                    {
+                        cart_item.product_id: cart_item.quantity
+                        for cart_item in cart_items
+                    },
+                )
+            except InsufficientStock as exc:
+                raise serializers.ValidationError(
+                    {"products": [f"Out of stock: {pk}" for pk in exc.products]}
+                )
+
+            total_price = sum(
+                cart_item.product.price * cart_item.quantity for cart_item in cart_items
+            )
+            order = OrderModel.objects.create(
+                user=user, total_price=total_price, **validated_data
+            )
+            OrderItemModel.objects.bulk_create(
+                OrderItemModel(
+                    order=order,
+                    product=cart_item.product,
+                    quantity=cart_item.quantity,
+                    product_name=cart_item.product.name,
+                    unit_price=cart_item.product.price,
+                )
+                for cart_item in cart_items
+            )
+            cart.items.all().delete()
+            cart.bump_version()
 
-        cart_items = cart.items.all()
-        if not cart_items.exists():
-            raise serializers.ValidationError("No products in the cart.")
+            # Non-critical side effects run in the background, once the order is committed.
+            send_order_confirmation.enqueue(order.pk)
+            record_order_placed.enqueue(order.pk)
 
-        order = OrderModel.objects.create(user=user, **validated_data)
+        return order
 
-        total_price = 0
-        for cart_item in cart_items:
-            product = cart_item.product
-            quantity = cart_item.quantity
-            OrderItemModel.objects.create(
-                order=order, product=product, quantity=quantity
-            )
-            total_price += product.price * quantity
 
-        order.total_price = total_price
-        order.save()
-        cart.items.all().delete()
+class OrderValuesSerializer(ValuesSerializer):
+    """
+    Read-only OrderSerializer built from `.values()` rows.
+    """
 
-        return order
+    serializer_class = OrderSerializer
+    # OrderModel has no `products` attribute (its items are `order_items`), so OrderSerializer
+    # skips the field.
+    omit = ("products",)
+    # OrderCursorPagination encodes its cursors from the keys of the page's rows.
+    extra_values = ("id", "created_at")
+
+
+class OrderWithProductsValuesSerializer(OrderValuesSerializer):
+    """
+    OrderValuesSerializer embedding each order's items as `products`, loaded in one query for
+    the whole page.
+    """
+
+    omit = ()
+    nested = {"products": (OrderItemValuesSerializer, "order")}
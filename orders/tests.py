@@ -1,3 +1,366 @@
+import io
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from ecommerce.testing import (
+    QueryCountAssertionsMixin,
+    ValuesSerializerAssertionsMixin,
+)
+from cart.models import Cart, CartItem
+from products.models import ProductModel
+from .models import OrderItemModel, OrderModel
+from .serializers import OrderItemValuesSerializer, OrderValuesSerializer
+from .views import OrderViewSet
+
+
+class OrderQueryCountTests(QueryCountAssertionsMixin, TestCase):
+    """
+    Order read endpoints run a constant number of queries, whatever the result size.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(username="buyer")
+        self.product = ProductModel.objects.create(name="Mug", price=Decimal("7.00"))
+
+    def create_order(self, items=1):
+        order = OrderModel.objects.create(
+            user=self.user,
+            country="EG",
+            city="Cairo",
+            state="Cairo",
+            street="Tahrir",
+            phone="0100",
+        )
+        OrderItemModel.objects.bulk_create(
+            OrderItemModel(order=order, product=self.product, quantity=i + 1)
+            for i in range(items)
+        )
+        return order
+
+    def test_order_items(self):
+        view = OrderViewSet.as_view({"get": "order_items"})
+        factory = APIRequestFactory()
+
+        def request(order):
+            request = factory.get("/")
+            force_authenticate(request, self.user)
+            response = view(request, pk=order.pk)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data), order.order_items.count())
+
+        self.assertConstantQueries(self.create_order, request)
+
+    def test_order_list(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        def populate(size):
+            for _ in range(size):
+                self.create_order()
+
+        def request(_):
+            response = client.get(
+                reverse("orders:order-history", kwargs={"user_id": self.user.pk}),
+                {"include": "products"},
+            )
+            self.assertEqual(response.status_code, 200)
+
+        self.assertConstantQueries(populate, request)
+
+
+class CheckoutTests(QueryCountAssertionsMixin, TestCase):
+    """
+    Checkout moves the cart into an order atomically with a fixed number of queries.
+    """
+
+    address = {
+        "country": "EG",
+        "city": "Cairo",
+        "state": "Cairo",
+        "street": "Tahrir",
+        "phone": "0100",
+    }
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def fill_cart(self, size):
+        user = User.objects.create(username=f"buyer-{size}")
+        products = ProductModel.objects.bulk_create(
+            ProductModel(name=f"product {size}-{i}", price=Decimal("3.10"))
+            for i in range(size)
+        )
+        cart = Cart.objects.for_user(user)
+        CartItem.objects.bulk_create(
+            CartItem(cart=cart, product=product, quantity=2) for product in products
+        )
+        self.client.force_authenticate(user)
+        return user
+
+    def checkout(self, user):
+        return self.client.post(
+            reverse("orders:order-create", kwargs={"user_id": user.id}), self.address
+        )
+
+    def test_checkout_creates_order_and_clears_cart(self):
+        user = self.fill_cart(3)
+        response = self.checkout(user)
+        self.assertEqual(response.status_code, 201)
+
+        order = OrderModel.objects.get(user=user)
+        self.assertEqual(order.total_price, Decimal("18.60"))
+        self.assertEqual(order.order_items.count(), 3)
+        self.assertFalse(Cart.objects.for_user(user).items.exists())
+
+    def test_checkout_query_count_is_constant(self):
+        def request(user):
+            self.assertEqual(self.checkout(user).status_code, 201)
+
+        self.assertConstantQueries(self.fill_cart, request)
+
+    def test_empty_cart_is_rejected(self):
+        user = self.fill_cart(0)
+        self.assertEqual(self.checkout(user).status_code, 400)
+        self.assertFalse(OrderModel.objects.exists())
+
+    def test_items_keep_their_checkout_snapshot(self):
+        user = self.fill_cart(1)
+        self.checkout(user)
+        product = ProductModel.objects.get(name="product 1-0")
+        product.name, product.price = "Renamed", Decimal("9.99")
+        product.save()
+
+        item = OrderItemModel.objects.get()
+        self.assertEqual(
+            (item.product_name, item.unit_price), ("product 1-0", Decimal("3.10"))
+        )
+        response = self.client.get(
+            reverse("orders:order-items", kwargs={"pk": item.order_id})
+        )
+        self.assertEqual(response.data[0]["product_name"], "product 1-0")
+        self.assertEqual(response.data[0]["unit_price"], "3.10")
+
+    def test_backfill_order_snapshots(self):
+        user = self.fill_cart(5)
+        self.checkout(user)
+        OrderItemModel.objects.update(product_name="", unit_price=None)
+        ProductModel.objects.filter(name="product 5-0").update(price=Decimal("4.00"))
+
+        out = io.StringIO()
+        call_command("backfill_order_snapshots", chunk_size=2, stdout=out)
+        self.assertIn("Backfilled 5 order items.", out.getvalue())
+        self.assertEqual(
+            sorted(OrderItemModel.objects.values_list("product_name", "unit_price")),
+            [("product 5-0", Decimal("4.00"))]
+            + [(f"product 5-{i}", Decimal("3.10")) for i in range(1, 5)],
+        )
+
+        call_command("backfill_order_snapshots", stdout=out)
+        self.assertIn("Backfilled 0 order items.", out.getvalue())
+
+    def test_failed_checkout_leaves_no_partial_order(self):
+        user = self.fill_cart(3)
+        with mock.patch.object(
+            OrderItemModel.objects, "bulk_create", side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                self.checkout(user)
+
+        self.assertFalse(OrderModel.objects.exists())
+        self.assertEqual(Cart.objects.for_user(user).items.count(), 3)
+
+
+class OrderConditionalGetTests(TestCase):
+    """
+    Order reads answer 304 Not Modified without serializing while nothing changed.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(username="buyer")
+        self.product = ProductModel.objects.create(name="Mug", price=Decimal("7.00"))
+        self.order = OrderModel.objects.create(
+            user=self.user,
+            country="EG",
+            city="Cairo",
+            state="Cairo",
+            street="Tahrir",
+            phone="0100",
+        )
+        OrderItemModel.objects.create(order=self.order, product=self.product)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_order_list(self):
+        url = reverse("orders:order-history", kwargs={"user_id": self.user.pk})
+        etag = self.client.get(url)["ETag"]
+        with mock.patch.object(OrderViewSet, "get_serializer") as get_serializer:
+            response = self.client.get(url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 304)
+        get_serializer.assert_not_called()
+
+        self.order.order_status = "Shipped"
+        self.order.save()
+        response = self.client.get(url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+
+    def test_order_items(self):
+        view = OrderViewSet.as_view({"get": "order_items"})
+        factory = APIRequestFactory()
+
+        serializer = mock.Mock(wraps=OrderItemValuesSerializer)
+        with mock.patch("orders.views.OrderItemValuesSerializer", serializer):
+            request = factory.get("/")
+            force_authenticate(request, self.user)
+            etag = view(request, pk=self.order.pk)["ETag"]
+            serializer.assert_called_once()
+            serializer.reset_mock()
+
+            request = factory.get("/", headers={"if-none-match": etag})
+            force_authenticate(request, self.user)
+            response = view(request, pk=self.order.pk)
+        self.assertEqual(response.status_code, 304)
+        serializer.assert_not_called()
+
+
+class OrderHistoryTests(TestCase):
+    """
+    Order history is paginated by keyset, newest first, and scoped to the user.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(username="buyer")
+        self.product = ProductModel.objects.create(name="Mug", price=Decimal("7.00"))
+        self.orders = OrderModel.objects.bulk_create(
+            OrderModel(
+                user=self.user,
+                country="EG",
+                city="Cairo",
+                state="Cairo",
+                street="Tahrir",
+                phone="0100",
+            )
+            for _ in range(5)
+        )
+        # Ties on created_at are broken by id.
+        OrderModel.objects.filter(
+            pk__in=[order.pk for order in self.orders[:2]]
+        ).update(created_at=self.orders[0].created_at)
+        OrderItemModel.objects.bulk_create(
+            OrderItemModel(
+                order=order,
+                product=self.product,
+                quantity=2,
+                product_name="Mug",
+                unit_price=Decimal("7.00"),
+            )
+            for order in self.orders
+        )
+        self.item = {
+            "product": self.product.pk,
+            "quantity": 2,
+            "product_name": "Mug",
+            "unit_price": "7.00",
+        }
+        self.url = reverse("orders:order-history", kwargs={"user_id": self.user.pk})
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_pages_newest_first(self):
+        ids, url = [], self.url + "?page_size=2"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data["results"]), 2)
+            ids += [order["id"] for order in response.data["results"]]
+            url = response.data["next"]
+        expected = OrderModel.objects.order_by("-created_at", "-id")
+        self.assertEqual(ids, list(expected.values_list("id", flat=True)))
+
+        previous = self.client.get(response.data["previous"])
+        self.assertEqual(
+            [order["id"] for order in previous.data["results"]], ids[-3:-1]
+        )
+
+    def test_include_products(self):
+        response = self.client.get(self.url, {"include": "products"})
+        self.assertEqual(response.data["results"][0]["products"], [self.item])
+        response = self.client.get(self.url)
+        self.assertNotIn("products", response.data["results"][0])
+
+    def test_scoped_to_the_user(self):
+        other = User.objects.create(username="other")
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(self.url).data["results"], [])
+        response = self.client.get(
+            reverse("orders:order-items", kwargs={"pk": self.orders[0].pk})
+        )
+        self.assertEqual(response.status_code, 404)
+
+        other.is_staff = True
+        self.client.force_authenticate(other)
+        self.assertEqual(len(self.client.get(self.url).data["results"]), 5)
+
+    def test_order_items_route(self):
+        response = self.client.get(
+            reverse("orders:order-items", kwargs={"pk": self.orders[0].pk})
+        )
+        self.assertEqual(response.data, [self.item])
+
+
+class OrderValuesSerializerTests(ValuesSerializerAssertionsMixin, TestCase):
+    """
+    Order reads use `.values()` rows, with output identical to the model serializers'.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(username="buyer")
+        products = [
+            ProductModel.objects.create(name=name, price=Decimal("2.50"))
+            for name in ("Mug", "Teapot")
+        ]
+        address = {
+            "country": "EG",
+            "city": "Cairo",
+            "state": "Cairo",
+            "street": "Tahrir",
+        }
+        self.orders = [
+            OrderModel.objects.create(user=self.user, phone="0100", **address),
+            OrderModel.objects.create(
+                user=self.user,
+                phone="0101",
+                zip_code="11511",
+                total_price=Decimal("17.5"),
+                order_status="Shipped",
+                payment_status="Paid",
+                payment_method="Card",
+                **address,
+            ),
+        ]
+        for order in self.orders:
+            for quantity, product in enumerate(products, start=1):
+                OrderItemModel.objects.create(
+                    order=order, product=product, quantity=quantity
+                )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_same_representation(self):
+        self.assertSameRepresentation(OrderValuesSerializer, OrderModel.objects.all())
+        self.assertSameRepresentation(
+            OrderItemValuesSerializer, OrderItemModel.objects.all()
+        )
 
-# Create your tests here.
+    def test_endpoints_unchanged(self):
+        url = reverse("orders:order-history", kwargs={"user_id": self.user.pk})
+        values = self.client.get(url)
+        with mock.patch.object(OrderViewSet, "values_actions", ()):
+            full = self.client.get(url)
+        self.assertEqual(values.status_code, 200)
+        self.assertEqual(values.content, full.content)
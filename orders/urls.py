@@ -11,8 +11,16 @@ urlpatterns = [
     # This route will call the 'order_items' method of the OrderViewSet to list all items for the given order.
     path(
         "orders/<int:pk>/items",
+        views.OrderViewSet.as_view({"get": "order_items"}),
+        name="order-items",
+    ),
+    # URL pattern to list the order history of a specific user, newest first, a page at a time
+    # URL example: /orders/history/1?include=products
+    # This route will call the 'list' method of the OrderViewSet to list the orders of the user with the given user_id.
+    path(
+        "orders/history/<int:user_id>",
         views.OrderViewSet.as_view({"get": "list"}),
-        name="order-list",
+        name="order-history",
     ),
     # URL pattern to create a new order for a specific user
     # URL example: /orders/1
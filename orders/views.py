@@ -1,3 +1,5 @@
+import functools
+
 from django.shortcuts import render
 from .models import *
 from .serializers import *
@@ -5,28 +7,83 @@ from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from ecommerce.conditional import conditional_response, modification_stamp
+from ecommerce.querysets import optimize_queryset
+from ecommerce.replicas import ReplicaReadMixin
+from ecommerce.serializers import ValuesReadMixin
+from idempotency.decorators import idempotent
+from .pagination import OrderCursorPagination
 
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(ReplicaReadMixin, ValuesReadMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing orders.
 
     Provides CRUD operations for OrderModel and additional actions to list order items and create orders.
-    Requires the user to be authenticated to perform any actions.
+    Requires the user to be authenticated to perform any actions, and only shows users their own orders
+    (staff see everyone's). Order history reads use the read replicas, when configured, except right after
+    the user's own writes (see `ecommerce.replicas`).
 
     Attributes:
         queryset (QuerySet): A QuerySet containing all order objects.
         serializer_class (OrderSerializer): The serializer class used for validating and serializing order data.
+        values_serializer_class (OrderValuesSerializer): The read-only serializer of list and retrieve.
+        pagination_class (OrderCursorPagination): The keyset pagination of the order history.
         permission_classes (list): A list of permission classes that the user must meet to access the ViewSet.
+        replica_actions (tuple): The actions reading from the read replicas.
 
     Actions:
+        list (GET): List the order history of a user, a page at a time.
         order_items (GET): Retrieve items for a specific order.
         create (POST): Create a new order and return a success message.
     """
 
     queryset = OrderModel.objects.all()
     serializer_class = OrderSerializer
+    values_serializer_class = OrderValuesSerializer
+    pagination_class = OrderCursorPagination
     permission_classes = [IsAuthenticated]
+    replica_actions = ("list", "retrieve", "order_items")
+    include_query_param = "include"
+
+    def get_values_serializer_class(self):
+        include = self.request.query_params.get(self.include_query_param, "")
+        if self.action == "list" and "products" in include.split(","):
+            return OrderWithProductsValuesSerializer
+        return super().get_values_serializer_class()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(user=self.request.user.id)
+        if "user_id" in self.kwargs:
+            queryset = queryset.filter(user=self.kwargs["user_id"])
+        if self.reads_values():
+            return queryset
+        return optimize_queryset(queryset, self.get_serializer_class())
+
+    def list(self, request, *args, **kwargs):
+        """
+        List the orders of a user, newest first, answering 304 Not Modified when none changed since
+        the client's copy.
+
+        Orders are paginated by keyset (see `OrderCursorPagination`), so every page runs the same
+        queries whatever the length of the history. With `?include=products` each order embeds its
+        items, loaded in one query for the whole page.
+
+        The validators are the row count and latest `updated_at`, aggregated in one query
+        without serializing any order.
+        """
+
+        etag, last_modified = modification_stamp(
+            f"orders-{kwargs.get('user_id')}", self.get_queryset()
+        )
+        return conditional_response(
+            request,
+            functools.partial(super().list, request, *args, **kwargs),
+            etag=etag,
+            last_modified=last_modified,
+        )
 
     @action(detail=True, methods=["get"])
     def order_items(self, request, pk=None):
@@ -42,16 +99,26 @@ class OrderViewSet(viewsets.ModelViewSet):
         """
 
         order = self.get_object()
-        order_items = order.order_items.all()
-        serializer = OrderItemSerializer(order_items, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        order_items = OrderItemValuesSerializer.values_queryset(order.order_items.all())
+        etag, last_modified = modification_stamp(f"order-{order.pk}", order_items)
+
+        def build():
+            serializer = OrderItemValuesSerializer(order_items, many=True)
+            return Response(serializer.data, status=status.HTTP_200_OK)
+
+        return conditional_response(
+            request, build, etag=etag, last_modified=last_modified
+        )
 
     @action(detail=False, methods=["post"])
+    @idempotent
     def create(self, request, user_id, *args, **kwargs):
         """
         Create a new order and return a success message.
 
         This method overrides the default create method to add a custom success message to the response.
+        Retries sent with the same Idempotency-Key header replay the first response instead of placing
+        another order (see `idempotency.decorators.idempotent`).
 
         Args:
             request (Request): The HTTP request object.
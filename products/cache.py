@@ -0,0 +1,224 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+
+from ecommerce.conditional import not_modified_response, set_validator_headers
+
+CATALOGUE_VERSION_KEY = "products:catalogue-version"
+
+
+class CacheStats:
+    """
+    In-process counters for the product response cache.
+
+    Attributes:
+    - hits: Responses served from the cache.
+    - misses: Responses that had to be built and were then stored.
+    - evictions: Catalogue versions invalidated by product writes; each bump evicts every
+      response cached under the previous version at once.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.hits = self.misses = self.evictions = 0
+
+    def increment(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+stats = CacheStats()
+
+
+def get_cache():
+    return caches[getattr(settings, "PRODUCTS_CACHE_ALIAS", "default")]
+
+
+def initial_catalogue_version():
+    """
+    Return a version to (re)start from when the version key is missing.
+
+    The key may be evicted or culled like any other, so restarting from a fixed value would
+    bring back the responses still cached under it. A clock reading in nanoseconds is never
+    reused, and is still an integer for `incr`.
+    """
+
+    return time.time_ns()
+
+
+def get_catalogue_version():
+    """
+    Return the current catalogue version, initialising it on an empty cache.
+    """
+
+    cache = get_cache()
+    version = cache.get(CATALOGUE_VERSION_KEY)
+    if version is None:
+        version = initial_catalogue_version()
+        cache.add(CATALOGUE_VERSION_KEY, version, timeout=None)
+        version = cache.get(CATALOGUE_VERSION_KEY, version)
+    return version
+
+
+async def aget_catalogue_version():
+    """
+    Async counterpart of `get_catalogue_version`.
+    """
+
+    cache = get_cache()
+    version = await cache.aget(CATALOGUE_VERSION_KEY)
+    if version is None:
+        version = initial_catalogue_version()
+        await cache.aadd(CATALOGUE_VERSION_KEY, version, timeout=None)
+        version = await cache.aget(CATALOGUE_VERSION_KEY, version)
+    return version
+
+
+def bump_catalogue_version():
+    """
+    Invalidate every cached product response in O(1) by moving to a new catalogue version.
+    """
+
+    cache = get_cache()
+    try:
+        cache.incr(CATALOGUE_VERSION_KEY)
+    except ValueError:
+        cache.add(CATALOGUE_VERSION_KEY, initial_catalogue_version(), timeout=None)
+    stats.increment("evictions")
+
+
+def response_cache_key(request, version):
+    """
+    Build the cache key for a request: the catalogue version plus a digest of the full URL,
+    which carries the search term, ordering, cursor and page size.
+    """
+
+    digest = hashlib.sha256(request.build_absolute_uri().encode()).hexdigest()
+    return f"products:response:{version}:{digest}"
+
+
+class CachedResponseMixin:
+    """
+    ViewSet mixin serving `list` and `retrieve` through a read-through response cache.
+
+    The serialized response data is cached under the current catalogue version, so any product
+    write (see the ProductModel signal receivers) invalidates all cached pages at once.
+    Cached entries expire after PRODUCTS_CACHE_TIMEOUT seconds (default 300).
+
+    Entries also keep the response's ETag/Last-Modified validators, from `get_validators`, so
+    conditional requests are answered with 304 Not Modified without touching the database on a
+    cache hit, and without serializing on a miss.
+
+    `alist`/`aretrieve` do the same for the async views of `ecommerce.asyncviews`, with
+    `aget_validators`.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, super().retrieve, *args, **kwargs)
+
+    async def alist(self, request, *args, **kwargs):
+        return await self.acached_response(request, super().alist, *args, **kwargs)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return await self.acached_response(request, super().aretrieve, *args, **kwargs)
+
+    def get_validators(self, request, *args, **kwargs):
+        """
+        Return the `(etag, last_modified)` validators of the requested resource.
+        """
+
+        return None, None
+
+    async def aget_validators(self, request, *args, **kwargs):
+        return None, None
+
+    def cached_response(self, request, build, *args, **kwargs):
+        cache = get_cache()
+        key = response_cache_key(request, get_catalogue_version())
+        entry = cache.get(key)
+        if entry is not None:
+            stats.increment("hits")
+            etag, last_modified = entry["etag"], entry["last_modified"]
+        else:
+            stats.increment("misses")
+            etag, last_modified = self.get_validators(request, *args, **kwargs)
+
+        response = not_modified_response(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        if entry is not None:
+            response = Response(entry["data"], status=status.HTTP_200_OK)
+        else:
+            response = build(request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                cache.set(
+                    key,
+                    {
+                        "data": response.data,
+                        "etag": etag,
+                        "last_modified": last_modified,
+                    },
+                    timeout=getattr(settings, "PRODUCTS_CACHE_TIMEOUT", 300),
+                )
+        return set_validator_headers(response, etag, last_modified)
+
+    async def acached_response(self, request, build, *args, **kwargs):
+        """
+        Async counterpart of `cached_response`, where `build` is a coroutine function.
+
+        Returns:
+            HttpResponse | None: The response, or None when `build` returns None.
+        """
+
+        cache = get_cache()
+        key = response_cache_key(request, await aget_catalogue_version())
+        entry = await cache.aget(key)
+        if entry is not None:
+            stats.increment("hits")
+            etag, last_modified = entry["etag"], entry["last_modified"]
+        else:
+            stats.increment("misses")
+            etag, last_modified = await self.aget_validators(request, *args, **kwargs)
+
+        response = not_modified_response(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        if entry is not None:
+            response = Response(entry["data"], status=status.HTTP_200_OK)
+        else:
+            response = await build(request, *args, **kwargs)
+            if response is None:
+                return None
+            if response.status_code == status.HTTP_200_OK:
+                await cache.aset(
+                    key,
+                    {
+                        "data": response.data,
+                        "etag": etag,
+                        "last_modified": last_modified,
+                    },
+                    timeout=getattr(settings, "PRODUCTS_CACHE_TIMEOUT", 300),
+                )
+        return set_validator_headers(response, etag, last_modified)
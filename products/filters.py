@@ -0,0 +1,92 @@
+from asgiref.sync import sync_to_async
+from django.db.models import Case, IntegerField, Value, When
+from rest_framework import filters
+
+from .search import get_search_backend
+
+
+class ProductSearchFilter(filters.SearchFilter):
+    """
+    Search filter backed by the product search index instead of `name LIKE '%term%'` scans.
+    The index is read on the database of the filtered queryset, e.g. a read replica.
+
+    Results ordered by relevance are the best `max_results` matches, annotated with their
+    `search_rank` (0 for the best match), which the catalogue pagination orders by when no
+    explicit ordering is requested. Results in an explicit catalogue ordering (e.g.
+    `ordering=price`) are all the matches, selected with the index as a subquery.
+
+    Attributes:
+    - max_results: The maximum number of matches of a search ordered by relevance.
+    """
+
+    max_results = 500
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+
+        backend = get_search_backend()
+        if not self.ranks(request, view):
+            return self.filter_matches(
+                queryset, backend.matches(" ".join(terms), using=queryset.db)
+            )
+        pks = backend.search(" ".join(terms), self.max_results, using=queryset.db)
+        return self.filter_ranked(queryset, pks)
+
+    async def afilter_queryset(self, request, queryset, view):
+        """
+        Async counterpart of `filter_queryset`. Search backends run raw SQL, which Django only
+        offers synchronously, so the search itself is run in a thread.
+        """
+
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+
+        backend = get_search_backend()
+        if not self.ranks(request, view):
+            return self.filter_matches(
+                queryset, backend.matches(" ".join(terms), using=queryset.db)
+            )
+        pks = await sync_to_async(backend.search)(
+            " ".join(terms), self.max_results, using=queryset.db
+        )
+        return self.filter_ranked(queryset, pks)
+
+    def ranks(self, request, view):
+        """
+        Whether the results are ordered by relevance: unless the view's pagination is asked for
+        another of its orderings.
+        """
+
+        paginator = getattr(view, "paginator", None)
+        if paginator is None:
+            return True
+        ordering = request.query_params.get(paginator.ordering_query_param)
+        return (
+            ordering not in paginator.orderings or ordering == paginator.search_ordering
+        )
+
+    def filter_matches(self, queryset, matches):
+        """
+        Restrict the queryset to all the matching products, unranked.
+        """
+
+        if matches is None:
+            return queryset.none()
+        return queryset.filter(pk__in=matches)
+
+    def filter_ranked(self, queryset, pks):
+        """
+        Restrict the queryset to the matching products, annotated with their `search_rank`.
+        """
+
+        if not pks:
+            return queryset.none()
+        return queryset.filter(pk__in=pks).annotate(
+            search_rank=Case(
+                *(When(pk=pk, then=Value(rank)) for rank, pk in enumerate(pks)),
+                output_field=IntegerField(),
+            )
+        )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from products.cache import bump_catalogue_version
+from products.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the product search index from the ProductModel table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="Number of products inserted into the index per batch.",
+        )
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        count = backend.rebuild(batch_size=options["batch_size"])
+        bump_catalogue_version()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Indexed {count} products with {type(backend).__name__}."
+            )
+        )
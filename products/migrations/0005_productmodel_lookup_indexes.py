@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0004_product_search_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="productmodel",
+            index=models.Index(fields=["name"], name="product_name_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="productmodel",
+            index=models.Index(fields=["updated_at"], name="product_updated_idx"),
+        ),
+    ]
@@ -1,6 +1,11 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils.text import slugify
 
+from .cache import bump_catalogue_version
+from .search import get_search_backend
+
 
 class ProductModel(models.Model):
     """
@@ -12,6 +17,9 @@ class ProductModel(models.Model):
 
     Meta:
     - ordering: Orders products by the `created_at` field in descending order (newest first).
+    - indexes: Composite (price, id) and (created_at, id) indexes backing the catalogue's keyset pagination,
+      `name` for exact name lookups, and `updated_at` so that the catalogue's validators are aggregated from
+      the index rather than the table.
     - verbose_name_plural: The plural name of the model, used in admin interfaces and other places.
     - verbose_name: The singular name of the model, used in admin interfaces and other places.
 
@@ -28,6 +36,12 @@ class ProductModel(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["price", "id"], name="product_price_id_idx"),
+            models.Index(fields=["created_at", "id"], name="product_created_id_idx"),
+            models.Index(fields=["name"], name="product_name_idx"),
+            models.Index(fields=["updated_at"], name="product_updated_idx"),
+        ]
         verbose_name_plural = "products"
         verbose_name = "product"
 
@@ -37,3 +51,45 @@ class ProductModel(models.Model):
     def save(self, *args, **kwargs):
         self.slug = slugify(self.name)
         super(ProductModel, self).save(*args, **kwargs)
+
+
+@receiver(post_save, sender=ProductModel)
+def index_product(sender, instance, **kwargs):
+    """
+    Signal receiver to keep the product search index in sync when a product is saved.
+
+    Args:
+        sender (Model): The model class that sent the signal.
+        instance (ProductModel): The product that was saved.
+    """
+
+    get_search_backend().index([instance])
+
+
+@receiver(post_delete, sender=ProductModel)
+def unindex_product(sender, instance, **kwargs):
+    """
+    Signal receiver to remove a deleted product from the product search index.
+
+    Args:
+        sender (Model): The model class that sent the signal.
+        instance (ProductModel): The product that was deleted.
+    """
+
+    get_search_backend().remove([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=ProductModel)
+def invalidate_catalogue_cache(sender, instance, **kwargs):
+    """
+    Signal receiver to invalidate cached catalogue responses when a product is saved or deleted.
+
+    The version is bumped once the write commits: bumped earlier, a concurrent read could still
+    see the old rows and cache them under the new version.
+
+    Args:
+        sender (Model): The model class that sent the signal.
+        instance (ProductModel): The product that was saved or deleted.
+    """
+
+    transaction.on_commit(bump_catalogue_version, using=kwargs.get("using"))
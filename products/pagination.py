@@ -0,0 +1,222 @@
+import binascii
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class ProductCursorPagination(BasePagination):
+    """
+    Keyset (cursor) pagination for the product catalogue.
+
+    Pages are selected with a `WHERE (price, id) > (last_price, last_id)` style condition on a
+    stable ordering that always ends with `id`, so every page costs the same as the first one,
+    backed by the composite indexes on ProductModel.
+
+    Query Parameters:
+    - cursor: The opaque cursor returned in `next`/`previous` links.
+    - ordering: One of the keys of `orderings` (default "price", or "rank" for search results).
+    - page_size: The number of products per page, capped at `max_page_size`.
+    """
+
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+    ordering_query_param = "ordering"
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    orderings = {
+        "price": ("price", "id"),
+        "-price": ("-price", "-id"),
+        "created_at": ("created_at", "id"),
+        "-created_at": ("-created_at", "-id"),
+        "rank": ("search_rank", "id"),
+    }
+    default_ordering = "price"
+    search_ordering = "rank"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.page_queryset(queryset, request)
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Async counterpart of `paginate_queryset`, reading the page with the async ORM.
+        """
+
+        queryset = self.page_queryset(queryset, request)
+        return self.set_page([row async for row in queryset])
+
+    def page_queryset(self, queryset, request):
+        """
+        Return the queryset of the requested page, with one extra row telling whether more follow.
+        """
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset)
+        self.page_size_requested = self.get_page_size(request)
+
+        self.reverse, self.position = self.decode_cursor(request, queryset.model)
+        fields = self.orderings[self.ordering]
+        if self.reverse:
+            fields = tuple(_flip(field) for field in fields)
+
+        queryset = queryset.order_by(*fields)
+        if self.position is not None:
+            queryset = queryset.filter(self.keyset_filter(fields, self.position))
+        return queryset[: self.page_size_requested + 1]
+
+    def set_page(self, results):
+        """
+        Keep the page out of the rows read from `page_queryset` and work out its links.
+        """
+
+        page_size = self.page_size_requested
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if self.reverse:
+            results.reverse()
+            self.has_next, self.has_previous = self.position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.position is not None
+
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_ordering(self, request, queryset):
+        searching = "search_rank" in queryset.query.annotations
+        ordering = request.query_params.get(self.ordering_query_param)
+        if ordering in self.orderings and (
+            ordering != self.search_ordering or searching
+        ):
+            return ordering
+        return self.search_ordering if searching else self.default_ordering
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(False, self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(True, self.page[0])
+
+    def keyset_filter(self, fields, position):
+        """
+        Build the condition selecting the rows after `position` in the given ordering.
+
+        For fields (a, b) this is `a > x OR (a = x AND b > y)`, with `<` for descending fields.
+        """
+
+        conditions = []
+        for index, field in enumerate(fields):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            equal = {
+                previous.lstrip("-"): value
+                for previous, value in zip(fields[:index], position)
+            }
+            conditions.append(Q(**equal, **{f"{name}__{lookup}": position[index]}))
+        return reduce(or_, conditions)
+
+    def encode_cursor(self, reverse, instance):
+        fields = [field.lstrip("-") for field in self.orderings[self.ordering]]
+        payload = {
+            "o": self.ordering,
+            "r": int(reverse),
+            "p": [_position_value(instance, field) for field in fields],
+        }
+        cursor = urlsafe_b64encode(
+            json.dumps(payload, separators=(",", ":")).encode()
+        ).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request, model):
+        """
+        Return `(reverse, position)` from the request's cursor, or `(False, None)` without one.
+
+        Raises:
+            NotFound: If the cursor is malformed or was issued for another ordering.
+        """
+
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return False, None
+
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded.encode()))
+            if payload["o"] != self.ordering:
+                raise ValueError
+            reverse = bool(payload["r"])
+            fields = [field.lstrip("-") for field in self.orderings[self.ordering]]
+            if len(payload["p"]) != len(fields):
+                raise ValueError
+            position = [
+                (
+                    int(value)
+                    if field == "search_rank"
+                    else model._meta.get_field(field).to_python(value)
+                )
+                for field, value in zip(fields, payload["p"])
+            ]
+        except (TypeError, ValueError, KeyError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return reverse, position
+
+
+def _flip(field):
+    return field[1:] if field.startswith("-") else f"-{field}"
+
+
+def _position_value(instance, field):
+    if isinstance(instance, dict):
+        # A `.values()` row, see ProductValuesSerializer; strings as in `value_to_string`.
+        value = instance[field]
+        if field == "search_rank":
+            return value
+        return value.isoformat() if hasattr(value, "isoformat") else str(value)
+    if field == "search_rank":
+        return instance.search_rank
+    return instance._meta.get_field(field).value_to_string(instance)
@@ -0,0 +1,221 @@
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+
+class BaseSearchBackend:
+    """
+    Interface for product search backends.
+
+    A backend keeps its own index of product names in sync through `index`/`remove`
+    (called from the ProductModel save/delete signals) and answers `search` with
+    product ids ordered by relevance.
+    """
+
+    def index(self, products):
+        """
+        Add or refresh the given ProductModel instances in the index.
+        """
+
+        raise NotImplementedError
+
+    def remove(self, pks):
+        """
+        Remove the products with the given primary keys from the index.
+        """
+
+        raise NotImplementedError
+
+    def rebuild(self, batch_size=2000):
+        """
+        Re-index the whole catalogue.
+
+        Returns:
+            int: The number of indexed products.
+        """
+
+        raise NotImplementedError
+
+    def search(self, query, limit, using=None):
+        """
+        Find products matching `query`, treating each term as a prefix.
+
+        Args:
+            query (str): The search box query.
+            limit (int): The maximum number of ids returned.
+            using (str): The database to read, e.g. the one of the queryset being filtered
+                (default: the one ProductModel reads are routed to).
+
+        Returns:
+            list: Up to `limit` product ids, best match first.
+        """
+
+        raise NotImplementedError
+
+    def matches(self, query, using=None):
+        """
+        Select the ids of all the products matching `query`, unranked and unlimited, on the
+        database `using` as for `search`.
+
+        Returns:
+            QuerySet | RawSQL: A subquery usable as `pk__in`, or None if `query` has no terms.
+        """
+
+        raise NotImplementedError
+
+
+class ContainsSearchBackend(BaseSearchBackend):
+    """
+    Index-less fallback that scans product names with icontains, for databases without a search index.
+    """
+
+    def index(self, products):
+        pass
+
+    def remove(self, pks):
+        pass
+
+    def rebuild(self, batch_size=2000):
+        from .models import ProductModel
+
+        return ProductModel.objects.count()
+
+    def search(self, query, limit, using=None):
+        queryset = _products(using)
+        for term in search_terms(query):
+            queryset = queryset.filter(name__icontains=term)
+        return list(queryset.order_by("name").values_list("pk", flat=True)[:limit])
+
+    def matches(self, query, using=None):
+        terms = search_terms(query)
+        if not terms:
+            return None
+        queryset = _products(using)
+        for term in terms:
+            queryset = queryset.filter(name__icontains=term)
+        return queryset.values("pk")
+
+
+class SQLiteFTS5Backend(BaseSearchBackend):
+    """
+    Search backend built on an SQLite FTS5 virtual table keyed by the product id.
+
+    The table is created by the `products` migrations and ranked with FTS5's built-in bm25 `rank`.
+    """
+
+    table = "products_productmodel_fts"
+
+    def index(self, products):
+        rows = [(product.pk, product.name) for product in products]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {self.table} WHERE rowid = %s", [(pk,) for pk, _ in rows]
+            )
+            self._insert(cursor, rows)
+
+    def remove(self, pks):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {self.table} WHERE rowid = %s", [(pk,) for pk in pks]
+            )
+
+    def rebuild(self, batch_size=2000):
+        from .models import ProductModel
+
+        count = 0
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+            rows = ProductModel.objects.values_list("pk", "name").iterator(
+                chunk_size=batch_size
+            )
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) == batch_size:
+                    count += self._insert(cursor, batch)
+                    batch = []
+            count += self._insert(cursor, batch)
+            cursor.execute(
+                f"INSERT INTO {self.table} ({self.table}) VALUES ('optimize')"
+            )
+        return count
+
+    def search(self, query, limit, using=None):
+        match = self._match(query)
+        if match is None:
+            return []
+        with connections[_products(using).db].cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s "
+                "ORDER BY rank LIMIT %s",
+                [match, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def matches(self, query, using=None):
+        # Run as a subquery of the filtered queryset, on its database.
+        match = self._match(query)
+        if match is None:
+            return None
+        return RawSQL(
+            f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s", [match]
+        )
+
+    def _match(self, query):
+        """
+        Build the FTS5 MATCH expression of `query`, each term quoted as a prefix.
+        """
+
+        terms = search_terms(query)
+        if not terms:
+            return None
+        return " ".join(f'"{term}"*' for term in terms)
+
+    def _insert(self, cursor, rows):
+        if rows:
+            cursor.executemany(
+                f"INSERT INTO {self.table} (rowid, name) VALUES (%s, %s)", rows
+            )
+        return len(rows)
+
+
+def _products(using):
+    from .models import ProductModel
+
+    queryset = ProductModel.objects.all()
+    return queryset.using(using) if using else queryset
+
+
+def search_terms(query):
+    """
+    Split a search box query into word terms, dropping punctuation and FTS syntax.
+    """
+
+    return re.findall(r"\w+", query)
+
+
+@lru_cache(maxsize=None)
+def _load_backend(path):
+    return import_string(path)()
+
+
+def get_search_backend():
+    """
+    Return the backend configured by the PRODUCT_SEARCH_BACKEND setting.
+
+    Defaults to SQLiteFTS5Backend on SQLite and ContainsSearchBackend elsewhere, until a
+    backend for the other databases (e.g. a Postgres tsvector one) is configured.
+    """
+
+    path = getattr(settings, "PRODUCT_SEARCH_BACKEND", None)
+    if path is None:
+        path = (
+            "products.search.SQLiteFTS5Backend"
+            if connection.vendor == "sqlite"
+            else "products.search.ContainsSearchBackend"
+        )
+    return _load_backend(path)
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from ecommerce.serializers import ValuesSerializer
 from .models import ProductModel
 
 
@@ -18,3 +19,13 @@ class ProductSerializer(serializers.ModelSerializer):
     class Meta:
         model = ProductModel
         fields = ("name", "price")
+
+
+class ProductValuesSerializer(ValuesSerializer):
+    """
+    Read-only ProductSerializer for list and retrieve, built from `.values()` rows.
+    """
+
+    serializer_class = ProductSerializer
+    # ProductCursorPagination encodes its cursors from the keys of the page's rows.
+    extra_values = ("id", "price", "created_at")
@@ -1,3 +1,450 @@
-from django.test import TestCase
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.conf import settings
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ecommerce.testing import (
+    AsyncViewAssertionsMixin,
+    ValuesSerializerAssertionsMixin,
+)
+
+from .cache import (
+    CATALOGUE_VERSION_KEY,
+    bump_catalogue_version,
+    get_cache,
+    get_catalogue_version,
+    stats,
+)
+from .filters import ProductSearchFilter
+from .models import ProductModel
+from .serializers import ProductSerializer, ProductValuesSerializer
+from .views import ProductViewSet
+from .search import get_search_backend
+
+
+# Measure the database, not the response cache.
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+)
+class ProductPaginationTests(TestCase):
+    """
+    The catalogue is served in keyset pages with a stable (key, id) ordering.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        # Few distinct prices so that pages split runs of equal keys.
+        ProductModel.objects.bulk_create(
+            ProductModel(name=f"product {i}", price=Decimal(i % 4)) for i in range(25)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse("products:product-list")
+
+    def walk(self, url, direction):
+        names, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            page = [product["name"] for product in response.data["results"]]
+            names = names + page if direction == "next" else page + names
+            url = response.data[direction]
+            pages += 1
+        return names, pages
+
+    def test_pages_cover_catalogue_in_order(self):
+        for ordering in ("price", "-price", "created_at", "-created_at"):
+            with self.subTest(ordering=ordering):
+                names, pages = self.walk(
+                    f"{self.url}?ordering={ordering}&page_size=4", "next"
+                )
+                expected = list(
+                    ProductModel.objects.order_by(
+                        ordering, "-id" if ordering.startswith("-") else "id"
+                    ).values_list("name", flat=True)
+                )
+                self.assertEqual(names, expected)
+                self.assertEqual(pages, 7)
+
+    def test_previous_links_walk_back(self):
+        names, _ = self.walk(f"{self.url}?page_size=4", "next")
+        response = self.client.get(f"{self.url}?page_size=4")
+        while response.data["next"]:
+            last = response
+            response = self.client.get(response.data["next"])
+        self.assertEqual(self.walk(last.data["next"], "previous")[0], names)
+
+    def test_deep_page_costs_the_same_as_the_first(self):
+        url = f"{self.url}?page_size=2"
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        first_page = len(context)
+        while response.data["next"]:
+            url = response.data["next"]
+            response = self.client.get(url)
+        # The validators aggregate plus the page query, at any depth.
+        with self.assertNumQueries(first_page):
+            self.client.get(url)
+
+    def test_page_size_is_capped(self):
+        response = self.client.get(f"{self.url}?page_size=1000")
+        self.assertEqual(len(response.data["results"]), 25)
+        response = self.client.get(f"{self.url}?page_size=5")
+        self.assertEqual(len(response.data["results"]), 5)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(f"{self.url}?cursor=garbage")
+        self.assertEqual(response.status_code, 404)
+
+        response = self.client.get(f"{self.url}?page_size=4")
+        response = self.client.get(response.data["next"] + "&ordering=-price")
+        self.assertEqual(response.status_code, 404)
+
+
+class ProductSearchTests(TestCase):
+    """
+    Catalogue searches are answered by the FTS5 index, kept in sync with ProductModel.
+    """
+
+    def setUp(self):
+        get_cache().clear()
+        self.client = APIClient()
+        self.url = reverse("products:product-list")
+        for name in ["Red mug", "Red red mug", "Blue mug", "Mug holder", "Teapot"]:
+            ProductModel.objects.create(name=name, price=Decimal("5.00"))
+
+    def search(self, term):
+        response = self.client.get(self.url, {"search": term})
+        self.assertEqual(response.status_code, 200)
+        return [product["name"] for product in response.data["results"]]
+
+    def test_prefix_match_ranked(self):
+        self.assertEqual(self.search("red mu"), ["Red red mug", "Red mug"])
+        self.assertCountEqual(
+            self.search("mug"), ["Red mug", "Red red mug", "Blue mug", "Mug holder"]
+        )
+        self.assertEqual(self.search("te"), ["Teapot"])
+        self.assertEqual(self.search("coffee"), [])
+
+    def test_explicit_ordering_overrides_rank(self):
+        ProductModel.objects.filter(name="Blue mug").update(price=Decimal("1.00"))
+        response = self.client.get(self.url, {"search": "mug", "ordering": "price"})
+        self.assertEqual(response.data["results"][0]["name"], "Blue mug")
+
+    def test_explicit_ordering_covers_every_match(self):
+        ProductModel.objects.filter(name="Mug holder").update(price=Decimal("1.00"))
+        with mock.patch.object(ProductSearchFilter, "max_results", 2):
+            # Relevance ordering is capped at max_results...
+            self.assertEqual(len(self.search("mug")), 2)
+            # ...explicit orderings are not, so the cheapest match is never cut off.
+            response = self.client.get(
+                self.url, {"search": "mug", "ordering": "price", "page_size": 2}
+            )
+            names = [product["name"] for product in response.data["results"]]
+            names += [
+                product["name"]
+                for product in self.client.get(response.data["next"]).data["results"]
+            ]
+        self.assertEqual(names[0], "Mug holder")
+        self.assertCountEqual(
+            names, ["Red mug", "Red red mug", "Blue mug", "Mug holder"]
+        )
+
+    def test_search_results_paginate_by_rank(self):
+        response = self.client.get(self.url, {"search": "mug", "page_size": 2})
+        names = [product["name"] for product in response.data["results"]]
+        names += [
+            product["name"]
+            for product in self.client.get(response.data["next"]).data["results"]
+        ]
+        self.assertEqual(names, self.search("mug"))
+
+    def test_index_follows_save_and_delete(self):
+        teapot = ProductModel.objects.get(name="Teapot")
+        teapot.name = "Kettle"
+        with self.captureOnCommitCallbacks(execute=True):
+            teapot.save()
+        self.assertEqual(self.search("tea"), [])
+        self.assertEqual(self.search("kett"), ["Kettle"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            teapot.delete()
+        self.assertEqual(self.search("kett"), [])
+
+    def test_rebuild_command(self):
+        ProductModel.objects.bulk_create([ProductModel(name="Bulk kettle", price=1)])
+        self.assertEqual(self.search("kettle"), [])
+
+        out = StringIO()
+        call_command("rebuild_product_index", batch_size=2, stdout=out)
+        self.assertIn("Indexed 6 products", out.getvalue())
+        self.assertEqual(self.search("kettle"), ["Bulk kettle"])
+
+    def test_query_syntax_is_escaped(self):
+        self.assertEqual(self.search('mug" OR "tea'), [])
+        self.assertEqual(get_search_backend().search("*(^)", 10), [])
+
+
+class ProductResponseCacheTests(TestCase):
+    """
+    Product list/retrieve responses are cached per catalogue version.
+    """
+
+    def setUp(self):
+        get_cache().clear()
+        stats.reset()
+        self.client = APIClient()
+        self.url = reverse("products:product-list")
+        self.product = ProductModel.objects.create(name="Mug", price=Decimal("5.00"))
+        stats.reset()
+
+    def test_repeated_reads_are_served_from_cache(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(first.content, second.content)
+
+        detail = reverse("products:product-detail", kwargs={"pk": self.product.pk})
+        self.client.get(detail)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(detail).data["name"], "Mug")
+        self.assertEqual(stats.as_dict(), {"hits": 2, "misses": 2, "evictions": 0})
+
+    def test_query_string_is_part_of_the_key(self):
+        self.client.get(self.url, {"ordering": "price"})
+        self.client.get(self.url, {"ordering": "-price"})
+        self.client.get(self.url, {"search": "mug"})
+        self.assertEqual(stats.misses, 3)
+
+    def test_evicted_version_is_not_reused(self):
+        self.client.get(self.url)
+        versions = {get_catalogue_version()}
+        self.product.price = Decimal("6.00")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.save()
+        versions.add(get_catalogue_version())
+
+        # The version key is culled like any other; the stale page must not come back.
+        get_cache().delete(CATALOGUE_VERSION_KEY)
+        self.assertNotIn(get_catalogue_version(), versions)
+        self.assertEqual(self.client.get(self.url).data["results"][0]["price"], "6.00")
+
+        get_cache().delete(CATALOGUE_VERSION_KEY)
+        bump_catalogue_version()
+        self.assertNotIn(get_catalogue_version(), versions)
+
+    def test_product_writes_invalidate(self):
+        self.client.get(self.url)
+        self.product.price = Decimal("6.00")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.save()
+        self.assertEqual(self.client.get(self.url).data["results"][0]["price"], "6.00")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.delete()
+        self.assertEqual(self.client.get(self.url).data["results"], [])
+        self.assertEqual(stats.as_dict(), {"hits": 0, "misses": 3, "evictions": 2})
+
+    def test_version_is_bumped_on_commit(self):
+        version = get_catalogue_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.product.price = Decimal("6.00")
+                self.product.save()
+                # Until the write commits, reads still see the old rows.
+                self.assertEqual(get_catalogue_version(), version)
+            self.assertEqual(get_catalogue_version(), version)
+        self.assertNotEqual(get_catalogue_version(), version)
+
+        version = get_catalogue_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.product.save()
+                raise RuntimeError
+        self.assertEqual(get_catalogue_version(), version)
+
+    def test_file_based_backend(self):
+        with tempfile.TemporaryDirectory() as location:
+            backend = "django.core.cache.backends.filebased.FileBasedCache"
+            with self.settings(
+                CACHES={"default": {"BACKEND": backend, "LOCATION": location}}
+            ):
+                self.client.get(self.url)
+                self.client.get(self.url)
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.product.save()
+                self.client.get(self.url)
+        self.assertEqual(stats.as_dict(), {"hits": 1, "misses": 2, "evictions": 1})
+
+
+class ProductConditionalGetTests(TestCase):
+    """
+    Catalogue reads honour If-None-Match/If-Modified-Since without serializing.
+    """
+
+    def setUp(self):
+        get_cache().clear()
+        self.client = APIClient()
+        self.url = reverse("products:product-list")
+        self.product = ProductModel.objects.create(name="Mug", price=Decimal("5.00"))
+        self.detail = reverse("products:product-detail", kwargs={"pk": self.product.pk})
+
+    def assertNotModified(self, url, **headers):
+        get_cache().clear()
+        serializer = mock.Mock(wraps=ProductSerializer)
+        values_serializer = mock.Mock(wraps=ProductValuesSerializer)
+        with mock.patch.multiple(
+            ProductViewSet,
+            serializer_class=serializer,
+            values_serializer_class=values_serializer,
+        ):
+            response = self.client.get(url, headers=headers)
+        self.assertEqual(response.status_code, 304)
+        serializer.assert_not_called()
+        values_serializer.assert_not_called()
+
+    def test_etag(self):
+        for url in (self.url, self.detail):
+            with self.subTest(url=url):
+                etag = self.client.get(url)["ETag"]
+                self.assertNotModified(url, if_none_match=etag)
+
+                ProductModel.objects.create(name="Teapot", price=Decimal("9.00"))
+                self.product.save()
+                response = self.client.get(url, headers={"if-none-match": etag})
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response["ETag"], etag)
+
+    def test_last_modified(self):
+        last_modified = self.client.get(self.url)["Last-Modified"]
+        self.assertNotModified(self.url, if_modified_since=last_modified)
+
+    def test_cached_response_keeps_validators(self):
+        etag = self.client.get(self.url)["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 304)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url)["ETag"], etag)
+
+
+class ProductValuesSerializerTests(ValuesSerializerAssertionsMixin, TestCase):
+    """
+    List and retrieve read `.values()` rows, with output identical to ProductSerializer's.
+    """
+
+    def setUp(self):
+        get_cache().clear()
+        self.client = APIClient()
+        self.url = reverse("products:product-list")
+        for name, price in [
+            ("Red mug", "5.00"),
+            ("Caf\u00e9 mug", "0.10"),
+            ("Teapot", "999999.99"),
+            ("Mug holder", "5.00"),
+            ("Kettle", "12.5"),
+        ]:
+            ProductModel.objects.create(name=name, price=Decimal(price))
+
+    def test_same_representation(self):
+        self.assertSameRepresentation(
+            ProductValuesSerializer, ProductModel.objects.all()
+        )
+
+    def test_endpoints_unchanged(self):
+        detail = reverse(
+            "products:product-detail", kwargs={"pk": ProductModel.objects.first().pk}
+        )
+        cursor = self.client.get(self.url, {"page_size": 2}).data["next"]
+        urls = [
+            self.url,
+            f"{self.url}?ordering=-created_at&page_size=2",
+            f"{self.url}?search=mug&page_size=2",
+            cursor,
+            detail,
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                get_cache().clear()
+                values = self.client.get(url)
+                get_cache().clear()
+                with mock.patch.object(ProductViewSet, "values_actions", ()):
+                    full = self.client.get(url)
+                self.assertEqual(values.status_code, 200)
+                self.assertEqual(values.content, full.content)
+
+
+class AsyncProductViewTests(AsyncViewAssertionsMixin, TestCase):
+    """
+    Under ASGI, list and retrieve are served by async views with the sync views' responses.
+    """
+
+    def setUp(self):
+        get_cache().clear()
+        self.url = reverse("products:product-list")
+        for i, name in enumerate(
+            ["Red mug", "Blue mug", "Teapot", "Kettle", "Mug rack"]
+        ):
+            ProductModel.objects.create(name=name, price=Decimal(i % 3))
+        self.product = ProductModel.objects.get(name="Teapot")
+        self.detail = reverse("products:product-detail", kwargs={"pk": self.product.pk})
+
+    async def test_same_responses(self):
+        page = await self.assertSameResponse(f"{self.url}?page_size=2")
+        urls = [
+            self.url,
+            page.json()["next"],
+            f"{self.url}?ordering=-created_at&page_size=2",
+            f"{self.url}?search=mug",
+            self.detail,
+            reverse("products:product-detail", kwargs={"pk": 0}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                await sync_to_async(get_cache().clear)()
+                await self.assertSameResponse(url)
+                # Again from the response cache.
+                await self.assertSameResponse(url)
+
+    async def test_not_modified(self):
+        for url in (self.url, self.detail):
+            with self.subTest(url=url):
+                etag = (await self.assertSameResponse(url))["ETag"]
+                response = await self.assertSameResponse(
+                    url, headers={"if-none-match": etag}
+                )
+                self.assertEqual(response.status_code, 304)
+
+    @override_settings(ROOT_URLCONF=settings.ASGI_URLCONF)
+    async def test_reads_without_sync_views(self):
+        client = AsyncClient()
+        with mock.patch.multiple(
+            ProductViewSet,
+            list=mock.Mock(side_effect=AssertionError),
+            retrieve=mock.Mock(side_effect=AssertionError),
+        ):
+            self.assertEqual((await client.get(self.url)).status_code, 200)
+            self.assertEqual((await client.get(self.detail)).status_code, 200)
+
+    @override_settings(ROOT_URLCONF=settings.ASGI_URLCONF)
+    async def test_other_requests_use_sync_views(self):
+        client = AsyncClient()
+        response = await client.post(
+            self.url, {"name": "Cup", "price": "2.00"}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 201)
+        response = await client.delete(self.detail)
+        self.assertEqual(response.status_code, 204)
+        response = await client.get(self.url, headers={"accept": "text/html"})
+        self.assertContains(response, "Cup")
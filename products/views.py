@@ -1,27 +1,48 @@
 from django.shortcuts import render
 from rest_framework import status, viewsets, filters
 from rest_framework.response import Response
+from ecommerce.asyncviews import AsyncReadMixin
+from ecommerce.conditional import amodification_stamp, modification_stamp
+from ecommerce.replicas import ReplicaReadMixin
+from ecommerce.serializers import ValuesReadMixin
+from .cache import CachedResponseMixin
+from .filters import ProductSearchFilter
 from .models import ProductModel
-from .serializers import ProductSerializer
+from .pagination import ProductCursorPagination
+from .serializers import ProductSerializer, ProductValuesSerializer
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(
+    CachedResponseMixin,
+    ValuesReadMixin,
+    ReplicaReadMixin,
+    AsyncReadMixin,
+    viewsets.ModelViewSet,
+):
     """
     A ViewSet for handling CRUD operations on Product models.
 
     This ViewSet provides endpoints to perform create, read, update, and delete
     operations on `ProductModel` instances, and supports ordering and searching.
+    List and retrieve responses are served through the versioned cache in `products.cache`.
+    Under ASGI they are served by `alist`/`aretrieve` (see `ecommerce.asgi_urls`). Both read
+    from the read replicas, when configured (see `ecommerce.replicas`).
 
     Attributes:
     - queryset: The set of `ProductModel` instances that this ViewSet will operate on.
     - serializer_class: The serializer class used to serialize and deserialize `ProductModel` instances.
+    - values_serializer_class: The read-only serializer of list and retrieve, which reads `.values()` rows.
+    - replica_actions: The actions reading from the read replicas.
+    - pagination_class: Keyset pagination over (price, id) or (created_at, id).
     - filter_backends: List of filter backends used for filtering and searching results.
     - ordering_fields: List of fields that can be used for ordering the query results.
     - ordering: Default ordering of query results by the specified fields.
-    - search_fields: List of fields that can be searched using the search filter.
+    - search_fields: List of fields that can be searched using the search filter; searches are answered
+      by the product search index (see `products.search`). Searches ordered by relevance (the default)
+      return the best 500 matches; with `ordering=price` or `created_at` they return every match.
 
     Methods:
-    - list: Retrieve a list of products, optionally ordered and filtered based on query parameters.
+    - list: Retrieve a page of products, optionally ordered and filtered based on query parameters.
     - create: Create a new product instance.
     - retrieve: Retrieve a specific product instance by its primary key.
     - update: Update an existing product instance.
@@ -31,7 +52,60 @@ class ProductViewSet(viewsets.ModelViewSet):
 
     queryset = ProductModel.objects.all().order_by("price")
     serializer_class = ProductSerializer
-    filter_backends = [filters.OrderingFilter, filters.SearchFilter]
-    ordering_fields = ["price"]
+    values_serializer_class = ProductValuesSerializer
+    pagination_class = ProductCursorPagination
+    filter_backends = [filters.OrderingFilter, ProductSearchFilter]
+    ordering_fields = ["price", "created_at"]
     ordering = ["price"]
     search_fields = ["name"]
+    replica_actions = ("list", "retrieve")
+
+    def get_validators(self, request, *args, **kwargs):
+        """
+        Compute the ETag/Last-Modified validators without serializing any product.
+
+        Lists are validated by the row count and latest `updated_at` of the filtered catalogue,
+        a single product by its own `updated_at`.
+
+        Returns:
+            tuple: The `(etag, last_modified)` pair, or `(None, None)` for a missing product.
+        """
+
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.action == "retrieve":
+            lookup = self.lookup_url_kwarg or self.lookup_field
+            last_modified = (
+                queryset.filter(**{self.lookup_field: kwargs[lookup]})
+                .values_list("updated_at", flat=True)
+                .first()
+            )
+            if last_modified is None:
+                return None, None
+            return (
+                f"product-{kwargs[lookup]}-{last_modified.timestamp()}",
+                last_modified,
+            )
+
+        return modification_stamp("products", queryset)
+
+    async def aget_validators(self, request, *args, **kwargs):
+        """
+        Async counterpart of `get_validators`.
+        """
+
+        queryset = await self.afilter_queryset(self.get_queryset())
+        if self.action == "retrieve":
+            lookup = self.lookup_url_kwarg or self.lookup_field
+            last_modified = await (
+                queryset.filter(**{self.lookup_field: kwargs[lookup]})
+                .values_list("updated_at", flat=True)
+                .afirst()
+            )
+            if last_modified is None:
+                return None, None
+            return (
+                f"product-{kwargs[lookup]}-{last_modified.timestamp()}",
+                last_modified,
+            )
+
+        return await amodification_stamp("products", queryset)
@@ -0,0 +1,169 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# Claims copied from the user into every token, and served by LazyTokenUser without a query.
+USER_CLAIMS = ("username", "is_staff")
+
+
+class UserClaimsRefreshToken(RefreshToken):
+    """
+    Refresh token carrying the USER_CLAIMS, which its access tokens inherit.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
+
+
+class UserClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    `api/token/` serializer issuing UserClaimsRefreshToken pairs.
+    """
+
+    token_class = UserClaimsRefreshToken
+
+
+class UserCache:
+    """
+    In-process LRU cache of full User rows, keyed by primary key.
+
+    Entries expire `TOKEN_USER_CACHE_TTL` seconds (default 60) after being loaded, and the least
+    recently used entry is evicted beyond `TOKEN_USER_CACHE_SIZE` entries (default 1024). User
+    saves and deletes discard their entry (see the receivers in users/models.py); other
+    processes see such changes once the TTL has passed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, pk):
+        """
+        Return the active user with the given primary key.
+
+        Raises:
+            AuthenticationFailed: If the user does not exist or is inactive.
+        """
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(pk)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(pk)
+                return entry[0]
+
+        user = User.objects.filter(pk=pk).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed("User not found", code="user_not_found")
+
+        with self._lock:
+            self._entries[pk] = (
+                user,
+                now + getattr(settings, "TOKEN_USER_CACHE_TTL", 60),
+            )
+            self._entries.move_to_end(pk)
+            while len(self._entries) > getattr(settings, "TOKEN_USER_CACHE_SIZE", 1024):
+                self._entries.popitem(last=False)
+        return user
+
+    def discard(self, pk):
+        with self._lock:
+            self._entries.pop(pk, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache()
+
+
+class LazyTokenUser(TokenUser):
+    """
+    Request user built from a validated access token, without a database query.
+
+    `id`, `username` and `is_staff` come from the token's claims. Anything else (other User
+    fields, relations, permissions) is read from the full User row, loaded on first use through
+    `user_cache`. Configured as SIMPLE_JWT["TOKEN_USER_CLASS"] for JWTStatelessUserAuthentication.
+
+    Tokens issued without the USER_CLAIMS fall back to the full user for them.
+    """
+
+    @cached_property
+    def id(self):
+        # simplejwt stores the id claim as a string.
+        return User._meta.pk.to_python(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def user(self):
+        """
+        The full User model instance behind the token.
+        """
+
+        return user_cache.get(self.id)
+
+    @cached_property
+    def username(self):
+        return self._claim("username")
+
+    @cached_property
+    def is_staff(self):
+        return self._claim("is_staff")
+
+    @cached_property
+    def is_superuser(self):
+        return self.user.is_superuser
+
+    @property
+    def groups(self):
+        return self.user.groups
+
+    @property
+    def user_permissions(self):
+        return self.user.user_permissions
+
+    def get_group_permissions(self, obj=None):
+        return self.user.get_group_permissions(obj)
+
+    def get_all_permissions(self, obj=None):
+        return self.user.get_all_permissions(obj)
+
+    def has_perm(self, perm, obj=None):
+        return self.user.has_perm(perm, obj)
+
+    def has_perms(self, perm_list, obj=None):
+        return self.user.has_perms(perm_list, obj)
+
+    def has_module_perms(self, module):
+        return self.user.has_module_perms(module)
+
+    def _claim(self, claim):
+        if claim in self.token:
+            return self.token[claim]
+        return getattr(self.user, claim)
+
+    def __getattr__(self, attr):
+        if attr.startswith("_") or attr == "token":
+            raise AttributeError(attr)
+        return getattr(self.user, attr)
+
+
+def get_full_user(user):
+    """
+    Return the User model instance for a request user, e.g. to assign it to a foreign key.
+    """
+
+    return user.user if isinstance(user, LazyTokenUser) else user
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 hasher whose work factor comes from the PASSWORD_HASH_ITERATIONS setting.
+
+    It keeps the `pbkdf2_sha256` algorithm name, so it verifies every existing PBKDF2 hash
+    (the iteration count is stored in the hash) and re-hashes a password to the configured
+    count on its next successful login. Use `manage.py bench_login` to measure the cost of a
+    setting before changing it.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(
+            settings, "PASSWORD_HASH_ITERATIONS", PBKDF2PasswordHasher.iterations
+        )
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    UNUSABLE_PASSWORD_PREFIX,
+    identify_hasher,
+    make_password,
+)
+from django.db import migrations
+
+
+def hash_plaintext_passwords(apps, schema_editor):
+    """
+    Hash the passwords that registration used to store in plain text, so they can be verified.
+    """
+
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    users = User.objects.exclude(password="").exclude(
+        password__startswith=UNUSABLE_PASSWORD_PREFIX
+    )
+    for user in users.only("pk", "password").iterator():
+        try:
+            identify_hasher(user.password)
+        except ValueError:
+            user.password = make_password(user.password)
+            user.save(update_fields=["password"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(hash_plaintext_passwords, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,10 @@
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.contrib.auth.models import User
 
+from .authentication import user_cache
+
 
 class UserModel(models.Model):
     """
@@ -38,3 +42,12 @@ class UserModel(models.Model):
 
     def __str__(self):
         return self.user.username
+
+
+@receiver([post_save, post_delete], sender=User)
+def discard_cached_user(sender, instance, **kwargs):
+    """
+    Drop a changed or deleted user from the token users' cache.
+    """
+
+    user_cache.discard(instance.pk)
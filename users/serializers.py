@@ -11,8 +11,8 @@ class UserSerializer(serializers.ModelSerializer):
 
     Fields:
     - username: The username of the user.
-    - password: The password of the user. Note that passwords should be
-      handled with care and are typically hashed before being stored.
+    - password: The password of the user. It is write-only, and hashed with the
+      configured PASSWORD_HASHERS before being stored.
 
     Meta:
     - model: The model associated with this serializer, which is User.
@@ -22,3 +22,11 @@ class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ["username", "password"]
+        extra_kwargs = {"password": {"write_only": True}}
+
+    def create(self, validated_data):
+        """
+        Create the user with a hashed password.
+        """
+
+        return User.objects.create_user(**validated_data)
@@ -1,3 +1,171 @@
-from django.test import TestCase
+from importlib import import_module
 
-# Create your tests here.
+from decimal import Decimal
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from cart.models import Cart, CartItem
+from orders.models import OrderModel
+from products.models import ProductModel
+from .authentication import LazyTokenUser, UserClaimsRefreshToken, user_cache
+
+
+# A cheap work factor keeps the tests fast; the hasher is otherwise unchanged.
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class LoginTests(TestCase):
+    """
+    Logins verify the password; the token endpoint does so without any write.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="alice", password="s3cret-pass")
+
+    def post(self, url, username="alice", password="s3cret-pass"):
+        return self.client.post(
+            url, {"username": username, "password": password}, format="json"
+        )
+
+    def test_register_hashes_password(self):
+        response = self.post("/users/register/", "bob", "an0ther-pass")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data, {"username": "bob"})
+        user = User.objects.get(username="bob")
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$1000$"))
+        self.assertTrue(user.check_password("an0ther-pass"))
+
+    def test_token_login_is_a_single_read(self):
+        with self.assertNumQueries(1):
+            response = self.post("/users/token/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data), {"user", "access", "refresh"})
+        self.assertNotIn("sessionid", response.cookies)
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.last_login)
+
+    def test_session_login(self):
+        response = self.post("/users/login/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("access", response.data)
+        self.assertIn("sessionid", response.cookies)
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+
+    def test_invalid_credentials(self):
+        for url in ("/users/login/", "/users/token/"):
+            for username, password in [("alice", "wrong"), ("nobody", "s3cret-pass")]:
+                with self.subTest(url=url, username=username):
+                    response = self.post(url, username, password)
+                    self.assertEqual(response.status_code, 401)
+                    self.assertNotIn("access", response.data)
+
+    def test_password_is_rehashed_to_new_work_factor(self):
+        with self.settings(PASSWORD_HASH_ITERATIONS=2000):
+            self.assertEqual(self.post("/users/token/").status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$2000$"))
+
+    def test_plaintext_passwords_are_hashed_by_migration(self):
+        User.objects.filter(pk=self.user.pk).update(password="legacy-plain")
+        migration = import_module("users.migrations.0002_hash_plaintext_passwords")
+        migration.hash_plaintext_passwords(apps, None)
+        self.assertEqual(
+            self.post("/users/token/", password="legacy-plain").status_code, 200
+        )
+
+
+class TokenUserTests(TestCase):
+    """
+    Requests authenticate from the token's claims, loading the User row only when needed.
+    """
+
+    def setUp(self):
+        user_cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="alice", is_staff=True)
+        self.token = UserClaimsRefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+
+    def user_queries(self, call):
+        with CaptureQueriesContext(connection) as context:
+            response = call()
+        return response, [
+            query["sql"] for query in context if '"auth_user"' in query["sql"]
+        ]
+
+    def test_claims_identify_user_without_a_query(self):
+        token_user = LazyTokenUser(AccessToken(str(self.token)))
+        with self.assertNumQueries(0):
+            self.assertEqual(token_user.id, self.user.pk)
+            self.assertEqual(token_user.username, "alice")
+            self.assertTrue(token_user.is_staff)
+
+    def test_cart_requests_do_not_load_the_user(self):
+        Cart.objects.for_user(self.user)
+        response, queries = self.user_queries(
+            lambda: self.client.get(reverse("cart:cart-list"))
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, [])
+
+    def test_full_user_is_loaded_once_and_cached(self):
+        token_user = LazyTokenUser(AccessToken(str(self.token)))
+        with self.assertNumQueries(1):
+            self.assertEqual(token_user.email, "")
+            self.assertEqual(token_user.user, self.user)
+        with self.assertNumQueries(0):
+            LazyTokenUser(AccessToken(str(self.token))).date_joined
+
+        self.user.save()
+        with self.assertNumQueries(1):
+            LazyTokenUser(AccessToken(str(self.token))).date_joined
+
+    def test_cache_expiry_and_size(self):
+        other = User.objects.create_user(username="bob")
+        with self.settings(TOKEN_USER_CACHE_TTL=0):
+            user_cache.get(self.user.pk)
+            with self.assertNumQueries(1):
+                user_cache.get(self.user.pk)
+        with self.settings(TOKEN_USER_CACHE_SIZE=1):
+            user_cache.get(self.user.pk)
+            user_cache.get(other.pk)
+            with self.assertNumQueries(1):
+                user_cache.get(self.user.pk)
+
+    def checkout(self):
+        return self.client.post(
+            reverse("orders:order-create", kwargs={"user_id": self.user.pk}),
+            {
+                "country": "EG",
+                "city": "Cairo",
+                "state": "Cairo",
+                "street": "Tahrir",
+                "phone": "0100",
+            },
+        )
+
+    def test_checkout_with_token_user(self):
+        product = ProductModel.objects.create(name="Mug", price=Decimal("4.00"))
+        CartItem.objects.create(cart=Cart.objects.for_user(self.user), product=product)
+        self.assertEqual(self.checkout().status_code, 201)
+        self.assertTrue(OrderModel.objects.filter(user=self.user).exists())
+
+    def test_deleted_user_is_rejected_when_loaded(self):
+        User.objects.filter(pk=self.user.pk).delete()
+        self.assertEqual(self.checkout().status_code, 401)
+
+    def test_obtain_pair_includes_claims(self):
+        self.user.set_password("s3cret-pass")
+        self.user.save()
+        response = APIClient().post(
+            "/api/token/", {"username": "alice", "password": "s3cret-pass"}
+        )
+        token = AccessToken(response.data["access"])
+        self.assertEqual((token["username"], token["is_staff"]), ("alice", True))
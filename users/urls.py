@@ -16,4 +16,6 @@ urlpatterns = [
     ## URL for user registration.
     path("login/", UserAuthenticatedView.as_view({"post": "login"})),
     ## URL for user login.
+    path("token/", UserAuthenticatedView.as_view({"post": "token"})),
+    ## URL for JWT-only login: verifies the password and issues tokens, without a session.
 ]